@@ -1,70 +1,400 @@
+import glob
+import os
+import time
 import pandas as pd
 import numpy as np
+from pandas.io.parsers import TextParser
 from datetime import datetime
+from cache import read_cache, write_cache, arrow_safe
+from pips import pip_values, load_pip_table, load_rates
+from parallel import run_tasks
 
-def load_data(filepath):
-    """Carga y prepara los datos del archivo Excel"""
+HEADER_SEARCH_ROWS = 20
+# Códigos de error de Excel (los mismos que openpyxl.cell.cell.ERROR_CODES)
+ERROR_CODES = ('#NULL!', '#DIV/0!', '#VALUE!', '#REF!', '#NAME?', '#NUM!', '#N/A')
+PROGRESS_EVERY = 10000
+STRATEGY_COLUMN = 'ESTRATEGIA'
+SEQUENCE_INDEX = 'SECUENCIA'
+DIAS_SEMANA = ['Lunes', 'Martes', 'Miércoles', 'Jueves', 'Viernes', 'Sábado', 'Domingo']
+HEATMAP_LAYERS = ('sum', 'count', 'mean', 'win_rate')
+NS_PER_HOUR = 3600 * 10**9
+NS_PER_DAY = 24 * NS_PER_HOUR
+# Valor en $ de un pip por lote por defecto (pips.py da el valor de cada DIVISA)
+DEFAULT_PIP_VALUE = 10
+# Texto con menos valores distintos que esta fracción de filas pasa a categórico
+CATEGORY_MAX_RATIO = 0.5
+# Columnas que el modo compacto deja en float64 (importes sumados con fsum)
+KEEP_FLOAT64 = ('RESULTADO $',)
+RESULTADO_TIPOS = ['Pérdida', 'Ganancia']
+
+def resolve_sources(source):
+    """Lista de libros a partir de un archivo, un directorio o un patrón glob"""
+    if os.path.isdir(source):
+        pattern = os.path.join(source, '*.xlsx')
+    elif glob.has_magic(source):
+        pattern = source
+    else:
+        return [source]
+    # Los archivos ~$ son bloqueos temporales de Excel
+    return sorted(
+        path for path in glob.glob(pattern)
+        if os.path.isfile(path) and not os.path.basename(path).startswith('~$')
+    )
+
+def load_data(filepath, use_cache=True, progress=None, workers=None, compact=False):
+    """Carga y prepara los datos del archivo Excel, usando la caché Parquet si está vigente
+
+    filepath puede ser un directorio o un patrón glob: entonces se cargan
+    todos los libros en paralelo con load_many y se añade la columna
+    ESTRATEGIA. progress, si se indica, se llama como
+    progress(filas_leidas, filas_por_segundo) durante la lectura de un libro.
+    Con compact=True se aplica compact_dtypes al resultado.
+    """
+    sources = resolve_sources(filepath)
+    if sources != [filepath]:
+        df = load_many(sources, use_cache=use_cache, workers=workers)
+        return compact_dtypes(df) if compact else df
+
+    df = read_cache(filepath) if use_cache else None
+    if df is None:
+        df = _parse_workbook(filepath, progress)
+        if use_cache:
+            df = arrow_safe(df)
+            write_cache(filepath, df)
+
+    return compact_dtypes(df) if compact else df
+
+def strategy_name(filepath):
+    """Nombre de estrategia a partir del nombre del libro"""
+    return os.path.splitext(os.path.basename(filepath))[0]
+
+def strategy_names(filepaths, reserved=()):
+    """Nombre único por libro para un conjunto de libros
+
+    Es strategy_name salvo que varios libros lo compartan: entonces se usa la
+    ruta relativa al directorio común de esos libros, con '__' por separador.
+    Si aun así se repite (o coincide con un nombre reservado) se añade un sufijo.
+    """
+    names = [strategy_name(path) for path in filepaths]
+    repeated = {name for name in names if names.count(name) > 1}
+    for name in repeated:
+        paths = [os.path.abspath(path) for path, other in zip(filepaths, names) if other == name]
+        root = os.path.commonpath([os.path.dirname(path) for path in paths])
+        relative = iter(os.path.splitext(os.path.relpath(path, root))[0].replace(os.sep, '__') for path in paths)
+        names = [next(relative) if other == name else other for other in names]
+
+    taken = set(reserved)
+    unique = []
+    for name in names:
+        candidate, suffix = name, 2
+        while candidate in taken:
+            candidate, suffix = f'{name}_{suffix}', suffix + 1
+        taken.add(candidate)
+        unique.append(candidate)
+    return unique
+
+def load_many(filepaths, use_cache=True, workers=None):
+    """Carga varios libros en paralelo y los une con una columna ESTRATEGIA
+
+    ESTRATEGIA sale de strategy_names: libros con el mismo nombre en
+    directorios distintos quedan como estrategias distintas. Cada libro se
+    procesa en un proceso del pool (con su propia caché Parquet), así que el
+    tiempo escala con los núcleos disponibles.
+    """
+    if not filepaths:
+        raise ValueError("No se encontraron archivos de backtesting")
+
+    frames = run_tasks(load_data, [(path, use_cache) for path in filepaths], workers)
+    for name, frame in zip(strategy_names(filepaths), frames):
+        frame.insert(0, STRATEGY_COLUMN, name)
+    # Curva conjunta en orden cronológico; sin FECHA se mantiene el orden de los archivos
+    return order_operations(pd.concat(frames, ignore_index=True))
+
+def _convert_cell(value):
+    """Convierte un valor de celda igual que pandas.read_excel con openpyxl"""
+    if value is None:
+        return ''
+    if isinstance(value, float):
+        if value.is_integer():
+            return int(value)
+        return value
+    if isinstance(value, str) and value in ERROR_CODES:
+        return np.nan
+    return value
+
+def read_sheet(filepath, progress=None):
+    """Lee la primera hoja en una sola pasada y devuelve el DataFrame con encabezados
+
+    Usa openpyxl en modo read_only: la fila de encabezados se detecta entre las
+    primeras filas mientras se recorre el libro, sin una segunda lectura. Las
+    celdas se guardan directamente en una lista por columna (sin una lista por
+    fila) y cada columna se convierte y se libera antes de pasar a la siguiente.
+    """
+    # openpyxl solo hace falta al leer Excel, no cuando se usa la caché
+    import openpyxl
+
+    wb = openpyxl.load_workbook(filepath, read_only=True, data_only=True, keep_links=False)
     try:
-        # Leer todo el archivo sin asumir encabezados
-        df_raw = pd.read_excel(filepath, header=None)
-        
-        # Encontrar la fila con los encabezados
-        header_row = None
-        for i in range(min(20, len(df_raw))):
-            if 'OPERACIÓN' in df_raw.iloc[i].values:
-                header_row = i
-                break
-        
-        if header_row is None:
-            raise ValueError("No se encontró la fila con los encabezados")
-        
-        # Leer nuevamente el archivo con los encabezados correctos
-        df = pd.read_excel(filepath, header=header_row)
-        
-        # Limpiar nombres de columnas
-        df.columns = [str(col).strip() for col in df.columns]
-        
-        # Verificar columnas esenciales
-        required_columns = ['OPERACIÓN', 'DIVISA', 'LOTAJE', 'PIPS. TP', 'PIPS SL', 'RESULTADO']
-        missing_cols = [col for col in required_columns if col not in df.columns]
-        if missing_cols:
-            raise ValueError(f"Columnas requeridas no encontradas: {missing_cols}")
-        
-        # Filtrar solo filas con datos válidos
-        df = df.dropna(subset=['OPERACIÓN', 'RESULTADO'], how='all')
-        df = df[df['RESULTADO'].notna() & (df['RESULTADO'] != '')]
-        
-        # Limpiar y estandarizar datos
-        df['RESULTADO'] = df['RESULTADO'].astype(str).str.strip().str.lower()
-        df['LOTAJE'] = pd.to_numeric(df['LOTAJE'], errors='coerce').fillna(0)
-        df['PIPS. TP'] = pd.to_numeric(df['PIPS. TP'], errors='coerce').fillna(0)
-        df['PIPS SL'] = pd.to_numeric(df['PIPS SL'], errors='coerce').fillna(0)
-        
-        # Calcular RESULTADO $ si no existe
-        if 'RESULTADO $' not in df.columns:
-            df['RESULTADO $'] = df.apply(
-                lambda row: (row['PIPS. TP'] * row['LOTAJE'] * 10) if 'take profit' in row['RESULTADO'] else
-                           (row['PIPS SL'] * row['LOTAJE'] * 10 * -1) if 'stop loss' in row['RESULTADO'] else 0,
-                axis=1
-            )
-        else:
-            df['RESULTADO $'] = pd.to_numeric(
-                df['RESULTADO $'].astype(str).str.replace('[^\d.-]', '', regex=True),
-                errors='coerce'
-            ).fillna(0)
-        
-        # Convertir a fecha si existe columna de fecha
-        if 'FECHA' in df.columns:
-            df['FECHA'] = pd.to_datetime(df['FECHA'], errors='coerce')
-        
-        # Asegurar que OPERACIÓN sea única
-        df['OPERACIÓN'] = df['OPERACIÓN'].astype(str) + '_' + df.index.astype(str)
-        
-        return df
+        sheet = wb.worksheets[0]
+        sheet.reset_dimensions()
+
+        header = None
+        columns = []
+        n_rows = 0
+        rows_with_data = 0
+        start = time.perf_counter()
+        for row_number, row in enumerate(sheet.iter_rows(values_only=True)):
+            converted = [_convert_cell(value) for value in row]
+            while converted and converted[-1] == '':
+                converted.pop()
+
+            if header is None:
+                if 'OPERACIÓN' in converted:
+                    header = converted
+                    columns = [[] for _ in header]
+                elif row_number >= HEADER_SEARCH_ROWS - 1:
+                    break
+                continue
+
+            # Una fila más ancha que las anteriores abre columnas completadas con ''
+            for _ in range(len(columns), len(converted)):
+                columns.append([''] * n_rows)
+            for column, value in zip(columns, converted):
+                column.append(value)
+            for column in columns[len(converted):]:
+                column.append('')
+            n_rows += 1
+            if converted:
+                rows_with_data = n_rows
+
+            if progress is not None and n_rows % PROGRESS_EVERY == 0:
+                elapsed = time.perf_counter() - start
+                progress(n_rows, n_rows / elapsed if elapsed > 0 else 0.0)
+    finally:
+        wb.close()
+
+    if header is None:
+        raise ValueError("No se encontró la fila con los encabezados")
+
+    # Descartar filas vacías al final
+    for column in columns:
+        del column[rows_with_data:]
+
+    if progress is not None:
+        elapsed = time.perf_counter() - start
+        progress(rows_with_data, rows_with_data / elapsed if elapsed > 0 else 0.0)
+
+    # TextParser aplica la misma inferencia de tipos y nombres que read_excel (que
+    # conserva las filas vacías): primero los nombres sobre el encabezado y luego
+    # cada columna por separado
+    header = header + [''] * (len(columns) - len(header))
+    names = TextParser([header], header=0).read().columns
+    data = {}
+    for i, name in enumerate(names):
+        column, columns[i] = columns[i], None
+        data[name] = TextParser([[value] for value in column], header=None, names=[name],
+                                skip_blank_lines=False).read()[name]
+    return pd.DataFrame(data, columns=names)
+
+def _parse_workbook(filepath, progress=None):
+    """Lee el libro Excel y limpia los datos de operaciones"""
+    try:
+        df = read_sheet(filepath, progress)
+        return clean_data(df)
     
     except Exception as e:
         raise ValueError(f"Error procesando archivo: {str(e)}")
 
+def clean_data(df, pip_table=None, rates=None):
+    """Limpia las operaciones leídas del libro y calcula las columnas derivadas
+
+    Si falta RESULTADO $ se calcula con el valor del pip de cada DIVISA
+    (pip_table y rates, por defecto los de BACKTESTING_PIP_TABLE y
+    BACKTESTING_RATES; ver pips.py).
+    """
+    # Limpiar nombres de columnas
+    df.columns = [str(col).strip() for col in df.columns]
+    
+    # Verificar columnas esenciales
+    required_columns = ['OPERACIÓN', 'DIVISA', 'LOTAJE', 'PIPS. TP', 'PIPS SL', 'RESULTADO']
+    missing_cols = [col for col in required_columns if col not in df.columns]
+    if missing_cols:
+        raise ValueError(f"Columnas requeridas no encontradas: {missing_cols}")
+    
+    # Filtrar solo filas con datos válidos
+    df = df.dropna(subset=['OPERACIÓN', 'RESULTADO'], how='all')
+    df = df[df['RESULTADO'].notna() & (df['RESULTADO'] != '')]
+    
+    # Limpiar y estandarizar datos
+    resultado = normalize_labels(df['RESULTADO'])
+    df['RESULTADO'] = np.asarray(resultado)
+    df['LOTAJE'] = pd.to_numeric(df['LOTAJE'], errors='coerce').fillna(0)
+    df['PIPS. TP'] = pd.to_numeric(df['PIPS. TP'], errors='coerce').fillna(0)
+    df['PIPS SL'] = pd.to_numeric(df['PIPS SL'], errors='coerce').fillna(0)
+    
+    # Convertir a fecha si existe columna de fecha
+    if 'FECHA' in df.columns:
+        df['FECHA'] = pd.to_datetime(df['FECHA'], errors='coerce')
+    
+    # Calcular RESULTADO $ si no existe
+    if 'RESULTADO $' not in df.columns:
+        pip_value = pip_values(
+            df['DIVISA'],
+            fechas=df['FECHA'] if 'FECHA' in df.columns else None,
+            pip_table=load_pip_table() if pip_table is None else pip_table,
+            rates=load_rates() if rates is None else rates
+        )
+        df['RESULTADO $'] = compute_resultado_usd(
+            resultado, df['PIPS. TP'], df['PIPS SL'], df['LOTAJE'], pip_value
+        )
+    else:
+        df['RESULTADO $'] = clean_amounts(df['RESULTADO $'])
+    
+    # Número de operación antes de convertir OPERACIÓN en etiqueta
+    numero = pd.to_numeric(df['OPERACIÓN'], errors='coerce')
+    
+    # Asegurar que OPERACIÓN sea única
+    df['OPERACIÓN'] = df['OPERACIÓN'].astype(str) + '_' + df.index.astype(str)
+    
+    return order_operations(df, numero)
+
+def normalize_labels(series):
+    """Normaliza etiquetas de texto (strip + minúsculas) como categórico
+
+    La limpieza de texto se hace sobre los valores únicos y se propaga con los
+    códigos, así el coste por fila es solo numérico.
+    """
+    codes, uniques = pd.factorize(series)
+    labels = pd.Index(uniques, dtype=object).astype(str).str.strip().str.lower()
+    label_codes, label_uniques = pd.factorize(labels)
+    codes = np.where(codes >= 0, label_codes[codes], -1)
+    return pd.Categorical.from_codes(codes, categories=label_uniques)
+
+def resultado_masks(resultado):
+    """Máscaras de take profit y stop loss a partir de la columna RESULTADO"""
+    if isinstance(resultado, pd.Series) and isinstance(resultado.dtype, pd.CategoricalDtype):
+        resultado = resultado.array
+    if not isinstance(resultado, pd.Categorical):
+        resultado = pd.Categorical(np.asarray(resultado, dtype=object))
+    categories = pd.Index(resultado.categories).astype(str)
+    codes = resultado.codes
+    valid = codes >= 0
+
+    # Un str.contains por categoría en lugar de uno por fila
+    is_tp = categories.str.contains('take profit', regex=False)
+    is_sl = categories.str.contains('stop loss', regex=False)
+    tp_mask = valid & np.asarray(is_tp, dtype=bool)[codes]
+    sl_mask = valid & np.asarray(is_sl, dtype=bool)[codes]
+    return tp_mask, sl_mask
+
+def compute_resultado_usd(resultado, pips_tp, pips_sl, lotaje, pip_value=DEFAULT_PIP_VALUE):
+    """Calcula RESULTADO $ vectorizado: TP positivo, SL negativo, 0 en otro caso"""
+    tp_mask, sl_mask = resultado_masks(resultado)
+    tp = np.asarray(pips_tp, dtype=float)
+    sl = np.asarray(pips_sl, dtype=float)
+    lot = np.asarray(lotaje, dtype=float)
+
+    # Mismo orden de operaciones que el cálculo fila a fila para obtener los mismos floats
+    values = np.select(
+        [tp_mask, sl_mask],
+        [tp * lot * pip_value, sl * lot * pip_value * -1],
+        default=0.0
+    )
+    index = pips_tp.index if isinstance(pips_tp, pd.Series) else None
+    return pd.Series(values, index=index, dtype=float)
+
+def clean_amounts(series):
+    """Convierte una columna de importes con símbolos ($, espacios...) a float"""
+    if pd.api.types.is_numeric_dtype(series):
+        return pd.to_numeric(series, errors='coerce').fillna(0)
+    return pd.to_numeric(
+        series.astype(str).str.replace('[^\d.-]', '', regex=True),
+        errors='coerce'
+    ).fillna(0)
+
+def order_operations(df, numero=None):
+    """Ordena las operaciones por FECHA y número de operación con un índice SECUENCIA
+
+    El orden es FECHA (nulas al final), luego el número de operación si se
+    indica y por último el orden de lectura. El índice resultante es un
+    RangeIndex int64 ya ordenado, de modo que la curva de capital no necesita
+    volver a ordenar.
+    """
+    keys = [np.arange(len(df))]
+    if numero is not None:
+        keys.append(np.nan_to_num(np.asarray(numero, dtype=float), nan=np.inf))
+    if 'FECHA' in df.columns:
+        fechas = df['FECHA'].to_numpy(dtype='datetime64[ns]').view(np.int64)
+        keys.append(np.where(fechas == np.iinfo(np.int64).min, np.iinfo(np.int64).max, fechas))
+
+    order = np.lexsort(keys)
+    if not np.array_equal(order, keys[0]):
+        df = df.take(order)
+    df.index = pd.RangeIndex(len(df), name=SEQUENCE_INDEX)
+    return df
+
+def _compact_numeric(series):
+    """Entero o float32 más pequeño que conserva exactamente los valores, o la serie sin cambios"""
+    values = series.to_numpy()
+    if series.dtype.kind == 'f' and not np.isnan(values).any() and np.array_equal(values, np.round(values)):
+        downcast = pd.to_numeric(series, downcast='integer')
+        if downcast.dtype.kind == 'i':
+            return downcast
+    if series.dtype.kind == 'i':
+        return pd.to_numeric(series, downcast='integer')
+    if series.dtype == np.float64:
+        as_float32 = values.astype(np.float32)
+        if np.array_equal(as_float32.astype(np.float64), values, equal_nan=True):
+            return pd.Series(as_float32, index=series.index, name=series.name)
+    return series
+
+def compact_dtypes(df):
+    """Reduce la memoria del DataFrame sin cambiar sus valores
+
+    Quita las columnas 'Unnamed' vacías, pasa a categórico el texto con pocos
+    valores distintos (DIVISA, RESULTADO, ORDEN...), guarda el resto del texto
+    (OPERACIÓN, enlaces) como cadenas Arrow si pyarrow está disponible y baja
+    los números a int o float32 solo cuando la conversión es exacta.
+    RESULTADO $ queda en float64. El ahorro queda en df.attrs['memoria'].
+    """
+    before = int(df.memory_usage(index=True, deep=True).sum())
+    empty = [col for col in df.columns
+             if str(col).startswith('Unnamed') and (df[col].isna() | (df[col] == '')).all()]
+    df = df.drop(columns=empty)
+
+    try:
+        import pyarrow  # noqa: F401
+        string_dtype = 'string[pyarrow]'
+    except ImportError:
+        string_dtype = None
+
+    # drop devuelve un DataFrame nuevo: se puede modificar sin tocar el original
+    for col in df.columns:
+        series = df[col]
+        if col in KEEP_FLOAT64:
+            continue
+        if series.dtype == object:
+            if series.nunique(dropna=True) <= max(1, len(series) * CATEGORY_MAX_RATIO):
+                df[col] = series.astype('category')
+            elif string_dtype and pd.api.types.infer_dtype(series, skipna=True) == 'string':
+                df[col] = series.astype(string_dtype)
+        elif series.dtype.kind in 'if':
+            df[col] = _compact_numeric(series)
+
+    after = int(df.memory_usage(index=True, deep=True).sum())
+    df.attrs['memoria'] = {
+        'antes_mb': before / 2**20,
+        'despues_mb': after / 2**20,
+        'ahorro': 1 - after / before if before else 0.0,
+        'columnas_vacias': len(empty)
+    }
+    return df
+
+def resultado_tipo(resultado):
+    """Etiqueta Ganancia/Pérdida como categórico (un byte por fila)"""
+    values = np.asarray(resultado, dtype=float)
+    return pd.Categorical.from_codes((values >= 0).astype(np.int8), categories=RESULTADO_TIPOS)
+
 def calculate_drawdown(series):
     """Calcula el drawdown de una serie de profits acumulados"""
     cumulative = series.cumsum()
@@ -72,33 +402,74 @@ def calculate_drawdown(series):
     drawdown = (cumulative - peak)
     return drawdown
 
-def prepare_analysis_data(df):
-    """Prepara todos los datos para análisis"""
+def heatmap_grid(fechas, resultado, layer='sum'):
+    """Matriz 7x24 (lunes a domingo x hora) del resultado con np.bincount
+
+    layer puede ser 'sum' (profit), 'count' (operaciones), 'mean' (profit
+    medio) o 'win_rate' (proporción de ganadoras). Las celdas sin operaciones
+    valen 0 en sum/count y NaN en mean/win_rate. Las filas sin fecha o sin
+    resultado se ignoran, como en pivot_table.
+    """
+    if layer not in HEATMAP_LAYERS:
+        raise ValueError(f"Capa de heatmap desconocida: {layer}")
+
+    ns = np.asarray(fechas, dtype='datetime64[ns]').view(np.int64)
+    values = np.asarray(resultado, dtype=float)
+    valid = (ns != np.iinfo(np.int64).min) & ~np.isnan(values)
+    ns = ns[valid]
+    values = values[valid]
+
+    # Día de la semana y hora con aritmética entera: el 1970-01-01 fue jueves
+    dayofweek = (ns // NS_PER_DAY + 3) % 7
+    hour = (ns // NS_PER_HOUR) % 24
+    codes = dayofweek * 24 + hour
+
+    count = np.bincount(codes, minlength=7 * 24)
+    if layer == 'count':
+        grid = count
+    elif layer == 'sum':
+        grid = np.bincount(codes, weights=values, minlength=7 * 24)
+    else:
+        weights = values if layer == 'mean' else (values > 0).astype(float)
+        totals = np.bincount(codes, weights=weights, minlength=7 * 24)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            grid = np.where(count > 0, totals / count, np.nan)
+
+    return pd.DataFrame(grid.reshape(7, 24), index=DIAS_SEMANA, columns=range(24))
+
+def equity_curve(resultado):
+    """Curva de capital y drawdown como arreglos NumPy (mismo cálculo que calculate_drawdown)"""
+    equity = np.cumsum(np.asarray(resultado, dtype=float))
+    drawdown = equity - np.maximum.accumulate(equity) if len(equity) else equity.copy()
+    return equity, drawdown
+
+def prepare_analysis_data(df, heatmap_layer='sum'):
+    """Prepara los datos de análisis como arreglos, sin escribir ni copiar el DataFrame
+
+    Devuelve 'resultado' (RESULTADO $ en orden de la curva), 'equity' y
+    'drawdown' (arreglos de la misma longitud), 'order' (posiciones de df en
+    ese orden, o None si df ya está ordenado) y 'heatmap_data'. Las etiquetas
+    como Ganancia/Pérdida se calculan al dibujar con resultado_tipo.
+    """
     try:
-        # Datos básicos
-        df['RESULTADO_TIPO'] = np.where(df['RESULTADO $'] >= 0, 'Ganancia', 'Pérdida')
-        
-        # Profit acumulado y drawdown
-        df_sorted = df.sort_values('OPERACIÓN')
-        df_sorted['PROFIT_ACUMULADO'] = df_sorted['RESULTADO $'].cumsum()
-        df_sorted['DRAWDOWN'] = calculate_drawdown(df_sorted['RESULTADO $'])
+        # load_data ya entrega las operaciones ordenadas: entonces no hay que reordenar
+        resultado = df['RESULTADO $'].to_numpy(dtype=float)
+        order = None
+        if not df.index.is_monotonic_increasing:
+            order = np.argsort(df.index.to_numpy(), kind='stable')
+            resultado = resultado[order]
+        equity, drawdown = equity_curve(resultado)
         
         # Heatmap por hora/día si hay fecha
         heatmap_data = None
         if 'FECHA' in df.columns:
-            df['HORA'] = df['FECHA'].dt.hour
-            df['DIA_SEMANA'] = df['FECHA'].dt.day_name()
-            heatmap_data = df.pivot_table(
-                index='DIA_SEMANA',
-                columns='HORA',
-                values='RESULTADO $',
-                aggfunc='sum',
-                fill_value=0
-            )
+            heatmap_data = heatmap_grid(df['FECHA'], df['RESULTADO $'], heatmap_layer)
         
         return {
-            'distribution_data': df,
-            'cumulative_data': df_sorted,
+            'resultado': resultado,
+            'equity': equity,
+            'drawdown': drawdown,
+            'order': order,
             'heatmap_data': heatmap_data
         }
     
@@ -123,7 +494,7 @@ def generate_report_data(df, metrics):
         
         # Datos por divisa
         if 'DIVISA' in df.columns:
-            by_currency = df.groupby('DIVISA').agg({
+            by_currency = df.groupby('DIVISA', observed=True).agg({
                 'RESULTADO $': ['count', 'sum', 'mean'],
                 'PIPS. TP': 'mean',
                 'PIPS SL': 'mean'
@@ -133,38 +504,66 @@ def generate_report_data(df, metrics):
         else:
             by_currency = None
         
+        # Datos por estrategia cuando se unieron varios libros
+        if STRATEGY_COLUMN in df.columns:
+            by_strategy = calculate_metrics_by(df, STRATEGY_COLUMN)
+        else:
+            by_strategy = None
+        
         return {
             'summary': summary,
             'by_currency': by_currency,
+            'by_strategy': by_strategy,
             'raw_data': df
         }
     
     except Exception as e:
         print(f"Error generando reporte: {e}")
         return None
+def running_sum(values, start=0.0):
+    """Suma de izquierda a derecha (cumsum) ignorando NaN, continuando desde start
+
+    Sumar un bloque partiendo del total de los anteriores da exactamente lo
+    mismo que sumarlo todo de una vez: IncrementalMetrics coincide bit a bit.
+    """
+    values = np.asarray(values, dtype=float)
+    values = values[~np.isnan(values)]
+    if len(values) == 0:
+        return start
+    return np.cumsum(np.concatenate(([start], values)))[-1]
+
+def running_mean(values):
+    """Media con running_sum; NaN si no hay valores"""
+    values = np.asarray(values, dtype=float)
+    count = np.count_nonzero(~np.isnan(values))
+    return running_sum(values) / count if count > 0 else np.nan
+
 def calculate_metrics(df):
     """Calcula métricas clave de rendimiento"""
     try:
         if 'RESULTADO $' not in df.columns:
             raise ValueError("Columna RESULTADO $ no encontrada")
         
-        # Calcular métricas básicas
-        winning = df[df['RESULTADO $'] > 0]
-        losing = df[df['RESULTADO $'] < 0]
+        # Sumas en orden de filas con running_sum, las mismas que continúa IncrementalMetrics
+        resultado = df['RESULTADO $'].to_numpy(dtype=float)
+        wins = resultado[resultado > 0]
+        losses = resultado[resultado < 0]
+        win_sum = running_sum(wins)
+        loss_sum = running_sum(losses)
         
         metrics = {
             'total_ops': len(df),
-            'win_ops': len(winning),
-            'lose_ops': len(losing),
-            'win_rate': len(winning) / len(df) if len(df) > 0 else 0,
-            'total_profit': df['RESULTADO $'].sum(),
-            'avg_win': winning['RESULTADO $'].mean() if len(winning) > 0 else 0,
-            'avg_loss': losing['RESULTADO $'].mean() if len(losing) > 0 else 0,
-            'profit_factor': abs(winning['RESULTADO $'].sum() / losing['RESULTADO $'].sum()) if losing['RESULTADO $'].sum() != 0 else float('inf'),
+            'win_ops': len(wins),
+            'lose_ops': len(losses),
+            'win_rate': len(wins) / len(df) if len(df) > 0 else 0,
+            'total_profit': running_sum(resultado),
+            'avg_win': win_sum / len(wins) if len(wins) > 0 else 0,
+            'avg_loss': loss_sum / len(losses) if len(losses) > 0 else 0,
+            'profit_factor': abs(win_sum / loss_sum) if loss_sum != 0 else float('inf'),
             'max_win': df['RESULTADO $'].max(),
             'max_loss': df['RESULTADO $'].min(),
-            'avg_tp': df['PIPS. TP'].mean(),
-            'avg_sl': df['PIPS SL'].mean()
+            'avg_tp': running_mean(df['PIPS. TP']),
+            'avg_sl': running_mean(df['PIPS SL'])
         }
         
         return metrics
@@ -173,19 +572,29 @@ def calculate_metrics(df):
         print(f"Error calculando métricas: {e}")
         return {}
 
+def calculate_metrics_by(df, column=STRATEGY_COLUMN):
+    """Métricas de calculate_metrics y max drawdown por cada valor de column"""
+    rows = []
+    for name, group in df.groupby(column, sort=True, observed=True):
+        metrics = calculate_metrics(group)
+        metrics['max_drawdown'] = calculate_drawdown(group['RESULTADO $']).min() if len(group) else 0
+        rows.append({column: name, **metrics})
+    return pd.DataFrame(rows)
+
 def prepare_chart_data(df):
     """Prepara datos para visualización"""
     try:
-        # Datos para gráfico de distribución
-        df['RESULTADO_TIPO'] = np.where(df['RESULTADO $'] >= 0, 'Ganancia', 'Pérdida')
-        
-        # Profit acumulado
-        df_sorted = df.sort_values('OPERACIÓN')
-        df_sorted['PROFIT_ACUMULADO'] = df_sorted['RESULTADO $'].cumsum()
+        # Mismos arreglos que prepare_analysis_data, sin drawdown ni heatmap
+        resultado = df['RESULTADO $'].to_numpy(dtype=float)
+        order = None
+        if not df.index.is_monotonic_increasing:
+            order = np.argsort(df.index.to_numpy(), kind='stable')
+            resultado = resultado[order]
         
         return {
-            'distribution_data': df,
-            'cumulative_data': df_sorted
+            'resultado': resultado,
+            'equity': np.cumsum(resultado),
+            'order': order
         }
     except Exception as e:
         print(f"Error preparando datos: {e}")
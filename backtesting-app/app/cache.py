@@ -0,0 +1,96 @@
+import json
+import os
+
+import pandas as pd
+
+from pips import config_fingerprint
+
+try:
+    import pyarrow.parquet as pq
+except ImportError:  # Sin pyarrow no hay caché, se lee siempre el Excel
+    pq = None
+
+# Cambiar cuando cambie la limpieza de load_data para invalidar cachés viejas
+CACHE_VERSION = 4
+_METADATA_KEY = b'backtesting_cache'
+
+
+def cache_path(filepath):
+    """Ruta del archivo de caché Parquet junto al libro de origen"""
+    directory, name = os.path.split(os.path.abspath(filepath))
+    return os.path.join(directory, f'.{name}.parquet')
+
+
+def source_fingerprint(filepath):
+    """Clave del libro de origen: ruta, fecha de modificación, tamaño y tablas de pips/tasas"""
+    stat = os.stat(filepath)
+    return {
+        'path': os.path.abspath(filepath),
+        'mtime_ns': stat.st_mtime_ns,
+        'size': stat.st_size,
+        'version': CACHE_VERSION,
+        'config': config_fingerprint()
+    }
+
+
+def sources_fingerprint(filepaths):
+    """Clave conjunta de varios libros; cambia si se añade, quita o modifica alguno"""
+    sources = []
+    for path in filepaths:
+        fingerprint = source_fingerprint(path)
+        sources.append((fingerprint['path'], fingerprint['mtime_ns'], fingerprint['size']))
+    config = tuple(tuple(item) for item in config_fingerprint())
+    return {'sources': tuple(sources), 'version': CACHE_VERSION, 'config': config}
+
+
+def read_cache(filepath):
+    """Devuelve el DataFrame cacheado si sigue vigente, o None"""
+    if pq is None:
+        return None
+
+    path = cache_path(filepath)
+    if not os.path.exists(path):
+        return None
+
+    try:
+        metadata = pq.read_schema(path).metadata or {}
+        stored = json.loads(metadata.get(_METADATA_KEY, b'{}'))
+        if stored != source_fingerprint(filepath):
+            return None
+        return pd.read_parquet(path)
+    except Exception as e:
+        print(f"Caché inválida en {path}: {e}")
+        return None
+
+
+def write_cache(filepath, df):
+    """Guarda el DataFrame limpio con la clave del libro de origen"""
+    if pq is None:
+        return
+
+    import pyarrow as pa
+
+    path = cache_path(filepath)
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    try:
+        table = pa.Table.from_pandas(df)
+        metadata = dict(table.schema.metadata or {})
+        metadata[_METADATA_KEY] = json.dumps(source_fingerprint(filepath)).encode()
+        pq.write_table(table.replace_schema_metadata(metadata), tmp_path)
+        # Reemplazo atómico para que otro proceso nunca lea un archivo a medias
+        os.replace(tmp_path, path)
+    except Exception as e:
+        print(f"No se pudo escribir la caché {path}: {e}")
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def arrow_safe(df):
+    """Convierte a texto las columnas object con tipos mezclados para Parquet"""
+    for col in df.columns:
+        if df[col].dtype != object:
+            continue
+        inferred = pd.api.types.infer_dtype(df[col], skipna=True)
+        if inferred.startswith('mixed'):
+            df[col] = df[col].where(df[col].isna(), df[col].astype(str))
+    return df
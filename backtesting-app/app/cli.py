@@ -0,0 +1,146 @@
+"""Análisis de backtesting sin interfaz: python cli.py RUTA [RUTA ...] --out DIRECTORIO
+
+Cada RUTA puede ser un libro, un directorio o un patrón glob. Por cada libro
+se escribe <nombre>.json (resumen, métricas, divisas, heatmap) y, con
+--formats parquet, <nombre>_curva.parquet con la curva de capital y el
+drawdown. Si varios libros tienen el mismo nombre en directorios distintos,
+<nombre> es su ruta relativa al directorio común ('2024__eurusd'). Solo
+importa pandas/numpy/openpyxl, no Streamlit ni Plotly.
+"""
+import argparse
+import json
+import os
+import sys
+
+import numpy as np
+
+from analysis import (load_data, load_many, resolve_sources, strategy_name, strategy_names, calculate_metrics,
+                      prepare_analysis_data, generate_report_data, compact_dtypes)
+from parallel import run_tasks
+
+FORMATS = ('json', 'parquet')
+
+
+def _json_default(value):
+    """Convierte tipos de NumPy/pandas a tipos JSON"""
+    if isinstance(value, np.generic):
+        return value.item()
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    return str(value)
+
+
+def _records(frame):
+    return None if frame is None else frame.to_dict(orient='records')
+
+
+def analyze(df):
+    """Ejecuta el pipeline completo del dashboard sobre un DataFrame cargado"""
+    analysis_data = prepare_analysis_data(df)
+    if analysis_data is None:
+        raise ValueError("No se pudieron preparar los datos de análisis")
+    metrics = calculate_metrics(df)
+    metrics['max_drawdown'] = analysis_data['drawdown'].min() if len(df) else 0
+    report_data = generate_report_data(df, metrics)
+    return analysis_data, metrics, report_data
+
+
+def curve_frame(df, analysis_data):
+    """Curva de capital y drawdown con las columnas de identificación de cada operación"""
+    columns = [col for col in ('OPERACIÓN', 'FECHA', 'RESULTADO $') if col in df.columns]
+    curve = df[columns] if analysis_data['order'] is None else df[columns].iloc[analysis_data['order']]
+    return curve.assign(PROFIT_ACUMULADO=analysis_data['equity'], DRAWDOWN=analysis_data['drawdown'])
+
+
+def write_results(name, df, analysis_data, metrics, report_data, out_dir, formats):
+    """Escribe los resultados de un análisis y devuelve las rutas generadas"""
+    paths = []
+    if 'json' in formats:
+        heatmap = analysis_data['heatmap_data']
+        payload = {
+            'nombre': name,
+            'summary': report_data['summary'] if report_data else None,
+            'metrics': metrics,
+            'by_currency': _records(report_data['by_currency']) if report_data else None,
+            'by_strategy': _records(report_data.get('by_strategy')) if report_data else None,
+            'heatmap': heatmap.to_dict(orient='index') if heatmap is not None else None
+        }
+        path = os.path.join(out_dir, f'{name}.json')
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(payload, f, ensure_ascii=False, indent=2, default=_json_default)
+        paths.append(path)
+
+    if 'parquet' in formats:
+        path = os.path.join(out_dir, f'{name}_curva.parquet')
+        curve_frame(df, analysis_data).to_parquet(path)
+        paths.append(path)
+    return paths
+
+
+def output_names(filepaths, reserved=('combinado', 'resumen')):
+    """Nombre de salida único por libro: strategy_names sin los nombres reservados"""
+    return strategy_names(filepaths, reserved)
+
+
+def process_file(filepath, out_dir, formats, use_cache=True, compact=False, name=None):
+    """Carga, analiza y escribe un libro; devuelve una fila de resumen
+
+    name es el nombre de los archivos de salida (por defecto, strategy_name).
+    """
+    name = name or strategy_name(filepath)
+    df = load_data(filepath, use_cache=use_cache, compact=compact)
+    analysis_data, metrics, report_data = analyze(df)
+    write_results(name, df, analysis_data, metrics, report_data, out_dir, formats)
+    return {'archivo': filepath, 'nombre': name, **metrics}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Análisis de backtesting en modo batch")
+    parser.add_argument('rutas', nargs='+', help="Libros, directorios o patrones glob")
+    parser.add_argument('--out', default='resultados', help="Directorio de salida")
+    parser.add_argument('--formats', nargs='+', choices=FORMATS, default=['json'], help="Formatos de salida")
+    parser.add_argument('--merge', action='store_true', help="Analizar además todos los libros juntos")
+    parser.add_argument('--workers', type=int, default=None, help="Procesos en paralelo (por defecto, núcleos)")
+    parser.add_argument('--no-cache', action='store_true', help="No leer ni escribir la caché Parquet")
+    parser.add_argument('--compact', action='store_true', help="Cargar con tipos compactos (menos memoria)")
+    args = parser.parse_args(argv)
+
+    filepaths = [path for ruta in args.rutas for path in resolve_sources(ruta)]
+    if not filepaths:
+        parser.error("No se encontraron libros de backtesting")
+    os.makedirs(args.out, exist_ok=True)
+    use_cache = not args.no_cache
+
+    rows, errors = [], 0
+    tasks = [(path, args.out, args.formats, use_cache, args.compact, name)
+             for path, name in zip(filepaths, output_names(filepaths))]
+    results = run_tasks(process_file, tasks, args.workers, return_exceptions=True)
+
+    for path, result in zip(filepaths, results):
+        if isinstance(result, Exception):
+            errors += 1
+            print(f"❌ {path}: {result}", file=sys.stderr)
+        else:
+            rows.append(result)
+            print(f"✅ {path}: {result['total_ops']} operaciones, profit {result['total_profit']:,.2f}")
+
+    if args.merge and len(filepaths) > 1:
+        try:
+            df = load_many(filepaths, use_cache=use_cache, workers=args.workers)
+            if args.compact:
+                df = compact_dtypes(df)
+            analysis_data, metrics, report_data = analyze(df)
+            write_results('combinado', df, analysis_data, metrics, report_data, args.out, args.formats)
+            print(f"✅ combinado: {metrics['total_ops']} operaciones, profit {metrics['total_profit']:,.2f}")
+        except Exception as e:
+            errors += 1
+            print(f"❌ combinado: {e}", file=sys.stderr)
+
+    with open(os.path.join(args.out, 'resumen.json'), 'w', encoding='utf-8') as f:
+        json.dump(rows, f, ensure_ascii=False, indent=2, default=_json_default)
+
+    return 1 if errors else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,10 @@
+"""Configuración de las pruebas de la app: reutiliza el generador de libros de benchmarks
+
+Uso: pytest backtesting-app/app
+"""
+import os
+import sys
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, APP_DIR)
+sys.path.insert(0, os.path.join(APP_DIR, '..', 'benchmarks'))
@@ -0,0 +1,97 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+# Presupuesto de puntos por serie enviada a Plotly
+PLOT_MAX_POINTS = int(os.environ.get('BACKTESTING_PLOT_POINTS', 2000))
+METHODS = ('lttb', 'minmax')
+
+
+def lttb_indices(x, y, n_out):
+    """Índices elegidos con Largest-Triangle-Three-Buckets (conserva la forma)"""
+    n = len(y)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    indices = np.empty(n_out, dtype=np.int64)
+    indices[0], indices[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        start, end = edges[i], edges[i + 1]
+        next_end = edges[i + 2] if i + 2 < len(edges) else n
+        # Promedio del bucket siguiente como tercer vértice del triángulo
+        avg_x = x[end:next_end].mean()
+        avg_y = y[end:next_end].mean()
+        area = np.abs(
+            (x[a] - avg_x) * (y[start:end] - y[a]) - (x[a] - x[start:end]) * (avg_y - y[a])
+        )
+        a = start + int(np.argmax(area))
+        indices[i + 1] = a
+    return indices
+
+
+def minmax_indices(y, n_out):
+    """Índices del mínimo y el máximo de cada bucket"""
+    n = len(y)
+    if n_out >= n:
+        return np.arange(n)
+
+    buckets = max(1, n_out // 2)
+    size = -(-n // buckets)
+    pad = buckets * size - n
+    lows = np.concatenate((y, np.full(pad, np.inf))).reshape(buckets, size)
+    highs = np.concatenate((y, np.full(pad, -np.inf))).reshape(buckets, size)
+    offsets = np.arange(buckets) * size
+    indices = np.concatenate((offsets + lows.argmin(axis=1), offsets + highs.argmax(axis=1), [0, n - 1]))
+    return np.unique(indices[indices < n])
+
+
+def downsample_indices(x, y, max_points=PLOT_MAX_POINTS, method='lttb', keep=()):
+    """Índices ordenados a dibujar, incluyendo siempre los puntos de keep"""
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    if len(y) <= max_points:
+        return np.arange(len(y))
+    if method == 'minmax':
+        indices = minmax_indices(y, max_points)
+    else:
+        indices = lttb_indices(x, y, max_points)
+    return np.unique(np.concatenate((indices, np.asarray(keep, dtype=np.int64))))
+
+
+def key_points(equity, drawdown):
+    """Puntos que no se pueden perder: máximo drawdown, pico previo y pico global"""
+    if len(equity) == 0:
+        return np.empty(0, dtype=np.int64)
+    max_dd = int(np.argmin(drawdown))
+    peak_before_dd = int(np.argmax(equity[:max_dd + 1]))
+    return np.array([max_dd, peak_before_dd, int(np.argmax(equity))], dtype=np.int64)
+
+
+def prepare_plot_data(equity, drawdown, labels=None, order=None, max_points=PLOT_MAX_POINTS, method='lttb'):
+    """Series de capital y drawdown reducidas para los gráficos
+
+    equity y drawdown son los arreglos de prepare_analysis_data. Devuelve dos
+    DataFrames (capital y drawdown) con la columna N_OPERACION como eje x y,
+    si se indican labels (p. ej. la columna OPERACIÓN, con order para pasar
+    de posición en la curva a fila), OPERACIÓN para el hover. Cada serie se
+    reduce por separado a max_points conservando el máximo drawdown y los
+    picos de capital; de labels solo se leen los puntos elegidos.
+    """
+    equity = np.asarray(equity, dtype=float)
+    drawdown = np.asarray(drawdown, dtype=float)
+    x = np.arange(1, len(equity) + 1)
+    keep = key_points(equity, drawdown)
+
+    frames = []
+    for column, values in (('PROFIT_ACUMULADO', equity), ('DRAWDOWN', drawdown)):
+        indices = downsample_indices(x, values, max_points, method, keep)
+        frame = {'N_OPERACION': x[indices]}
+        if labels is not None:
+            rows = indices if order is None else np.asarray(order)[indices]
+            frame['OPERACIÓN'] = labels.iloc[rows].to_numpy() if hasattr(labels, 'iloc') else np.asarray(labels)[rows]
+        frame[column] = values[indices]
+        frames.append(pd.DataFrame(frame))
+    return frames[0], frames[1]
@@ -0,0 +1,97 @@
+import numpy as np
+import pandas as pd
+
+# Valor entero de NaT en datetime64[ns]: queda antes de cualquier fecha válida
+NAT_INT = np.iinfo(np.int64).min
+SIGNOS = {'Todos': (-1, 0, 1), 'Ganadoras': (1,), 'Perdedoras': (-1,)}
+
+
+class FilterIndex:
+    """Índice de filtros por DIVISA, signo del resultado y rango de FECHA
+
+    Se construye una vez al cargar los datos. Las filas se ordenan por
+    (código de divisa, signo, fecha), de modo que cada combinación de divisa y
+    signo es un tramo contiguo ordenado por fecha: cualquier combinación de
+    filtros se resuelve con searchsorted y cortes, sin recorrer todo el DataFrame.
+    """
+
+    def __init__(self, df):
+        n = len(df)
+        if 'DIVISA' in df.columns:
+            codes, uniques = pd.factorize(df['DIVISA'], sort=True)
+            self.divisas = list(uniques)
+        else:
+            # Sin DIVISA todas las filas van al grupo de divisa nula, el que recorre 'Todas'
+            codes = np.full(n, -1, dtype=np.intp)
+            self.divisas = []
+        self.has_fecha = 'FECHA' in df.columns
+
+        pnl = df['RESULTADO $'].to_numpy(dtype=float)
+        # Bitmaps de signo por fila
+        self.wins = pnl > 0
+        self.losses = pnl < 0
+        sign = self.wins.astype(np.int8) - self.losses.astype(np.int8)
+
+        if self.has_fecha:
+            fechas = df['FECHA'].to_numpy(dtype='datetime64[ns]').view(np.int64)
+        else:
+            fechas = np.zeros(n, dtype=np.int64)
+
+        # Grupo = (divisa + 1) * 3 + (signo + 1); la divisa -1 son valores nulos
+        group = (codes.astype(np.int64) + 1) * 3 + (sign + 1)
+        self._order = np.lexsort((fechas, group))
+        self._fechas = fechas[self._order]
+        counts = np.bincount(group, minlength=(len(self.divisas) + 1) * 3)
+        self._offsets = np.concatenate(([0], np.cumsum(counts)))
+        self.nbytes = self._order.nbytes + self._fechas.nbytes + self._offsets.nbytes + 2 * n
+
+    def _groups(self, divisa, resultado):
+        if divisa in (None, 'Todas'):
+            divisa_codes = range(-1, len(self.divisas))
+        elif divisa in self.divisas:
+            divisa_codes = [self.divisas.index(divisa)]
+        else:
+            divisa_codes = []
+        return [(code + 1) * 3 + (sign + 1) for code in divisa_codes for sign in SIGNOS[resultado]]
+
+    def _slice(self, group, start, end):
+        lo, hi = self._offsets[group], self._offsets[group + 1]
+        fechas = self._fechas[lo:hi]
+        first = np.searchsorted(fechas, start, 'left') if start is not None else 0
+        last = np.searchsorted(fechas, end, 'left') if end is not None else len(fechas)
+        return lo + first, lo + last
+
+    def query(self, divisa='Todas', resultado='Todos', date_range=None):
+        """Posiciones (en orden original) de las filas que cumplen los filtros
+
+        date_range es un par de fechas (inicio, fin) inclusivo por día, igual
+        que el filtro FECHA.dt.date del dashboard.
+        """
+        start = end = None
+        if date_range is not None and self.has_fecha:
+            start = pd.Timestamp(date_range[0]).value
+            end = (pd.Timestamp(date_range[1]) + pd.Timedelta(days=1)).value
+
+        pieces = []
+        for group in self._groups(divisa, resultado):
+            lo, hi = self._slice(group, start, end)
+            if hi > lo:
+                pieces.append(self._order[lo:hi])
+        if not pieces:
+            return np.empty(0, dtype=np.intp)
+        return np.sort(np.concatenate(pieces))
+
+    def date_bounds(self, divisa='Todas', resultado='Todos'):
+        """Primera y última FECHA válidas para la divisa y el signo elegidos"""
+        if not self.has_fecha:
+            return None
+        first, last = None, None
+        for group in self._groups(divisa, resultado):
+            lo, hi = self._offsets[group], self._offsets[group + 1]
+            lo += np.searchsorted(self._fechas[lo:hi], NAT_INT, 'right')
+            if hi > lo:
+                first = self._fechas[lo] if first is None else min(first, self._fechas[lo])
+                last = self._fechas[hi - 1] if last is None else max(last, self._fechas[hi - 1])
+        if first is None:
+            return None
+        return pd.Timestamp(first), pd.Timestamp(last)
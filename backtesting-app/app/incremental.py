@@ -0,0 +1,136 @@
+import threading
+
+import numpy as np
+import pandas as pd
+
+from analysis import running_sum
+
+# Columnas que entran en las métricas: si cambian en filas ya procesadas se recalcula
+HASH_COLUMNS = ['RESULTADO $', 'PIPS. TP', 'PIPS SL']
+# Base del hash acumulado (impar, así multiplicar por ella es invertible módulo 2**64)
+HASH_BASE = np.uint64(0x100000001B3)
+
+
+def row_hashes(df):
+    """Hash por fila de las columnas de HASH_COLUMNS"""
+    return pd.util.hash_pandas_object(df[HASH_COLUMNS], index=False).to_numpy()
+
+
+def prefix_hashes(df):
+    """Hash acumulado por fila: el valor k resume las filas 0..k y su orden
+
+    Es O(filas): se calcula una vez por versión de los datos y se pasa a
+    IncrementalMetrics.sync, que con él comprueba el prefijo en O(1).
+    """
+    rows = row_hashes(df)
+    powers = np.cumprod(np.full(len(rows), HASH_BASE, dtype=np.uint64))
+    return np.cumsum(rows * powers, dtype=np.uint64)
+
+
+class IncrementalMetrics:
+    """Métricas de rendimiento con estado acumulado para operaciones añadidas
+
+    Guarda contadores, sumas, el profit acumulado, el pico y el drawdown, de
+    modo que incorporar operaciones nuevas cuesta O(nuevas) y no O(todas).
+    Las sumas continúan desde los totales parciales igual que running_sum y
+    el cumsum de equity_curve, así que todas las métricas coinciden
+    exactamente con calculate_metrics y con el drawdown del dashboard.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.total_ops = 0
+        self.win_ops = 0
+        self.lose_ops = 0
+        self.total_sum = 0.0
+        self.win_sum = 0.0
+        self.loss_sum = 0.0
+        self.tp_sum, self.tp_count = 0.0, 0
+        self.sl_sum, self.sl_count = 0.0, 0
+        self.max_win = np.nan
+        self.max_loss = np.nan
+        self.cumulative = 0.0
+        self.peak = -np.inf
+        self.current_drawdown = 0.0
+        self.max_drawdown = 0.0
+        self._checkpoint = None
+        return self
+
+    def update(self, new_rows):
+        """Incorpora solo las operaciones nuevas"""
+        pnl = new_rows['RESULTADO $'].to_numpy(dtype=float)
+        if len(pnl) == 0:
+            return self
+
+        wins = pnl[pnl > 0]
+        losses = pnl[pnl < 0]
+        tp = new_rows['PIPS. TP'].to_numpy(dtype=float)
+        sl = new_rows['PIPS SL'].to_numpy(dtype=float)
+        self.total_ops += len(pnl)
+        self.win_ops += len(wins)
+        self.lose_ops += len(losses)
+        self.total_sum = running_sum(pnl, self.total_sum)
+        self.win_sum = running_sum(wins, self.win_sum)
+        self.loss_sum = running_sum(losses, self.loss_sum)
+        self.tp_sum, self.tp_count = running_sum(tp, self.tp_sum), self.tp_count + np.count_nonzero(~np.isnan(tp))
+        self.sl_sum, self.sl_count = running_sum(sl, self.sl_sum), self.sl_count + np.count_nonzero(~np.isnan(sl))
+        self.max_win = np.fmax(self.max_win, np.fmax.reduce(pnl))
+        self.max_loss = np.fmin(self.max_loss, np.fmin.reduce(pnl))
+
+        # cumsum y máximo acumulado continúan desde el estado previo, igual que en lote
+        cumulative = np.cumsum(np.concatenate(([self.cumulative], pnl)))[1:]
+        peak = np.maximum.accumulate(np.concatenate(([self.peak], cumulative)))[1:]
+        drawdown = cumulative - peak
+
+        self.cumulative = cumulative[-1]
+        self.peak = peak[-1]
+        self.current_drawdown = drawdown[-1]
+        self.max_drawdown = min(self.max_drawdown, drawdown.min())
+        return self
+
+    def sync(self, df, prefix=None):
+        """Incorpora las filas de df posteriores a las ya procesadas
+
+        Antes comprueba en O(1) que df sigue empezando por las operaciones
+        vistas. Con prefix (prefix_hashes(df)) se compara el hash acumulado
+        hasta la última procesada, que cambia con cualquier edición, repreciado
+        o inserción en medio; sin él solo se compara la última fila procesada.
+        Si no coinciden se recalcula desde cero.
+        """
+        with self._lock:
+            n = self.total_ops
+            if len(df) < n or (n > 0 and self._checkpoint_at(df, prefix, n - 1) != self._checkpoint):
+                self.reset()
+            self.update(df.iloc[self.total_ops:])
+            if self.total_ops > 0:
+                self._checkpoint = self._checkpoint_at(df, prefix, self.total_ops - 1)
+            return self
+
+    @staticmethod
+    def _checkpoint_at(df, prefix, position):
+        if prefix is not None:
+            return ('prefijo', int(prefix[position]))
+        return ('fila', int(row_hashes(df.iloc[position:position + 1])[0]))
+
+    def metrics(self):
+        """Devuelve las métricas con las mismas claves que calculate_metrics"""
+        n = self.total_ops
+        return {
+            'total_ops': n,
+            'win_ops': self.win_ops,
+            'lose_ops': self.lose_ops,
+            'win_rate': self.win_ops / n if n > 0 else 0,
+            'total_profit': self.total_sum,
+            'avg_win': self.win_sum / self.win_ops if self.win_ops > 0 else 0,
+            'avg_loss': self.loss_sum / self.lose_ops if self.lose_ops > 0 else 0,
+            'profit_factor': abs(self.win_sum / self.loss_sum) if self.loss_sum != 0 else float('inf'),
+            'max_win': self.max_win,
+            'max_loss': self.max_loss,
+            'avg_tp': self.tp_sum / self.tp_count if self.tp_count > 0 else np.nan,
+            'avg_sl': self.sl_sum / self.sl_count if self.sl_count > 0 else np.nan,
+            'max_drawdown': self.max_drawdown,
+            'current_drawdown': self.current_drawdown
+        }
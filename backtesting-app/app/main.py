@@ -1,9 +1,19 @@
 import streamlit as st
 import plotly.express as px
+import os
+import numpy as np
 import pandas as pd
-from analysis import load_data, calculate_metrics, prepare_analysis_data, generate_report_data
-import base64
-from io import BytesIO
+from analysis import (load_data, resolve_sources, calculate_metrics, calculate_metrics_by,
+                      prepare_analysis_data, heatmap_grid, resultado_tipo, STRATEGY_COLUMN)
+from cache import sources_fingerprint
+from memo import AnalysisCache, make_key
+from incremental import IncrementalMetrics, prefix_hashes
+from filters import FilterIndex
+from downsample import prepare_plot_data, downsample_indices, PLOT_MAX_POINTS, METHODS
+from reports import ReportWorker, EXPORT_FORMATS
+from montecarlo import simulate, percentile_table, SIMULATION_METHODS
+from rolling import rolling_metrics, ROLLING_COLUMNS
+from profiling import Profiler, profiling_enabled, PROFILE_LOG_ENV
 
 # Configuración de página
 st.set_page_config(layout="wide", page_title="Análisis de Trading Pro")
@@ -15,9 +25,56 @@ st.markdown("""
 """)
 
 # --- Carga de datos ---
+# Un libro, un directorio o un patrón glob (un libro por estrategia/mes)
+DATA_PATH = os.environ.get("BACKTESTING_DATA", "/data/backtesting_operaciones.xlsx")
+
+@st.cache_resource
+def get_analysis_cache():
+    """Caché compartida entre reruns y sesiones para datos y análisis"""
+    return AnalysisCache()
+
+@st.cache_resource(max_entries=4)
+def get_incremental_metrics(sources, config, compact):
+    """Métricas incrementales del libro completo: tras añadir operaciones solo se procesan las nuevas
+
+    La clave son las rutas de origen, las tablas de pips/tasas y el modo
+    compacto, pero no la fecha ni el tamaño: así un libro al que se añaden
+    operaciones sigue con el mismo estado, y sync recalcula si cambió lo ya visto.
+    """
+    return IncrementalMetrics()
+
+analysis_cache = get_analysis_cache()
+
+# Perfilado opcional: tiempo, filas y memoria de cada etapa ejecutada en este rerun
+st.sidebar.header("⏱️ Rendimiento")
+profiler = Profiler(
+    st.sidebar.checkbox("Medir etapas", value=profiling_enabled()),
+    os.environ.get(PROFILE_LOG_ENV)
+)
+# Tipos compactos: categóricos, cadenas Arrow y enteros/float32 exactos
+compact_mode = st.sidebar.checkbox("Tipos compactos (menos memoria)",
+                                   value=os.environ.get("BACKTESTING_COMPACT", "0") == "1")
+
+def profiled_load():
+    with profiler.stage('load_data') as record:
+        data = load_data(
+            DATA_PATH,
+            progress=lambda filas, velocidad: progress_text.caption(f"⏳ Leyendo Excel: {filas:,} filas ({velocidad:,.0f} filas/s)"),
+            compact=compact_mode
+        )
+        record['filas'] = len(data)
+    return data
+
+progress_text = st.empty()
 try:
-    df = load_data("/data/backtesting_operaciones.xlsx")
+    fingerprint = {**sources_fingerprint(resolve_sources(DATA_PATH)), 'compacto': compact_mode}
+    df = analysis_cache.get_or_compute(make_key(fingerprint, etapa='datos'), profiled_load)
+    progress_text.empty()
     st.success(f"✅ Datos cargados correctamente - {len(df)} operaciones")
+    if 'memoria' in df.attrs:
+        memoria = df.attrs['memoria']
+        st.caption(f"💾 Memoria: {memoria['antes_mb']:,.1f} MB → {memoria['despues_mb']:,.1f} MB "
+                   f"({memoria['ahorro']:.0%} menos)")
 except Exception as e:
     st.error(f"❌ Error al cargar datos: {e}")
     st.stop()
@@ -25,38 +82,88 @@ except Exception as e:
 # --- Filtros Interactivos ---
 st.sidebar.header("🔍 Filtros")
 
+def run_analysis(df, positions, full_df=None):
+    """Toma las filas filtradas y calcula análisis y métricas del subconjunto
+
+    full_df se indica cuando no hay filtros activos: entonces las métricas
+    salen del motor incremental en lugar de recorrer todo el histórico.
+    """
+    if len(positions) != len(df):
+        df = df.iloc[positions]
+    with profiler.stage('prepare_analysis_data', rows=len(df)):
+        analysis_data = prepare_analysis_data(df)
+    with profiler.stage('calculate_metrics', rows=len(df)):
+        if full_df is not None and len(df) == len(full_df):
+            metrics = get_incremental_metrics(
+                tuple(source[0] for source in fingerprint['sources']), fingerprint['config'], compact_mode
+            ).sync(full_df, row_prefix).metrics()
+        else:
+            metrics = calculate_metrics(df)
+            metrics['max_drawdown'] = analysis_data['drawdown'].min() if analysis_data and len(df) else 0
+    return {'df': df, 'analysis_data': analysis_data, 'metrics': metrics}
+
+# Índice de filtros: se construye una vez por versión del archivo
+def build_filter_index(df):
+    with profiler.stage('índice de filtros', rows=len(df)):
+        return FilterIndex(df)
+
+filter_index = analysis_cache.get_or_compute(
+    make_key(fingerprint, etapa='indice'),
+    lambda: build_filter_index(df)
+)
+
+# Hash acumulado de las filas: el motor incremental comprueba con él en O(1) que
+# las operaciones ya procesadas no cambiaron (también una vez por versión)
+def build_row_prefix(df):
+    with profiler.stage('hash de filas', rows=len(df)):
+        return prefix_hashes(df)
+
+row_prefix = analysis_cache.get_or_compute(
+    make_key(fingerprint, etapa='hash_filas'),
+    lambda: build_row_prefix(df)
+)
+
 # Filtro por divisa
+selected_divisa = 'Todas'
 if 'DIVISA' in df.columns:
-    divisas = ['Todas'] + sorted(df['DIVISA'].unique().tolist())
+    divisas = ['Todas'] + filter_index.divisas
     selected_divisa = st.sidebar.selectbox("Divisa", divisas)
-    if selected_divisa != 'Todas':
-        df = df[df['DIVISA'] == selected_divisa]
 
 # Filtro por resultado
 resultados = ['Todos', 'Ganadoras', 'Perdedoras']
 selected_resultado = st.sidebar.selectbox("Resultado", resultados)
-if selected_resultado == 'Ganadoras':
-    df = df[df['RESULTADO $'] > 0]
-elif selected_resultado == 'Perdedoras':
-    df = df[df['RESULTADO $'] < 0]
 
 # Filtro por fecha (si existe)
-if 'FECHA' in df.columns:
-    min_date = df['FECHA'].min().date()
-    max_date = df['FECHA'].max().date()
-    date_range = st.sidebar.date_input(
+date_range = None
+date_bounds = filter_index.date_bounds(selected_divisa, selected_resultado)
+if date_bounds is not None:
+    min_date = date_bounds[0].date()
+    max_date = date_bounds[1].date()
+    selected_dates = st.sidebar.date_input(
         "Rango de fechas",
         [min_date, max_date],
         min_value=min_date,
         max_value=max_date
     )
-    if len(date_range) == 2:
-        df = df[(df['FECHA'].dt.date >= date_range[0]) & (df['FECHA'].dt.date <= date_range[1])]
+    if len(selected_dates) == 2:
+        date_range = tuple(selected_dates)
 
 # --- Análisis y visualizaciones ---
-analysis_data = prepare_analysis_data(df)
-metrics = calculate_metrics(df)
-metrics['max_drawdown'] = analysis_data['cumulative_data']['DRAWDOWN'].min() if analysis_data else 0
+def filtered_analysis(df):
+    with profiler.stage('filtro', rows=len(df)) as record:
+        positions = filter_index.query(selected_divisa, selected_resultado, date_range)
+        record['filas'] = len(positions)
+    return run_analysis(df, positions, df)
+
+# Las combinaciones de filtros ya vistas se sirven desde la caché sin recalcular
+result = analysis_cache.get_or_compute(
+    make_key(fingerprint, etapa='analisis', divisa=selected_divisa,
+             resultado=selected_resultado, fechas=date_range),
+    lambda: filtered_analysis(df)
+)
+df = result['df']
+analysis_data = result['analysis_data']
+metrics = result['metrics']
 
 # Métricas clave
 st.header("📈 Métricas Clave")
@@ -72,73 +179,228 @@ cols[1].metric("Avg Ganancia", f"${metrics['avg_win']:,.2f}")
 cols[2].metric("Avg Pérdida", f"${metrics['avg_loss']:,.2f}")
 cols[3].metric("Ratio TP/SL", f"{metrics['avg_tp']/metrics['avg_sl']:.2f}" if metrics['avg_sl'] != 0 else "N/A")
 
+# Métricas por estrategia cuando se cargaron varios libros
+if STRATEGY_COLUMN in df.columns and df[STRATEGY_COLUMN].nunique() > 1:
+    with st.expander("🧩 Métricas por estrategia", expanded=True):
+        st.dataframe(calculate_metrics_by(df, STRATEGY_COLUMN))
+
+# Series de capital y drawdown reducidas al presupuesto de puntos
+st.sidebar.header("⚙️ Gráficos")
+plot_max_points = st.sidebar.number_input("Puntos máximos por gráfico", min_value=100, max_value=50000,
+                                          value=PLOT_MAX_POINTS, step=500)
+plot_method = st.sidebar.selectbox("Reducción de puntos", METHODS)
+def profiled_plot_data():
+    with profiler.stage('reducción de puntos', rows=len(df)):
+        return prepare_plot_data(analysis_data['equity'], analysis_data['drawdown'], df['OPERACIÓN'],
+                                 analysis_data['order'], int(plot_max_points), plot_method)
+
+equity_plot, drawdown_plot = analysis_cache.get_or_compute(
+    make_key(fingerprint, etapa='graficos', divisa=selected_divisa, resultado=selected_resultado,
+             fechas=date_range, puntos=int(plot_max_points), metodo=plot_method),
+    profiled_plot_data
+)
+
+def _rolling_plot_data(df, window_type, window_size, metric):
+    """Métrica móvil reducida al presupuesto de puntos de los gráficos"""
+    if window_type == 'Operaciones':
+        rolled = rolling_metrics(df['RESULTADO $'], window=window_size)
+    else:
+        # Las operaciones sin fecha quedan al final: toman la última fecha conocida
+        rolled = rolling_metrics(df['RESULTADO $'], times=df['FECHA'].ffill(),
+                                 time_window=pd.Timedelta(days=window_size))
+    values = rolled[metric].to_numpy()
+    x = np.arange(1, len(values) + 1)
+    # Los infinitos del profit factor (ventanas sin pérdidas) no se dibujan
+    values = np.where(np.isfinite(values), values, np.nan)
+    indices = downsample_indices(x, np.nan_to_num(values), int(plot_max_points), plot_method)
+    return pd.DataFrame({'N_OPERACION': x[indices], metric: values[indices]})
+
+HEATMAP_TITLES = {
+    'sum': ("Profit", 'Profit por Día y Hora'),
+    'count': ("Operaciones", 'Operaciones por Día y Hora'),
+    'mean': ("Profit medio", 'Profit Medio por Día y Hora'),
+    'win_rate': ("Win Rate", 'Win Rate por Día y Hora')
+}
+
 # Gráficos principales
-tab1, tab2, tab3, tab4 = st.tabs(["📊 Distribución", "🚀 Acumulado", "🔥 Heatmap", "📉 Drawdown"])
+tab1, tab2, tab3, tab4, tab5, tab6 = st.tabs(["📊 Distribución", "🚀 Acumulado", "🔥 Heatmap", "📉 Drawdown",
+                                              "🎲 Monte Carlo", "📐 Rolling"])
 
 with tab1:
-    fig_dist = px.histogram(
-        analysis_data['distribution_data'],
-        x='RESULTADO $',
-        color='RESULTADO_TIPO',
-        nbins=30,
-        title='Distribución de Ganacias y Pérdidas',
-        color_discrete_map={'Ganancia': '#2ecc71', 'Pérdida': '#e74c3c'},
-        labels={'RESULTADO $': 'Monto ($)', 'count': 'Operaciones'}
-    )
-    st.plotly_chart(fig_dist, use_container_width=True)
+    with profiler.stage('gráfico distribución', rows=len(analysis_data['resultado'])):
+        fig_dist = px.histogram(
+            x=analysis_data['resultado'],
+            color=resultado_tipo(analysis_data['resultado']),
+            nbins=30,
+            title='Distribución de Ganacias y Pérdidas',
+            color_discrete_map={'Ganancia': '#2ecc71', 'Pérdida': '#e74c3c'},
+            labels={'x': 'Monto ($)', 'color': 'Resultado', 'count': 'Operaciones'}
+        )
+        st.plotly_chart(fig_dist, use_container_width=True)
 
 with tab2:
-    fig_cum = px.line(
-        analysis_data['cumulative_data'],
-        x='OPERACIÓN',
-        y='PROFIT_ACUMULADO',
-        title='Evolución del Capital',
-        labels={'OPERACIÓN': 'N° Operación', 'PROFIT_ACUMULADO': 'Profit Acumulado ($)'}
-    )
-    st.plotly_chart(fig_cum, use_container_width=True)
+    with profiler.stage('gráfico acumulado', rows=len(equity_plot)):
+        fig_cum = px.line(
+            equity_plot,
+            x='N_OPERACION',
+            y='PROFIT_ACUMULADO',
+            hover_data=['OPERACIÓN'],
+            title='Evolución del Capital',
+            labels={'N_OPERACION': 'N° Operación', 'PROFIT_ACUMULADO': 'Profit Acumulado ($)'}
+        )
+        st.plotly_chart(fig_cum, use_container_width=True)
 
 with tab3:
     if analysis_data['heatmap_data'] is not None:
-        fig_heat = px.imshow(
-            analysis_data['heatmap_data'],
-            labels=dict(x="Hora del día", y="Día de semana", color="Profit"),
-            color_continuous_scale='RdYlGn',
-            title='Profit por Día y Hora'
-        )
-        st.plotly_chart(fig_heat, use_container_width=True)
+        heatmap_layer = st.selectbox("Capa", list(HEATMAP_TITLES), format_func=lambda layer: HEATMAP_TITLES[layer][0])
+        heatmap_data = analysis_data['heatmap_data']
+        if heatmap_layer != 'sum':
+            heatmap_data = analysis_cache.get_or_compute(
+                make_key(fingerprint, etapa='heatmap', divisa=selected_divisa, resultado=selected_resultado,
+                         fechas=date_range, capa=heatmap_layer),
+                lambda: heatmap_grid(df['FECHA'], df['RESULTADO $'], heatmap_layer)
+            )
+        with profiler.stage('gráfico heatmap', rows=len(df)):
+            color_label, heatmap_title = HEATMAP_TITLES[heatmap_layer]
+            fig_heat = px.imshow(
+                heatmap_data,
+                labels=dict(x="Hora del día", y="Día de semana", color=color_label),
+                color_continuous_scale='RdYlGn',
+                title=heatmap_title
+            )
+            st.plotly_chart(fig_heat, use_container_width=True)
     else:
         st.warning("No se encontraron datos de fecha para generar el heatmap")
 
 with tab4:
-    fig_dd = px.area(
-        analysis_data['cumulative_data'],
-        x='OPERACIÓN',
-        y='DRAWDOWN',
-        title='Drawdown Histórico',
-        labels={'OPERACIÓN': 'N° Operación', 'DRAWDOWN': 'Drawdown ($)'}
+    with profiler.stage('gráfico drawdown', rows=len(drawdown_plot)):
+        fig_dd = px.area(
+            drawdown_plot,
+            x='N_OPERACION',
+            y='DRAWDOWN',
+            hover_data=['OPERACIÓN'],
+            title='Drawdown Histórico',
+            labels={'N_OPERACION': 'N° Operación', 'DRAWDOWN': 'Drawdown ($)'}
+        )
+        fig_dd.add_hline(y=0, line_color='red')
+        st.plotly_chart(fig_dd, use_container_width=True)
+
+with tab5:
+    st.caption("Remuestrea (bootstrap) o reordena (shuffle) los resultados para medir la fragilidad de la estrategia")
+    mc_cols = st.columns(4)
+    mc_simulations = mc_cols[0].number_input("Simulaciones", min_value=100, max_value=100000, value=1000, step=500)
+    mc_method = mc_cols[1].selectbox("Método", SIMULATION_METHODS)
+    mc_capital = mc_cols[2].number_input("Capital inicial ($)", min_value=0.0, value=1000.0, step=500.0)
+    mc_ruin_pct = mc_cols[3].slider("Ruina al perder (%)", min_value=10, max_value=100, value=50)
+    mc_key = make_key(fingerprint, etapa='montecarlo', divisa=selected_divisa, resultado=selected_resultado,
+                      fechas=date_range, simulaciones=int(mc_simulations), metodo=mc_method,
+                      capital=mc_capital, ruina=mc_ruin_pct)
+
+    if st.button("Ejecutar simulación"):
+        with st.spinner("Simulando trayectorias..."):
+            try:
+                with profiler.stage('Monte Carlo', rows=len(df) * int(mc_simulations)):
+                    st.session_state['montecarlo'] = (mc_key, simulate(
+                        df['RESULTADO $'].to_numpy(),
+                        n_simulations=int(mc_simulations),
+                        method=mc_method,
+                        initial_capital=mc_capital,
+                        ruin_level=mc_capital * (1 - mc_ruin_pct / 100)
+                    ))
+            except ValueError as e:
+                st.warning(f"No se pudo simular: {e}")
+
+    stored = st.session_state.get('montecarlo')
+    if stored is not None and stored[0] == mc_key:
+        mc_result = stored[1]
+        cols = st.columns(3)
+        cols[0].metric("Riesgo de ruina", f"{mc_result['risk_of_ruin']:.2%}")
+        cols[1].metric("Drawdown P5", f"${-np.percentile(mc_result['max_drawdown'], 5):,.2f}")
+        cols[2].metric("Capital final P5", f"${np.percentile(mc_result['final_equity'], 5):,.2f}")
+        st.dataframe(percentile_table(mc_result))
+        with profiler.stage('gráfico Monte Carlo', rows=len(mc_result['final_equity'])):
+            fig_mc = px.histogram(
+                x=mc_result['final_equity'],
+                nbins=50,
+                title='Distribución del Capital Final',
+                labels={'x': 'Capital final ($)'}
+            )
+            st.plotly_chart(fig_mc, use_container_width=True)
+
+with tab6:
+    roll_cols = st.columns(3)
+    has_dates = 'FECHA' in df.columns and len(df) > 0 and df['FECHA'].iloc[0] is not pd.NaT
+    window_types = ['Operaciones', 'Días'] if has_dates else ['Operaciones']
+    window_type = roll_cols[0].radio("Ventana por", window_types, horizontal=True)
+    if window_type == 'Operaciones':
+        window_size = roll_cols[1].number_input("Operaciones por ventana", min_value=2, value=500, step=50)
+    else:
+        window_size = roll_cols[1].number_input("Días por ventana", min_value=1, value=30, step=1)
+    roll_metric = roll_cols[2].selectbox("Métrica", list(ROLLING_COLUMNS), format_func=ROLLING_COLUMNS.get)
+
+    rolling_plot = analysis_cache.get_or_compute(
+        make_key(fingerprint, etapa='rolling', divisa=selected_divisa, resultado=selected_resultado,
+                 fechas=date_range, tipo=window_type, ventana=int(window_size), metrica=roll_metric,
+                 puntos=int(plot_max_points), metodo=plot_method),
+        lambda: _rolling_plot_data(df, window_type, int(window_size), roll_metric)
     )
-    fig_dd.add_hline(y=0, line_color='red')
-    st.plotly_chart(fig_dd, use_container_width=True)
+    with profiler.stage('gráfico rolling', rows=len(rolling_plot)):
+        fig_roll = px.line(
+            rolling_plot,
+            x='N_OPERACION',
+            y=roll_metric,
+            title=f'{ROLLING_COLUMNS[roll_metric]} en ventana móvil',
+            labels={'N_OPERACION': 'N° Operación', roll_metric: ROLLING_COLUMNS[roll_metric]}
+        )
+        st.plotly_chart(fig_roll, use_container_width=True)
 
 # --- Exportación de Reportes ---
 st.sidebar.header("📤 Exportar Reporte")
 
-def to_excel(df):
-    output = BytesIO()
-    with pd.ExcelWriter(output, engine='openpyxl') as writer:
-        df.to_excel(writer, sheet_name='Datos Completos')
-    return output.getvalue()
+@st.cache_resource
+def get_report_worker():
+    """Hilo de fondo compartido para generar reportes"""
+    return ReportWorker()
+
+report_jobs = st.session_state.setdefault('report_jobs', {})
+
+def start_report(kind):
+    """Lanza el reporte en segundo plano, descartando el archivo anterior del mismo tipo"""
+    previous = report_jobs.pop(kind, None)
+    if previous is not None:
+        get_report_worker().discard(previous)
+    report_jobs[kind] = get_report_worker().submit(kind, df, metrics)
+
+def report_downloaded(kind):
+    """Tras la descarga Streamlit ya tiene el contenido en memoria: se borra el archivo"""
+    job = report_jobs.pop(kind, None)
+    if job is not None:
+        get_report_worker().discard(job)
 
 if st.sidebar.button("Generar Reporte PDF"):
-    report_data = generate_report_data(df, metrics)
-    # Aquí iría la generación real del PDF (usando ReportLab u otra librería)
-    st.sidebar.success("Reporte generado (simulación)")
+    start_report('pdf')
 
 if st.sidebar.button("Exportar a Excel"):
-    excel_data = to_excel(df)
-    b64 = base64.b64encode(excel_data).decode()
-    href = f'<a href="data:application/vnd.openxmlformats-officedocument.spreadsheetml.sheet;base64,{b64}" download="reporte_trading.xlsx">Descargar Excel</a>'
-    st.sidebar.markdown(href, unsafe_allow_html=True)
+    start_report('xlsx')
+
+if st.sidebar.button("Exportar a CSV"):
+    start_report('csv')
+
+for kind, job in list(report_jobs.items()):
+    file_name, mime = EXPORT_FORMATS[kind]
+    if not job.done():
+        st.sidebar.info(f"⏳ Generando {file_name}... interactúa con el dashboard para actualizar")
+    elif job.exception() is not None:
+        st.sidebar.error(f"❌ Error generando {file_name}: {job.exception()}")
+    elif not os.path.exists(job.result()):
+        # Borrado por antigüedad: hay que generarlo de nuevo
+        report_jobs.pop(kind)
+        st.sidebar.warning(f"⌛ {file_name} caducó, vuelve a generarlo")
+    else:
+        # El archivo se entrega desde disco, sin base64 ni copia en un enlace HTML
+        with open(job.result(), 'rb') as report_file:
+            st.sidebar.download_button(f"Descargar {file_name}", report_file, file_name=file_name, mime=mime,
+                                       key=f"descarga_{kind}", on_click=report_downloaded, args=(kind,))
 
 # --- Vista de datos ---
 with st.expander("🔍 Ver datos completos"):
@@ -150,4 +412,16 @@ st.sidebar.info("""
 1. Usa los filtros para analizar subconjuntos de datos
 2. Explora las diferentes pestañas de visualización
 3. Exporta reportes en PDF o Excel
-""")
\ No newline at end of file
+""")
+
+# --- Rendimiento ---
+if profiler.enabled:
+    profiler.finish()
+    with st.expander("⏱️ Performance"):
+        if profiler.records:
+            st.caption("Etapas ejecutadas en esta interacción; lo servido desde la caché no aparece")
+            st.dataframe(profiler.to_frame().style.format(
+                {'segundos': '{:.4f}', 'memoria_delta_mb': '{:+.2f}', 'memoria_pico_mb': '{:.2f}'}
+            ))
+        else:
+            st.caption("Todo se sirvió desde la caché en esta interacción")
@@ -0,0 +1,80 @@
+import numpy as np
+import pandas as pd
+
+from parallel import chunk_slices, run_tasks
+
+SIMULATION_METHODS = ('bootstrap', 'shuffle')
+PERCENTILES = (1, 5, 25, 50, 75, 95, 99)
+# Elementos (simulaciones x operaciones) por bloque: acota la memoria de cada matriz 2-D
+CHUNK_ELEMENTS = 2_000_000
+# Por debajo de este tamaño total no compensa arrancar procesos
+PARALLEL_MIN_ELEMENTS = 50_000_000
+
+
+def _simulate_chunk(pnl, n_sims, method, seed, initial_capital, ruin_level):
+    """Simula un bloque de trayectorias como matriz (simulaciones x operaciones)"""
+    rng = np.random.default_rng(seed)
+    n = len(pnl)
+    if method == 'bootstrap':
+        paths = pnl[rng.integers(0, n, size=(n_sims, n))]
+    else:
+        paths = np.tile(pnl, (n_sims, 1))
+        rng.permuted(paths, axis=1, out=paths)
+
+    # Curva de capital y drawdown igual que calculate_drawdown, fila por fila
+    equity = np.cumsum(paths, axis=1, out=paths)
+    max_drawdown = (equity - np.maximum.accumulate(equity, axis=1)).min(axis=1)
+    final = equity[:, -1].copy()
+    ruined = initial_capital + equity.min(axis=1) <= ruin_level
+    return max_drawdown, final, ruined
+
+
+def simulate(pnl, n_simulations=1000, method='bootstrap', initial_capital=0.0, ruin_level=None,
+             seed=None, workers=None):
+    """Monte Carlo sobre la secuencia de RESULTADO $
+
+    'bootstrap' remuestrea operaciones con reemplazo; 'shuffle' solo cambia
+    su orden (el capital final es siempre el mismo, varía el drawdown). Las
+    trayectorias se procesan en bloques y, si el total es grande, en varios
+    procesos. Hay ruina cuando el capital toca ruin_level en algún momento.
+    """
+    if method not in SIMULATION_METHODS:
+        raise ValueError(f"Método de simulación desconocido: {method}")
+    pnl = np.asarray(pnl, dtype=float)
+    pnl = pnl[~np.isnan(pnl)]
+    if len(pnl) == 0:
+        raise ValueError("No hay operaciones para simular")
+    if ruin_level is None:
+        ruin_level = 0.0
+
+    sizes = [chunk.stop - chunk.start for chunk in chunk_slices(n_simulations, len(pnl), CHUNK_ELEMENTS)]
+    # Una semilla independiente por bloque: el resultado no depende del número de procesos
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    tasks = [(size, method, chunk_seed, initial_capital, ruin_level) for size, chunk_seed in zip(sizes, seeds)]
+    # pnl llega una vez a cada proceso, no con cada bloque
+    results = run_tasks(_simulate_chunk, tasks, workers, shared=(pnl,),
+                        parallel=n_simulations * len(pnl) >= PARALLEL_MIN_ELEMENTS)
+
+    max_drawdown = np.concatenate([r[0] for r in results])
+    final_equity = initial_capital + np.concatenate([r[1] for r in results])
+    ruined = np.concatenate([r[2] for r in results])
+
+    return {
+        'method': method,
+        'n_simulations': n_simulations,
+        'n_trades': len(pnl),
+        'initial_capital': initial_capital,
+        'ruin_level': ruin_level,
+        'risk_of_ruin': float(ruined.mean()),
+        'max_drawdown': max_drawdown,
+        'final_equity': final_equity
+    }
+
+
+def percentile_table(result, percentiles=PERCENTILES):
+    """Percentiles de máximo drawdown y capital final de una simulación"""
+    return pd.DataFrame({
+        'Percentil': [f"P{p}" for p in percentiles],
+        'Max Drawdown': np.percentile(result['max_drawdown'], percentiles),
+        'Capital Final': np.percentile(result['final_equity'], percentiles)
+    })
@@ -0,0 +1,56 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+# Argumentos comunes a todas las tareas de un pool, fijados una vez por proceso
+_shared_args = ()
+
+
+def _set_shared(args):
+    global _shared_args
+    _shared_args = args
+
+
+def _run_task(func, task):
+    return func(*_shared_args, *task)
+
+
+def _run_task_safe(func, task):
+    try:
+        return _run_task(func, task)
+    except Exception as e:
+        return e
+
+
+def chunk_slices(total, row_elements, chunk_elements):
+    """Cortes de range(total) con como mucho chunk_elements elementos por bloque
+
+    Cada unidad (una simulación, una combinación...) ocupa row_elements
+    elementos; un bloque tiene al menos una unidad.
+    """
+    per_chunk = max(1, chunk_elements // max(row_elements, 1))
+    return [slice(start, min(start + per_chunk, total)) for start in range(0, total, per_chunk)]
+
+
+def run_tasks(func, tasks, workers=None, parallel=True, shared=(), return_exceptions=False):
+    """Resultados de func(*shared, *task) para cada tarea, en orden
+
+    Con parallel, workers distinto de 1 y más de una tarea, las tareas se
+    reparten en un ProcessPoolExecutor de min(workers o núcleos, tareas)
+    procesos. shared (datos grandes como el array de operaciones) se envía
+    una sola vez a cada proceso con el initializer del pool, no con cada
+    tarea. Con return_exceptions, la excepción de una tarea se devuelve en
+    su posición en lugar de interrumpir el resto.
+    """
+    tasks = [tuple(task) for task in tasks]
+    run = _run_task_safe if return_exceptions else _run_task
+    if not parallel or workers == 1 or len(tasks) <= 1:
+        previous = _shared_args
+        _set_shared(tuple(shared))
+        try:
+            return [run(func, task) for task in tasks]
+        finally:
+            _set_shared(previous)
+
+    workers = min(workers or os.cpu_count() or 1, len(tasks))
+    with ProcessPoolExecutor(max_workers=workers, initializer=_set_shared, initargs=(tuple(shared),)) as pool:
+        return list(pool.map(run, [func] * len(tasks), tasks))
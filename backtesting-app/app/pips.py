@@ -0,0 +1,152 @@
+import hashlib
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+# CSV con columnas DIVISA, VALOR_PIP, MONEDA y opcionalmente TASA
+PIP_TABLE_ENV = 'BACKTESTING_PIP_TABLE'
+# CSV con columnas FECHA, MONEDA, TASA (dólares por unidad de MONEDA)
+RATES_ENV = 'BACKTESTING_RATES'
+BASE_CURRENCY = 'USD'
+PIP_COLUMNS = ['VALOR_PIP', 'MONEDA', 'TASA']
+
+# Valor del pip por lote estándar en la moneda cotizada: 10 unidades (pip de
+# 0.0001 sobre 100.000) y 1000 en los pares con yen (pip de 0.01)
+FX_PIP_VALUE = 10.0
+JPY_PIP_VALUE = 1000.0
+# Monedas que identifican un par de divisas; no llevan tasa: la conversión a
+# dólares sale solo de la TASA de la tabla o de BACKTESTING_RATES
+FX_CURRENCIES = ('USD', 'EUR', 'GBP', 'JPY', 'CHF', 'CAD', 'AUD', 'NZD')
+# Símbolos que no siguen la regla de los pares de divisas (metales, índices...)
+DEFAULT_PIP_TABLE = pd.DataFrame([
+    ('XAUUSD', 10.0, 'USD'),   # oro: 100 onzas, pip de 0.10
+    ('XAGUSD', 50.0, 'USD'),   # plata: 5000 onzas, pip de 0.01
+], columns=['DIVISA', 'VALOR_PIP', 'MONEDA']).set_index('DIVISA')
+
+
+def normalize_symbols(values):
+    """Símbolos en mayúsculas sin separadores: 'eur/usd ' -> 'EURUSD'"""
+    return pd.Index(values, dtype=object).astype(str).str.upper().str.replace(r'[\s/._-]', '', regex=True)
+
+
+def load_pip_table(path=None):
+    """Tabla de valor del pip por símbolo: la por defecto más el CSV de path o BACKTESTING_PIP_TABLE
+
+    Las filas del CSV reemplazan a las de la tabla por defecto. Sin TASA, la
+    de los símbolos cotizados en dólares es 1 y la del resto queda vacía (se
+    toma de BACKTESTING_RATES o pip_values falla).
+    """
+    path = path or os.environ.get(PIP_TABLE_ENV)
+    table = DEFAULT_PIP_TABLE
+    if path:
+        custom = pd.read_csv(path)
+        missing_cols = [col for col in ('DIVISA', 'VALOR_PIP', 'MONEDA') if col not in custom.columns]
+        if missing_cols:
+            raise ValueError(f"Columnas requeridas no encontradas en {path}: {missing_cols}")
+        custom['DIVISA'] = normalize_symbols(custom['DIVISA'])
+        custom['MONEDA'] = custom['MONEDA'].astype(str).str.strip().str.upper()
+        custom = custom.drop_duplicates('DIVISA', keep='last').set_index('DIVISA')
+        table = pd.concat([table[~table.index.isin(custom.index)], custom[custom.columns.intersection(PIP_COLUMNS)]])
+
+    table = table.reindex(columns=PIP_COLUMNS)
+    table['VALOR_PIP'] = table['VALOR_PIP'].astype(float)
+    table['TASA'] = table['TASA'].astype(float).mask(table['MONEDA'] == BASE_CURRENCY, 1.0)
+    return table
+
+
+def load_rates(path=None):
+    """Tasas históricas de path o BACKTESTING_RATES ordenadas por FECHA, o None si no hay archivo"""
+    path = path or os.environ.get(RATES_ENV)
+    if not path:
+        return None
+    rates = pd.read_csv(path)
+    missing_cols = [col for col in ('FECHA', 'MONEDA', 'TASA') if col not in rates.columns]
+    if missing_cols:
+        raise ValueError(f"Columnas requeridas no encontradas en {path}: {missing_cols}")
+    rates['FECHA'] = pd.to_datetime(rates['FECHA'], errors='coerce')
+    rates['MONEDA'] = rates['MONEDA'].astype(str).str.strip().str.upper()
+    rates['TASA'] = pd.to_numeric(rates['TASA'], errors='coerce')
+    return rates.dropna(subset=['FECHA', 'TASA']).sort_values('FECHA', kind='stable').reset_index(drop=True)
+
+
+def defaults_fingerprint():
+    """Resumen de los valores por defecto de este módulo (cambia si se edita alguno)"""
+    defaults = [FX_PIP_VALUE, JPY_PIP_VALUE, BASE_CURRENCY, list(FX_CURRENCIES),
+                DEFAULT_PIP_TABLE.reset_index().values.tolist()]
+    return hashlib.sha1(json.dumps(defaults).encode()).hexdigest()
+
+
+def config_fingerprint():
+    """Valores por defecto y archivos de tabla y tasas configurados con su fecha y tamaño
+
+    Sirve para invalidar cachés: cambia si se edita cualquiera de ellos.
+    """
+    files = [['defaults', defaults_fingerprint()]]
+    for env in (PIP_TABLE_ENV, RATES_ENV):
+        path = os.environ.get(env)
+        if path and os.path.exists(path):
+            stat = os.stat(path)
+            files.append([env, os.path.abspath(path), stat.st_mtime_ns, stat.st_size])
+    return files
+
+
+def symbol_specs(symbols, pip_table=None):
+    """VALOR_PIP, MONEDA y TASA para cada símbolo (ya normalizado), en el mismo orden
+
+    Se busca primero en la tabla; los pares de seis letras de FX_CURRENCIES
+    siguen la regla del par (10 en la moneda cotizada, 1000 con yen) y el resto
+    usa el valor histórico de 10 dólares. La TASA de un par cotizado en otra
+    moneda queda vacía: no hay tasas por defecto.
+    """
+    pip_table = load_pip_table() if pip_table is None else pip_table
+    in_table = symbols.isin(pip_table.index)
+    specs = pip_table.reindex(symbols).reset_index(drop=True)
+
+    base, quote = symbols.str[:3], symbols.str[3:6]
+    is_pair = np.asarray((symbols.str.len() == 6) & base.isin(FX_CURRENCIES) & quote.isin(FX_CURRENCIES))
+    moneda = np.where(is_pair, np.asarray(quote, dtype=object), BASE_CURRENCY)
+    rule = pd.DataFrame({
+        'VALOR_PIP': np.where(is_pair & np.asarray(quote == 'JPY'), JPY_PIP_VALUE, FX_PIP_VALUE),
+        'MONEDA': moneda,
+        'TASA': np.where(moneda == BASE_CURRENCY, 1.0, np.nan)
+    })
+    return specs.where(pd.Series(np.asarray(in_table)), rule, axis=0)
+
+
+def pip_values(divisa, fechas=None, pip_table=None, rates=None):
+    """Valor en dólares de un pip por lote para cada operación
+
+    La tabla se consulta una vez por símbolo distinto y se propaga con los
+    códigos de pd.factorize (join categórico). Con rates (ver load_rates) y
+    fechas, la tasa de cada operación es la última publicada antes de su
+    fecha (merge_asof por MONEDA); si no hay ninguna se usa la TASA de la tabla.
+    Si una operación queda sin tasa lanza ValueError con sus símbolos, en vez
+    de mezclar importes en otra moneda con dólares.
+    """
+    codes, uniques = pd.factorize(pd.Series(divisa).astype(object).fillna(''))
+    specs = symbol_specs(normalize_symbols(uniques), pip_table)
+    n = len(codes)
+    valor_pip = specs['VALOR_PIP'].to_numpy(dtype=float)[codes]
+    tasa = specs['TASA'].to_numpy(dtype=float)[codes]
+
+    if rates is not None and fechas is not None and n:
+        moneda = specs['MONEDA'].to_numpy(dtype=object)[codes]
+        fechas = pd.Series(pd.to_datetime(np.asarray(fechas)))
+        rows = np.flatnonzero(fechas.notna().to_numpy() & (moneda != BASE_CURRENCY))
+        if len(rows):
+            left = pd.DataFrame({'FECHA': fechas.to_numpy()[rows], 'MONEDA': moneda[rows], 'FILA': rows})
+            left = left.sort_values('FECHA', kind='stable')
+            joined = pd.merge_asof(left, rates[['FECHA', 'MONEDA', 'TASA']], on='FECHA', by='MONEDA',
+                                   direction='backward')
+            found = joined['TASA'].notna().to_numpy()
+            tasa[joined['FILA'].to_numpy()[found]] = joined['TASA'].to_numpy(dtype=float)[found]
+
+    missing = np.isnan(tasa)
+    if missing.any():
+        symbols = sorted(set(uniques[np.unique(codes[missing])].astype(str)))
+        monedas = sorted(set(specs['MONEDA'].to_numpy(dtype=object)[np.unique(codes[missing])]))
+        raise ValueError(f"Sin tasa a {BASE_CURRENCY} para {symbols} (moneda {monedas}): "
+                         f"añade TASA en {PIP_TABLE_ENV} o la moneda en {RATES_ENV}")
+    return valor_pip * tasa
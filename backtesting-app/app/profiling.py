@@ -0,0 +1,120 @@
+import json
+import os
+import threading
+import time
+import tracemalloc
+import weakref
+from contextlib import contextmanager
+from datetime import datetime
+
+import pandas as pd
+
+# Activar el perfilado por defecto y escribir sus mediciones en un archivo
+PROFILE_ENV = 'BACKTESTING_PROFILE'
+PROFILE_LOG_ENV = 'BACKTESTING_PROFILE_LOG'
+PROFILE_COLUMNS = ['etapa', 'segundos', 'filas', 'memoria_delta_mb', 'memoria_pico_mb']
+
+# tracemalloc es global al proceso: se cuenta cuántos perfiladores lo usan y
+# cuántas etapas están midiendo, todo bajo _tracing_lock
+_tracing_lock = threading.Lock()
+_tracing_users = 0
+_active_stages = 0
+_owns_tracing = False
+
+
+def _acquire_tracing():
+    """Registra un perfilador como usuario de tracemalloc, arrancándolo si hace falta"""
+    global _tracing_users, _owns_tracing
+    with _tracing_lock:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            _owns_tracing = True
+        _tracing_users += 1
+
+
+def _release_tracing():
+    """Quita un usuario; el último detiene tracemalloc si lo arrancó este módulo"""
+    global _tracing_users, _owns_tracing
+    with _tracing_lock:
+        _tracing_users -= 1
+        if _tracing_users == 0 and _owns_tracing:
+            tracemalloc.stop()
+            _owns_tracing = False
+
+
+def profiling_enabled():
+    """Perfilado activado por la variable de entorno BACKTESTING_PROFILE"""
+    return os.environ.get(PROFILE_ENV, '').lower() in ('1', 'true', 'si', 'sí', 'yes')
+
+
+class Profiler:
+    """Mide tiempo, filas y memoria de cada etapa del dashboard
+
+    Desactivado no mide nada. Activado usa tracemalloc: la memoria es la
+    asignada por Python (NumPy y pandas incluidos) en este proceso; el delta es
+    lo que queda asignado al terminar la etapa y el pico, el máximo sobre lo
+    que había al empezar.
+
+    Varias sesiones comparten tracemalloc: sigue activo mientras quede algún
+    perfilador sin terminar, y el pico solo se reinicia si no hay otra etapa
+    midiendo. Con etapas simultáneas, delta y pico incluyen también lo que
+    asignan las otras sesiones.
+    """
+
+    def __init__(self, enabled=False, log_path=None):
+        self.enabled = enabled
+        self.log_path = log_path
+        self.records = []
+        self._release = None
+
+    @contextmanager
+    def stage(self, name, rows=None):
+        """Mide el bloque; el registro devuelto admite fijar 'filas' dentro del bloque"""
+        record = {'etapa': name, 'filas': rows}
+        if not self.enabled:
+            yield record
+            return
+
+        global _active_stages
+        if self._release is None:
+            _acquire_tracing()
+            # Si el perfilador se descarta sin finish (st.stop, excepción) también se libera
+            self._release = weakref.finalize(self, _release_tracing)
+        with _tracing_lock:
+            if _active_stages == 0:
+                tracemalloc.reset_peak()
+            _active_stages += 1
+            memory_before = tracemalloc.get_traced_memory()[0]
+        start = time.perf_counter()
+        try:
+            yield record
+        finally:
+            elapsed = time.perf_counter() - start
+            with _tracing_lock:
+                current, peak = tracemalloc.get_traced_memory()
+                _active_stages -= 1
+            record.update({
+                'segundos': elapsed,
+                'memoria_delta_mb': (current - memory_before) / 2**20,
+                'memoria_pico_mb': max(peak - memory_before, 0) / 2**20
+            })
+            self.records.append(record)
+
+    def to_frame(self):
+        """Mediciones como DataFrame, una fila por etapa"""
+        return pd.DataFrame(self.records, columns=PROFILE_COLUMNS)
+
+    def finish(self):
+        """Deja de usar tracemalloc (se detiene con el último perfilador) y escribe el log"""
+        if self._release is not None:
+            self._release()
+            self._release = None
+        if self.log_path and self.records:
+            self.write_log(self.log_path)
+
+    def write_log(self, path):
+        """Añade las mediciones al archivo como líneas JSON con marca de tiempo"""
+        timestamp = datetime.now().isoformat(timespec='seconds')
+        with open(path, 'a', encoding='utf-8') as f:
+            for record in self.records:
+                f.write(json.dumps({'fecha': timestamp, **record}, ensure_ascii=False) + '\n')
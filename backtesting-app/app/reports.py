@@ -0,0 +1,194 @@
+import atexit
+import math
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from analysis import generate_report_data
+
+CHUNK_SIZE = 50000
+# Segundos que se conserva un reporte no descargado antes de borrarlo
+REPORT_MAX_AGE = 3600
+EXPORT_FORMATS = {
+    'pdf': ('reporte_trading.pdf', 'application/pdf'),
+    'xlsx': ('reporte_trading.xlsx', 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'),
+    'csv': ('reporte_trading.csv', 'text/csv')
+}
+
+
+def iter_chunks(df, chunk_size=CHUNK_SIZE):
+    """Recorre el DataFrame en bloques de filas sin copiarlo entero"""
+    for start in range(0, len(df), chunk_size):
+        yield df.iloc[start:start + chunk_size]
+
+
+def _excel_value(value):
+    """Valor de celda compatible con openpyxl"""
+    if value is None or value is pd.NaT or value is pd.NA:
+        return None
+    if isinstance(value, float) and math.isnan(value):
+        return None
+    if isinstance(value, pd.Timestamp):
+        return value.to_pydatetime()
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
+
+
+def export_xlsx(df, path, chunk_size=CHUNK_SIZE):
+    """Escribe el DataFrame en un XLSX fila a fila con openpyxl en modo write_only"""
+    from openpyxl import Workbook
+
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet('Datos Completos')
+    ws.append([df.index.name or ''] + [str(col) for col in df.columns])
+    for chunk in iter_chunks(df, chunk_size):
+        for row in chunk.itertuples(index=True, name=None):
+            ws.append([_excel_value(value) for value in row])
+    wb.save(path)
+    return path
+
+
+def export_csv(df, path, chunk_size=CHUNK_SIZE):
+    """Escribe el DataFrame en CSV por bloques"""
+    for i, chunk in enumerate(iter_chunks(df, chunk_size)):
+        chunk.to_csv(path, mode='w' if i == 0 else 'a', header=i == 0, encoding='utf-8')
+    if len(df) == 0:
+        df.to_csv(path, encoding='utf-8')
+    return path
+
+
+def _table(data, header_color):
+    from reportlab.lib import colors
+    from reportlab.platypus import Table, TableStyle
+
+    table = Table(data, repeatRows=1)
+    table.setStyle(TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), header_color),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
+        ('FONTSIZE', (0, 0), (-1, -1), 8),
+        ('GRID', (0, 0), (-1, -1), 0.25, colors.grey),
+        ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.whitesmoke])
+    ]))
+    return table
+
+
+def _frame_rows(df):
+    rows = [[str(col) for col in df.columns]]
+    for row in df.itertuples(index=False, name=None):
+        rows.append([f"{value:,.2f}" if isinstance(value, float) else str(value) for value in row])
+    return rows
+
+
+def render_pdf(report_data, path):
+    """Genera el reporte PDF con ReportLab: resumen, divisas y estrategias"""
+    from reportlab.lib import colors
+    from reportlab.lib.pagesizes import A4, landscape
+    from reportlab.lib.styles import getSampleStyleSheet
+    from reportlab.platypus import Paragraph, SimpleDocTemplate, Spacer
+
+    styles = getSampleStyleSheet()
+    header_color = colors.HexColor('#2c3e50')
+    story = [Paragraph("Reporte de Trading", styles['Title']), Spacer(1, 12)]
+
+    summary = [['Métrica', 'Valor']] + [[key, str(value)] for key, value in report_data['summary'].items()]
+    story += [Paragraph("Resumen", styles['Heading2']), _table(summary, header_color), Spacer(1, 12)]
+
+    for key, title in (('by_currency', "Por divisa"), ('by_strategy', "Por estrategia")):
+        frame = report_data.get(key)
+        if frame is not None and len(frame):
+            story += [Paragraph(title, styles['Heading2']), _table(_frame_rows(frame), header_color), Spacer(1, 12)]
+
+    SimpleDocTemplate(path, pagesize=landscape(A4)).build(story)
+    return path
+
+
+def build_report(kind, df, metrics, chunk_size=CHUNK_SIZE):
+    """Genera el archivo del reporte en un temporal y devuelve su ruta"""
+    if kind not in EXPORT_FORMATS:
+        raise ValueError(f"Formato de reporte desconocido: {kind}")
+
+    fd, path = tempfile.mkstemp(prefix='reporte_trading_', suffix=f'.{kind}')
+    os.close(fd)
+    try:
+        if kind == 'pdf':
+            report_data = generate_report_data(df, metrics)
+            if report_data is None:
+                raise ValueError("No se pudieron preparar los datos del reporte")
+            render_pdf(report_data, path)
+        elif kind == 'xlsx':
+            export_xlsx(df, path, chunk_size)
+        else:
+            export_csv(df, path, chunk_size)
+    except Exception:
+        os.remove(path)
+        raise
+    return path
+
+
+class ReportWorker:
+    """Genera reportes en un hilo de fondo para no bloquear el dashboard
+
+    Lleva la cuenta de los temporales que genera: discard los borra al
+    descargarlos o reemplazarlos, y los que nadie reclama se borran al pasar
+    max_age segundos (se comprueba en cada submit) o al terminar el proceso.
+    """
+
+    def __init__(self, max_workers=1, max_age=REPORT_MAX_AGE):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='reportes')
+        self.max_age = max_age
+        self._files = {}
+        self._lock = threading.Lock()
+        atexit.register(self.remove_all)
+
+    def submit(self, kind, df, metrics):
+        """Encola un reporte; devuelve un Future con la ruta del archivo"""
+        self.remove_expired()
+        future = self._executor.submit(build_report, kind, df, dict(metrics))
+        future.add_done_callback(self._track)
+        return future
+
+    def discard(self, future):
+        """Borra el archivo de un reporte ya entregado o reemplazado
+
+        Si aún está en cola se cancela; si se está generando, se borra al terminar.
+        """
+        if not future.cancel():
+            future.add_done_callback(self._remove_result)
+
+    def remove_expired(self):
+        """Borra los reportes generados hace más de max_age segundos"""
+        now = time.monotonic()
+        with self._lock:
+            expired = [path for path, created in self._files.items() if now - created > self.max_age]
+        for path in expired:
+            self._remove(path)
+
+    def remove_all(self):
+        """Borra todos los reportes pendientes de descarga"""
+        with self._lock:
+            paths = list(self._files)
+        for path in paths:
+            self._remove(path)
+
+    def _track(self, future):
+        if not future.cancelled() and future.exception() is None:
+            with self._lock:
+                self._files[future.result()] = time.monotonic()
+
+    def _remove_result(self, future):
+        if not future.cancelled() and future.exception() is None:
+            self._remove(future.result())
+
+    def _remove(self, path):
+        with self._lock:
+            self._files.pop(path, None)
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
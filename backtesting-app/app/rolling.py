@@ -0,0 +1,99 @@
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+ROLLING_COLUMNS = {
+    'WIN_RATE': 'Win Rate',
+    'PROFIT_FACTOR': 'Profit Factor',
+    'EXPECTATIVA': 'Expectativa ($)',
+    'DRAWDOWN_VENTANA': 'Drawdown ($)'
+}
+
+
+def _prefix(values):
+    """Suma acumulada con un 0 delante: la suma de [a, b) es p[b] - p[a]"""
+    return np.concatenate(([0], np.cumsum(values)))
+
+
+def sliding_max(values, window):
+    """Máximo de cada ventana de window elementos que termina en i (van Herk/Gil-Werman)
+
+    Se parte la serie en bloques de tamaño window y se combinan el máximo
+    acumulado hacia delante y hacia atrás de cada bloque: O(n) y vectorizado.
+    """
+    values = np.asarray(values, dtype=float)
+    n = len(values)
+    if n == 0 or window <= 1:
+        return values.copy()
+    window = min(window, n)
+
+    blocks = np.concatenate((values, np.full(-n % window, -np.inf))).reshape(-1, window)
+    forward = np.maximum.accumulate(blocks, axis=1).ravel()[:n]
+    backward = np.maximum.accumulate(blocks[:, ::-1], axis=1)[:, ::-1].ravel()[:n]
+
+    result = np.maximum.accumulate(values)
+    result[window - 1:] = np.maximum(backward[:n - window + 1], forward[window - 1:])
+    return result
+
+
+def sliding_max_variable(values, left):
+    """Máximo de values[left[i]:i + 1] con una cola monótona; left debe ser no decreciente"""
+    values = np.asarray(values, dtype=float)
+    result = np.empty(len(values))
+    candidates = deque()
+    for i, value in enumerate(values):
+        while candidates and values[candidates[-1]] <= value:
+            candidates.pop()
+        candidates.append(i)
+        while candidates[0] < left[i]:
+            candidates.popleft()
+        result[i] = values[candidates[0]]
+    return result
+
+
+def rolling_metrics(pnl, window=500, times=None, time_window=None):
+    """Win rate, profit factor, expectativa y drawdown en ventana deslizante
+
+    Por defecto la ventana son las últimas window operaciones. Con times
+    (fechas ordenadas) y time_window (Timedelta) la ventana son las operaciones
+    en (t - time_window, t]. Todo sale de sumas acumuladas y máximos
+    deslizantes, en tiempo lineal sin recalcular cada ventana.
+    """
+    pnl = np.nan_to_num(np.asarray(pnl, dtype=float))
+    n = len(pnl)
+    positions = np.arange(n)
+
+    if time_window is not None:
+        ns = np.asarray(times, dtype='datetime64[ns]').view(np.int64)
+        left = np.searchsorted(ns, ns - pd.Timedelta(time_window).value, 'right')
+    else:
+        left = np.maximum(positions - window + 1, 0)
+    end = positions + 1
+    count = end - left
+
+    wins = _prefix(pnl > 0)
+    gross_win = _prefix(np.where(pnl > 0, pnl, 0.0))
+    gross_loss = _prefix(np.where(pnl < 0, -pnl, 0.0))
+    total = _prefix(pnl)
+
+    window_win = gross_win[end] - gross_win[left]
+    window_loss = gross_loss[end] - gross_loss[left]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        profit_factor = np.where(window_loss > 0, window_win / window_loss,
+                                 np.where(window_win > 0, np.inf, np.nan))
+
+    # Drawdown respecto al pico de capital dentro de la ventana
+    equity = total[1:]
+    if time_window is not None:
+        peak = sliding_max_variable(equity, left)
+    else:
+        peak = sliding_max(equity, window)
+
+    return pd.DataFrame({
+        'N_VENTANA': count,
+        'WIN_RATE': (wins[end] - wins[left]) / count,
+        'PROFIT_FACTOR': profit_factor,
+        'EXPECTATIVA': (total[end] - total[left]) / count,
+        'DRAWDOWN_VENTANA': equity - peak
+    })
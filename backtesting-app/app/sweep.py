@@ -0,0 +1,110 @@
+import itertools
+
+import numpy as np
+import pandas as pd
+
+from analysis import resultado_masks, DEFAULT_PIP_VALUE
+from parallel import chunk_slices, run_tasks
+from pips import pip_values as table_pip_values, load_pip_table, load_rates
+
+# Elementos (combinaciones x operaciones) por bloque evaluado de una vez
+CHUNK_ELEMENTS = 4_000_000
+PARALLEL_MIN_ELEMENTS = 50_000_000
+
+
+def build_grid(lot_sizes=(None,), pip_values=(None,), pip_overrides=None):
+    """Rejilla de parámetros como producto cartesiano
+
+    lot_sizes son los lotes a probar (None = el LOTAJE original de cada
+    operación), pip_values el valor del pip por lote para todas las divisas
+    (None = el de la tabla de pips.py para cada operación) y pip_overrides un
+    dict {divisa: [valores]} para probar valores propios de algunas divisas.
+    Devuelve un DataFrame con una fila por combinación.
+    """
+    pip_overrides = pip_overrides or {}
+    names = ['LOTAJE', 'VALOR_PIP'] + [f'VALOR_PIP {divisa}' for divisa in pip_overrides]
+    values = [lot_sizes, pip_values] + [list(v) for v in pip_overrides.values()]
+    grid = pd.DataFrame(list(itertools.product(*values)), columns=names)
+    grid['LOTAJE'] = grid['LOTAJE'].astype(float)
+    grid['VALOR_PIP'] = grid['VALOR_PIP'].astype(float)
+    return grid
+
+
+def _trade_arrays(df, pip_table=None, rates=None):
+    """Pips con signo, lotaje, valor del pip según la tabla y códigos de divisa de cada operación"""
+    tp_mask, sl_mask = resultado_masks(df['RESULTADO'])
+    tp = df['PIPS. TP'].to_numpy(dtype=float)
+    sl = df['PIPS SL'].to_numpy(dtype=float)
+    signed_pips = np.select([tp_mask, sl_mask], [tp, -sl], default=0.0)
+    if 'DIVISA' in df.columns:
+        codes, divisas = pd.factorize(df['DIVISA'], sort=True)
+        row_pip = table_pip_values(
+            df['DIVISA'],
+            fechas=df['FECHA'] if 'FECHA' in df.columns else None,
+            pip_table=load_pip_table() if pip_table is None else pip_table,
+            rates=load_rates() if rates is None else rates
+        )
+    else:
+        codes, divisas = np.full(len(df), -1), pd.Index([])
+        row_pip = np.full(len(df), float(DEFAULT_PIP_VALUE))
+    return signed_pips, df['LOTAJE'].to_numpy(dtype=float), row_pip, codes, list(divisas)
+
+
+def _pip_table(grid, divisas):
+    """Matriz (combinaciones x divisas + 1) con el valor del pip; la última columna es divisa nula
+
+    NaN significa usar el valor de la tabla de cada operación.
+    """
+    table = np.repeat(grid['VALOR_PIP'].to_numpy(dtype=float)[:, None], len(divisas) + 1, axis=1)
+    for i, divisa in enumerate(divisas):
+        column = f'VALOR_PIP {divisa}'
+        if column in grid.columns:
+            table[:, i] = grid[column].to_numpy(dtype=float)
+    return table
+
+
+def _evaluate_chunk(signed_pips, lotaje, row_pip, codes, lots, pip_table):
+    """Métricas de un bloque de combinaciones con una matriz (combinaciones x operaciones)"""
+    lots = np.where(np.isnan(lots)[:, None], lotaje[None, :], lots[:, None])
+    pips = pip_table[:, codes]
+    pips = np.where(np.isnan(pips), row_pip[None, :], pips)
+    pnl = signed_pips[None, :] * lots * pips
+
+    wins = pnl > 0
+    losses = pnl < 0
+    gross_win = np.where(wins, pnl, 0.0).sum(axis=1)
+    gross_loss = -np.where(losses, pnl, 0.0).sum(axis=1)
+    equity = np.cumsum(pnl, axis=1)
+    max_drawdown = (equity - np.maximum.accumulate(equity, axis=1)).min(axis=1) if pnl.shape[1] else 0.0
+    n = pnl.shape[1]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return pd.DataFrame({
+            'total_profit': pnl.sum(axis=1),
+            'win_ops': wins.sum(axis=1),
+            'lose_ops': losses.sum(axis=1),
+            'win_rate': wins.sum(axis=1) / n if n else 0.0,
+            'profit_factor': np.where(gross_loss != 0, gross_win / gross_loss, np.inf),
+            'expectancy': pnl.sum(axis=1) / n if n else 0.0,
+            'max_drawdown': max_drawdown
+        })
+
+
+def run_sweep(df, grid, workers=None, pip_table=None, rates=None):
+    """Evalúa todas las combinaciones de la rejilla sobre las operaciones de df
+
+    RESULTADO $ se recalcula como pips con signo x lotaje x valor del pip,
+    igual que en load_data, con broadcasting NumPy por bloques de
+    combinaciones. Si la rejilla es grande los bloques se reparten entre procesos.
+    """
+    signed_pips, lotaje, row_pip, codes, divisas = _trade_arrays(df, pip_table, rates)
+    pip_table = _pip_table(grid, divisas)
+    lots = grid['LOTAJE'].to_numpy(dtype=float)
+
+    chunks = chunk_slices(len(grid), len(signed_pips), CHUNK_ELEMENTS)
+    # Los arrays por operación llegan una vez a cada proceso; cada tarea lleva solo su bloque de la rejilla
+    results = run_tasks(_evaluate_chunk, [(lots[chunk], pip_table[chunk]) for chunk in chunks], workers,
+                        shared=(signed_pips, lotaje, row_pip, codes),
+                        parallel=len(grid) * len(signed_pips) >= PARALLEL_MIN_ELEMENTS)
+
+    metrics = pd.concat(results, ignore_index=True) if results else pd.DataFrame()
+    return pd.concat([grid.reset_index(drop=True), metrics], axis=1)
@@ -0,0 +1,29 @@
+"""Carga de varios libros con load_many
+
+Uso: pytest backtesting-app/app
+"""
+import os
+
+from analysis import STRATEGY_COLUMN, calculate_metrics, load_data, load_many, strategy_names
+from synthetic import write_workbook
+
+
+def test_nombres_unicos():
+    rutas = [os.path.join('d1', 'x.xlsx'), os.path.join('d2', 'x.xlsx'), os.path.join('d2', 'y.xlsx')]
+    assert strategy_names(rutas) == ['d1__x', 'd2__x', 'y']
+    assert strategy_names(['a/combinado.xlsx', 'b/z.xlsx'], reserved=('combinado',)) == ['combinado_2', 'z']
+
+
+def test_libros_con_el_mismo_nombre(tmp_path):
+    rutas = []
+    for carpeta, seed in (('d1', 0), ('d2', 1)):
+        os.makedirs(tmp_path / carpeta)
+        rutas.append(write_workbook(str(tmp_path / carpeta / 'x.xlsx'), n=300, seed=seed))
+
+    df = load_many(rutas, use_cache=False, workers=1)
+    assert sorted(df[STRATEGY_COLUMN].unique()) == ['d1__x', 'd2__x']
+    for ruta, nombre in zip(rutas, ['d1__x', 'd2__x']):
+        esperado = calculate_metrics(load_data(ruta, use_cache=False))
+        obtenido = calculate_metrics(df[df[STRATEGY_COLUMN] == nombre])
+        assert obtenido['total_ops'] == esperado['total_ops']
+        assert obtenido['total_profit'] == esperado['total_profit']
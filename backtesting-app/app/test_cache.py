@@ -0,0 +1,89 @@
+"""Invalidación de la caché Parquet de load_data
+
+Uso: pytest backtesting-app/app
+"""
+import os
+
+import pandas as pd
+import pytest
+
+import analysis
+import cache
+from analysis import load_data
+from cache import cache_path, sources_fingerprint
+from pips import PIP_TABLE_ENV, RATES_ENV
+from synthetic import write_workbook
+
+pytest.importorskip('pyarrow')
+
+
+@pytest.fixture
+def libro(tmp_path, monkeypatch):
+    monkeypatch.delenv(PIP_TABLE_ENV, raising=False)
+    monkeypatch.delenv(RATES_ENV, raising=False)
+    return write_workbook(str(tmp_path / 'estrategia.xlsx'), n=200)
+
+
+@pytest.fixture
+def lecturas(monkeypatch):
+    """Cuenta las veces que se lee el Excel en lugar de la caché"""
+    contador = []
+    parse = analysis._parse_workbook
+
+    def contar(*args, **kwargs):
+        contador.append(1)
+        return parse(*args, **kwargs)
+    monkeypatch.setattr(analysis, '_parse_workbook', contar)
+    return contador
+
+
+def tabla_de_pips(tmp_path, valor):
+    path = tmp_path / 'pips.csv'
+    pd.DataFrame({'DIVISA': ['US30'], 'VALOR_PIP': [valor], 'MONEDA': ['USD']}).to_csv(path, index=False)
+    return str(path)
+
+
+def test_cache_igual_que_excel(libro, lecturas):
+    fresco = load_data(libro)
+    assert os.path.exists(cache_path(libro))
+    cacheado = load_data(libro)
+    assert len(lecturas) == 1
+    pd.testing.assert_frame_equal(cacheado, fresco)
+    pd.testing.assert_frame_equal(load_data(libro, use_cache=False), fresco)
+
+
+def test_cambio_de_fecha_del_libro(libro, lecturas):
+    load_data(libro)
+    stat = os.stat(libro)
+    os.utime(libro, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    load_data(libro)
+    load_data(libro)
+    assert len(lecturas) == 2
+
+
+def test_cambio_de_configuracion(libro, lecturas, tmp_path, monkeypatch):
+    load_data(libro)
+    monkeypatch.setenv(PIP_TABLE_ENV, tabla_de_pips(tmp_path, 1.0))
+    load_data(libro)
+    # Reescribir la tabla con otro valor cambia su tamaño y su fecha
+    path = tabla_de_pips(tmp_path, 25.0)
+    os.utime(path, ns=(os.stat(path).st_atime_ns, os.stat(path).st_mtime_ns + 10**9))
+    load_data(libro)
+    load_data(libro)
+    assert len(lecturas) == 3
+
+
+def test_cambio_de_version(libro, lecturas, monkeypatch):
+    load_data(libro)
+    monkeypatch.setattr(cache, 'CACHE_VERSION', cache.CACHE_VERSION + 1)
+    load_data(libro)
+    assert len(lecturas) == 2
+
+
+def test_huella_de_varios_libros(libro, tmp_path, monkeypatch):
+    otro = write_workbook(str(tmp_path / 'otra.xlsx'), n=50, seed=1)
+    antes = sources_fingerprint([libro, otro])
+    assert sources_fingerprint([libro, otro]) == antes
+    assert sources_fingerprint([libro]) != antes
+    monkeypatch.setenv(PIP_TABLE_ENV, tabla_de_pips(tmp_path, 1.0))
+    assert sources_fingerprint([libro, otro]) != antes
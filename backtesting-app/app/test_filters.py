@@ -0,0 +1,64 @@
+"""FilterIndex frente a las máscaras booleanas del dashboard original
+
+Uso: pytest backtesting-app/app
+"""
+import datetime
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from filters import FilterIndex
+
+
+def operaciones(n, seed=0):
+    rng = np.random.default_rng(seed)
+    fechas = pd.Series(pd.Timestamp('2024-01-01') + pd.to_timedelta(rng.integers(0, 60 * 24, size=n), unit='h'))
+    fechas[rng.random(n) < 0.05] = pd.NaT
+    divisas = pd.Series(rng.choice(['EURUSD', 'GBPUSD', 'USDJPY'], size=n), dtype=object)
+    divisas[rng.random(n) < 0.05] = None
+    pnl = rng.choice([-50.0, 0.0, 25.0, np.nan], size=n, p=[0.45, 0.05, 0.45, 0.05])
+    return pd.DataFrame({'DIVISA': divisas, 'RESULTADO $': pnl, 'FECHA': fechas})
+
+
+# Filtros como el dashboard antes de FilterIndex
+def filtrar_con_mascaras(df, divisa, resultado, date_range):
+    if divisa != 'Todas':
+        df = df[df['DIVISA'] == divisa]
+    if resultado == 'Ganadoras':
+        df = df[df['RESULTADO $'] > 0]
+    elif resultado == 'Perdedoras':
+        df = df[df['RESULTADO $'] < 0]
+    if date_range is not None:
+        df = df[(df['FECHA'].dt.date >= date_range[0]) & (df['FECHA'].dt.date <= date_range[1])]
+    return df
+
+
+@pytest.mark.parametrize('seed', range(3))
+@pytest.mark.parametrize('divisa', ['Todas', 'EURUSD', 'USDJPY', 'XAUUSD'])
+@pytest.mark.parametrize('resultado', ['Todos', 'Ganadoras', 'Perdedoras'])
+def test_query_como_mascaras(seed, divisa, resultado):
+    df = operaciones(2000, seed)
+    index = FilterIndex(df)
+    rangos = [None, (datetime.date(2024, 1, 10), datetime.date(2024, 1, 10)),
+              (datetime.date(2024, 1, 5), datetime.date(2024, 2, 20)),
+              (datetime.date(2023, 1, 1), datetime.date(2023, 12, 31))]
+    for date_range in rangos:
+        esperado = filtrar_con_mascaras(df, divisa, resultado, date_range)
+        posiciones = index.query(divisa, resultado, date_range)
+        assert posiciones.tolist() == esperado.index.tolist()
+
+
+@pytest.mark.parametrize('divisa', ['Todas', 'GBPUSD'])
+@pytest.mark.parametrize('resultado', ['Todos', 'Perdedoras'])
+def test_date_bounds_como_min_max(divisa, resultado):
+    df = operaciones(2000)
+    filtrado = filtrar_con_mascaras(df, divisa, resultado, None)
+    assert FilterIndex(df).date_bounds(divisa, resultado) == (filtrado['FECHA'].min(), filtrado['FECHA'].max())
+
+
+def test_sin_divisa_ni_fecha():
+    df = operaciones(500).drop(columns=['DIVISA', 'FECHA'])
+    index = FilterIndex(df)
+    assert index.query(resultado='Ganadoras').tolist() == df.index[df['RESULTADO $'] > 0].tolist()
+    assert index.date_bounds() is None
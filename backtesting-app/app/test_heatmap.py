@@ -0,0 +1,47 @@
+"""heatmap_grid frente a pivot_table por día de la semana y hora
+
+Uso: pytest backtesting-app/app
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from analysis import DIAS_SEMANA, heatmap_grid
+
+AGREGACIONES = {'sum': 'sum', 'count': 'count', 'mean': 'mean', 'win_rate': lambda s: (s > 0).mean()}
+
+
+def operaciones(n, seed=0):
+    rng = np.random.default_rng(seed)
+    # Incluye fechas anteriores a 1970, donde la división entera por días es negativa
+    fechas = pd.Series(pd.Timestamp('1969-12-01') + pd.to_timedelta(rng.integers(0, 90 * 24 * 60, size=n), unit='min'))
+    fechas[rng.random(n) < 0.05] = pd.NaT
+    pnl = rng.normal(0, 100, size=n).round(2)
+    pnl[rng.random(n) < 0.05] = np.nan
+    return fechas, pd.Series(pnl)
+
+
+# Referencia: pivot_table con dt.dayofweek y dt.hour, completada a 7x24
+def heatmap_con_pivot(fechas, pnl, layer):
+    df = pd.DataFrame({'DIA': fechas.dt.dayofweek, 'HORA': fechas.dt.hour, 'RESULTADO $': pnl}).dropna()
+    grid = df.pivot_table(index='DIA', columns='HORA', values='RESULTADO $', aggfunc=AGREGACIONES[layer])
+    grid = grid.reindex(index=range(7), columns=range(24))
+    if layer in ('sum', 'count'):
+        grid = grid.fillna(0)
+    grid.index = DIAS_SEMANA
+    return grid
+
+
+@pytest.mark.parametrize('seed', range(3))
+@pytest.mark.parametrize('layer', list(AGREGACIONES))
+def test_como_pivot_table(seed, layer):
+    fechas, pnl = operaciones(3000, seed)
+    grid = heatmap_grid(fechas, pnl, layer)
+    esperado = heatmap_con_pivot(fechas, pnl, layer)
+    np.testing.assert_allclose(grid.to_numpy(dtype=float), esperado.to_numpy(dtype=float), rtol=1e-12, atol=1e-9)
+    assert grid.index.tolist() == DIAS_SEMANA and grid.columns.tolist() == list(range(24))
+
+
+def test_capa_desconocida():
+    with pytest.raises(ValueError):
+        heatmap_grid(*operaciones(10), layer='max')
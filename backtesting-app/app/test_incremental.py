@@ -0,0 +1,78 @@
+"""IncrementalMetrics frente a calculate_metrics y equity_curve sobre el histórico completo
+
+Uso: pytest backtesting-app/app
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from analysis import calculate_metrics, equity_curve
+from incremental import IncrementalMetrics, prefix_hashes
+
+
+def operaciones(n, seed=0):
+    rng = np.random.default_rng(seed)
+    tp = rng.integers(5, 80, size=n).astype(float)
+    tp[rng.random(n) < 0.1] = np.nan
+    return pd.DataFrame({
+        'RESULTADO $': rng.normal(5, 150, size=n).round(2) * rng.choice([1, 1 / 3], size=n),
+        'PIPS. TP': tp,
+        'PIPS SL': rng.integers(5, 80, size=n).astype(float)
+    })
+
+
+def metricas_en_lote(df):
+    metrics = calculate_metrics(df)
+    equity, drawdown = equity_curve(df['RESULTADO $'])
+    metrics['max_drawdown'] = drawdown.min() if len(df) else 0
+    metrics['current_drawdown'] = drawdown[-1] if len(df) else 0
+    return metrics
+
+
+def assert_iguales(metrics, reference):
+    assert metrics.keys() == reference.keys()
+    for key, value in reference.items():
+        assert metrics[key] == value or (np.isnan(metrics[key]) and np.isnan(value)), key
+
+
+@pytest.mark.parametrize('seed', range(5))
+@pytest.mark.parametrize('con_prefijo', [False, True])
+def test_bloques_igual_que_lote(seed, con_prefijo):
+    df = operaciones(5000, seed)
+    prefix = prefix_hashes(df) if con_prefijo else None
+    engine = IncrementalMetrics()
+    cortes = np.sort(np.random.default_rng(seed).integers(1, len(df), size=6))
+    for corte in list(cortes) + [len(df)]:
+        parcial = df.iloc[:corte]
+        engine.sync(parcial, None if prefix is None else prefix[:corte])
+        assert_iguales(engine.metrics(), metricas_en_lote(parcial))
+
+
+def test_edicion_anterior_con_prefijo():
+    df = operaciones(2000)
+    engine = IncrementalMetrics().sync(df, prefix_hashes(df))
+    editado = df.copy()
+    editado.loc[5, 'PIPS. TP'] += 7
+    editado.loc[10, 'RESULTADO $'] += 99709.0
+    assert_iguales(engine.sync(editado, prefix_hashes(editado)).metrics(), metricas_en_lote(editado))
+
+
+def test_insercion_en_medio_con_prefijo():
+    df = operaciones(2000)
+    engine = IncrementalMetrics().sync(df.iloc[:1500], prefix_hashes(df.iloc[:1500]))
+    insertado = pd.concat([df.iloc[:700], df.iloc[[1600]], df.iloc[700:]], ignore_index=True)
+    assert_iguales(engine.sync(insertado, prefix_hashes(insertado)).metrics(), metricas_en_lote(insertado))
+
+
+def test_recorte_y_ultima_fila_sin_prefijo():
+    df = operaciones(2000)
+    engine = IncrementalMetrics().sync(df)
+    assert_iguales(engine.sync(df.iloc[:1000]).metrics(), metricas_en_lote(df.iloc[:1000]))
+    cambiado = df.copy()
+    cambiado.loc[999, 'RESULTADO $'] = -1.0
+    assert_iguales(engine.sync(cambiado).metrics(), metricas_en_lote(cambiado))
+
+
+def test_vacio():
+    df = operaciones(0)
+    assert_iguales(IncrementalMetrics().sync(df).metrics(), metricas_en_lote(df))
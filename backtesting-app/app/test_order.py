@@ -0,0 +1,45 @@
+"""order_operations frente a sort_values de pandas
+
+Uso: pytest backtesting-app/app
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from analysis import SEQUENCE_INDEX, order_operations
+
+
+def operaciones(n, seed=0):
+    rng = np.random.default_rng(seed)
+    fechas = pd.Series(pd.Timestamp('2024-01-01') + pd.to_timedelta(rng.integers(0, 20, size=n), unit='D'))
+    fechas[rng.random(n) < 0.1] = pd.NaT
+    numero = rng.integers(1, 30, size=n).astype(float)
+    numero[rng.random(n) < 0.1] = np.nan
+    df = pd.DataFrame({'FECHA': fechas, 'RESULTADO $': rng.normal(size=n)}, index=rng.permutation(n) + 100)
+    return df, numero
+
+
+# Orden de referencia: FECHA y número con nulos al final y, a igualdad, el orden de lectura
+def ordenar_con_pandas(df, numero=None):
+    claves = df.assign(_numero=numero, _lectura=np.arange(len(df)))
+    columnas = [col for col in ('FECHA', '_numero') if col in claves.columns]
+    ordenado = claves.sort_values(columnas + ['_lectura'], na_position='last', kind='mergesort')
+    return ordenado[df.columns].reset_index(drop=True)
+
+
+@pytest.mark.parametrize('seed', range(5))
+@pytest.mark.parametrize('con_numero', [False, True])
+def test_como_sort_values(seed, con_numero):
+    df, numero = operaciones(1000, seed)
+    numero = numero if con_numero else None
+    esperado = ordenar_con_pandas(df, numero)
+    ordenado = order_operations(df.copy(), numero)
+    assert isinstance(ordenado.index, pd.RangeIndex) and ordenado.index.name == SEQUENCE_INDEX
+    pd.testing.assert_frame_equal(ordenado.reset_index(drop=True), esperado)
+
+
+def test_sin_fecha():
+    df, numero = operaciones(300)
+    df = df.drop(columns=['FECHA'])
+    pd.testing.assert_frame_equal(order_operations(df.copy(), numero).reset_index(drop=True),
+                                  ordenar_con_pandas(df, numero))
@@ -0,0 +1,80 @@
+"""run_tasks en procesos frente a en serie, y simulate/run_sweep con varios procesos
+
+Uso: pytest backtesting-app/app
+"""
+import os
+
+import numpy as np
+import pandas as pd
+import pandas.testing as tm
+import pytest
+
+import montecarlo
+import sweep
+from parallel import chunk_slices, run_tasks
+
+
+def suma_compartida(datos, factor, inicio, fin):
+    return float(datos[inicio:fin].sum()) * factor, os.getpid()
+
+
+def falla_si_negativo(valor):
+    if valor < 0:
+        raise ValueError(f"negativo: {valor}")
+    return valor * 2
+
+
+@pytest.mark.parametrize('total, fila, bloque', [(10, 3, 9), (7, 100, 50), (0, 5, 10), (5, 0, 10)])
+def test_chunk_slices_cubre_el_rango(total, fila, bloque):
+    cortes = chunk_slices(total, fila, bloque)
+    assert [i for corte in cortes for i in range(total)[corte]] == list(range(total))
+    assert all(corte.stop - corte.start <= max(1, bloque // max(fila, 1)) for corte in cortes)
+
+
+def test_procesos_igual_que_en_serie_con_datos_compartidos():
+    datos = np.arange(1000, dtype=float)
+    tasks = [(s.start, s.stop) for s in chunk_slices(len(datos), 1, 100)]
+    en_serie = run_tasks(suma_compartida, tasks, workers=1, shared=(datos, 2.0))
+    en_procesos = run_tasks(suma_compartida, tasks, workers=2, shared=(datos, 2.0))
+    assert [r[0] for r in en_procesos] == [r[0] for r in en_serie]
+    assert {r[1] for r in en_serie} == {os.getpid()}
+    assert os.getpid() not in {r[1] for r in en_procesos}
+
+
+def test_return_exceptions():
+    for workers in (1, 2):
+        resultados = run_tasks(falla_si_negativo, [(1,), (-1,), (3,)], workers, return_exceptions=True)
+        assert resultados[0] == 2 and resultados[2] == 6
+        assert isinstance(resultados[1], ValueError)
+        with pytest.raises(ValueError):
+            run_tasks(falla_si_negativo, [(1,), (-1,)], workers)
+
+
+def test_simulate_con_procesos(monkeypatch):
+    monkeypatch.setattr(montecarlo, 'CHUNK_ELEMENTS', 5_000)
+    monkeypatch.setattr(montecarlo, 'PARALLEL_MIN_ELEMENTS', 0)
+    pnl = np.random.default_rng(0).normal(5, 100, size=200)
+    en_serie = montecarlo.simulate(pnl, 300, seed=7, workers=1)
+    en_procesos = montecarlo.simulate(pnl, 300, seed=7, workers=2)
+    for clave in en_serie:
+        if isinstance(en_serie[clave], pd.DataFrame):
+            tm.assert_frame_equal(en_procesos[clave], en_serie[clave])
+        elif isinstance(en_serie[clave], np.ndarray):
+            np.testing.assert_array_equal(en_procesos[clave], en_serie[clave])
+        else:
+            assert en_procesos[clave] == en_serie[clave], clave
+
+
+def test_run_sweep_con_procesos(monkeypatch):
+    monkeypatch.setattr(sweep, 'CHUNK_ELEMENTS', 2_000)
+    monkeypatch.setattr(sweep, 'PARALLEL_MIN_ELEMENTS', 0)
+    rng = np.random.default_rng(1)
+    n = 500
+    df = pd.DataFrame({
+        'RESULTADO': rng.choice(['TP', 'SL', 'BE'], size=n),
+        'PIPS. TP': rng.integers(5, 80, size=n).astype(float),
+        'PIPS SL': rng.integers(5, 80, size=n).astype(float),
+        'LOTAJE': rng.choice([0.1, 0.5, 1.0], size=n)
+    })
+    grid = sweep.build_grid(lot_sizes=(None, 0.1, 0.5, 1.0), pip_values=(None, 5.0, 10.0))
+    tm.assert_frame_equal(sweep.run_sweep(df, grid, workers=2), sweep.run_sweep(df, grid, workers=1))
@@ -0,0 +1,86 @@
+"""Valor del pip por símbolo y conversión con tasas históricas de pips.py
+
+Uso: pytest backtesting-app/app
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+import pips
+from pips import config_fingerprint, load_pip_table, load_rates, pip_values
+
+
+@pytest.fixture
+def tabla(tmp_path):
+    path = tmp_path / 'pips.csv'
+    pd.DataFrame({'DIVISA': ['eur/jpy', 'US30'], 'VALOR_PIP': [1000.0, 1.0], 'MONEDA': ['jpy', 'usd'],
+                  'TASA': [0.0065, None]}).to_csv(path, index=False)
+    return load_pip_table(str(path))
+
+
+def test_valores_sin_conversion():
+    valores = pip_values(['EURUSD', 'gbp/usd', 'XAUUSD', 'XAGUSD', 'US30', None], pip_table=load_pip_table())
+    assert valores.tolist() == [10.0, 10.0, 10.0, 50.0, 10.0, 10.0]
+
+
+def test_tasa_de_la_tabla(tabla):
+    valores = pip_values(['EURJPY', 'US30', 'EURUSD'], pip_table=tabla)
+    assert valores.tolist() == [1000.0 * 0.0065, 1.0, 10.0]
+
+
+# Sin tasas por defecto: un par cotizado fuera del dólar sin TASA ni tasas históricas falla
+@pytest.mark.parametrize('divisa', ['USDCAD', 'EURJPY', 'EURGBP'])
+def test_sin_tasa_falla(divisa):
+    with pytest.raises(ValueError, match=divisa):
+        pip_values(['EURUSD', divisa], pip_table=load_pip_table())
+
+
+def tasa_lenta(rates, moneda, fecha, tasa_tabla):
+    """Última tasa de la moneda publicada hasta la fecha, o la de la tabla"""
+    anteriores = rates[(rates['MONEDA'] == moneda) & (rates['FECHA'] <= fecha)]
+    return anteriores['TASA'].iloc[-1] if len(anteriores) else tasa_tabla
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_tasas_historicas_como_busqueda_lineal(tmp_path, tabla, seed):
+    rng = np.random.default_rng(seed)
+    inicio = pd.Timestamp('2024-01-01')
+    path = tmp_path / 'tasas.csv'
+    dias = rng.choice(np.arange(10, 200), size=60, replace=False)
+    pd.DataFrame({
+        'FECHA': inicio + pd.to_timedelta(dias, unit='D'),
+        'MONEDA': rng.choice(['JPY', 'CAD'], size=len(dias)),
+        'TASA': rng.uniform(0.005, 0.8, size=len(dias)).round(5)
+    }).to_csv(path, index=False)
+    rates = load_rates(str(path))
+
+    divisas = rng.choice(['EURJPY', 'USDCAD', 'EURUSD'], size=300)
+    fechas = pd.Series(inicio + pd.to_timedelta(rng.integers(0, 220, size=len(divisas)), unit='D'))
+    # USDCAD no tiene tasa antes de la primera publicación de CAD: se quitan esas filas
+    primera_cad = rates.loc[rates['MONEDA'] == 'CAD', 'FECHA'].min()
+    conservar = (divisas != 'USDCAD') | (fechas >= primera_cad).to_numpy()
+    divisas, fechas = divisas[conservar], fechas[conservar].reset_index(drop=True)
+    # Sin fecha se usa la TASA de la tabla
+    divisas[0], fechas[0] = 'EURJPY', pd.NaT
+
+    valores = pip_values(divisas, fechas=fechas, pip_table=tabla, rates=rates)
+    esperado = []
+    for divisa, fecha in zip(divisas, fechas):
+        if divisa == 'EURUSD':
+            esperado.append(10.0)
+        elif divisa == 'EURJPY':
+            esperado.append(1000.0 * (0.0065 if pd.isna(fecha) else tasa_lenta(rates, 'JPY', fecha, 0.0065)))
+        else:
+            esperado.append(10.0 * tasa_lenta(rates, 'CAD', fecha, np.nan))
+    np.testing.assert_array_equal(valores, esperado)
+
+    # Una operación de USDCAD anterior a la primera tasa de CAD no tiene tasa
+    with pytest.raises(ValueError, match='USDCAD'):
+        pip_values(['USDCAD'], fechas=[primera_cad - pd.Timedelta(days=1)], pip_table=tabla, rates=rates)
+
+
+def test_huella_incluye_valores_por_defecto(monkeypatch):
+    antes = config_fingerprint()
+    assert antes[0][0] == 'defaults'
+    monkeypatch.setattr(pips, 'FX_PIP_VALUE', 1.0)
+    assert config_fingerprint() != antes
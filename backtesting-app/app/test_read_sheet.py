@@ -0,0 +1,58 @@
+"""read_sheet frente a pandas.read_excel con la fila de encabezados
+
+Uso: pytest backtesting-app/app
+"""
+import datetime
+
+import pandas as pd
+import pytest
+
+from analysis import read_sheet
+
+ENCABEZADO = ['OPERACIÓN', 'DIVISA', 'LOTAJE', 'RESULTADO', 'FECHA']
+
+
+def escribir_libro(path, filas, fila_encabezado=3):
+    from openpyxl import Workbook
+
+    wb = Workbook()
+    ws = wb.active
+    ws.cell(1, 1, 'TAMAÑO DE LA CUENTA')
+    for i, fila in enumerate(filas):
+        for j, valor in enumerate(fila):
+            if valor is not None:
+                ws.cell(fila_encabezado + i, j + 1, valor)
+    wb.save(path)
+    return str(path)
+
+
+def filas_normales(n):
+    fecha = datetime.datetime(2024, 1, 1, 9, 30)
+    return [[i + 1, 'EURUSD' if i % 2 else 'GBPUSD', 0.5 + i % 3, 'take profit' if i % 3 else 'stop loss',
+             fecha + datetime.timedelta(hours=i)] for i in range(n)]
+
+
+CASOS = {
+    'normal': [ENCABEZADO] + filas_normales(50),
+    # Fila vacía en medio, filas más cortas y una más ancha que el encabezado
+    'irregular': [ENCABEZADO] + filas_normales(5) + [[]] + [[7, 'EURUSD'], [8, None, None, 'x', None, None, 'extra']]
+                 + filas_normales(3) + [[], []],
+    # Encabezados repetidos o vacíos, texto en columnas numéricas y códigos de error
+    'encabezados': [['OPERACIÓN', 'DIVISA', 'DIVISA', None, 'RESULTADO']]
+                   + [[1, 'EURUSD', 'x', 3, '#N/A'], [2, 'NA', 5, 'texto', 'stop loss'], ['3', '', 1.5, 4, True]],
+    'solo_encabezado': [ENCABEZADO],
+    'una_columna': [['OPERACIÓN'], [1], [], [2.5], ['x'], []],
+}
+
+
+@pytest.mark.parametrize('caso', list(CASOS))
+def test_como_read_excel(tmp_path, caso):
+    path = escribir_libro(tmp_path / f'{caso}.xlsx', CASOS[caso])
+    esperado = pd.read_excel(path, header=2)
+    pd.testing.assert_frame_equal(read_sheet(path), esperado)
+
+
+def test_sin_encabezado(tmp_path):
+    path = escribir_libro(tmp_path / 'sin.xlsx', [['A', 'B'], [1, 2]])
+    with pytest.raises(ValueError):
+        read_sheet(path)
@@ -0,0 +1,65 @@
+"""rolling_metrics frente a Series.rolling de pandas
+
+Uso: pytest backtesting-app/app
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from rolling import rolling_metrics, sliding_max, sliding_max_variable
+
+
+def operaciones(n, seed=0):
+    rng = np.random.default_rng(seed)
+    pnl = rng.normal(5, 100, size=n).round(2)
+    pnl[rng.random(n) < 0.2] = 0.0
+    pnl[:30] = np.abs(pnl[:30])  # solo ganadoras al principio: profit factor infinito
+    minutos = np.sort(rng.integers(0, 30 * 24 * 60, size=n))
+    return pd.Series(pnl), pd.Series(pd.Timestamp('2024-01-01') + pd.to_timedelta(minutos, unit='min'))
+
+
+# Referencia: cada métrica con Series.rolling sobre la misma ventana
+def metricas_con_pandas(pnl, ventana):
+    ganancia = pnl.clip(lower=0).rolling(ventana, min_periods=1).sum()
+    perdida = (-pnl.clip(upper=0)).rolling(ventana, min_periods=1).sum()
+    equity = pnl.cumsum()
+    equity_rolling = equity.rolling(ventana, min_periods=1)
+    return pd.DataFrame({
+        'N_VENTANA': pnl.rolling(ventana, min_periods=1).count(),
+        'WIN_RATE': (pnl > 0).astype(float).rolling(ventana, min_periods=1).mean(),
+        'PROFIT_FACTOR': np.where(perdida > 0, ganancia / perdida.where(perdida > 0),
+                                  np.where(ganancia > 0, np.inf, np.nan)),
+        'EXPECTATIVA': pnl.rolling(ventana, min_periods=1).mean(),
+        'DRAWDOWN_VENTANA': equity - equity_rolling.max()
+    })
+
+
+def assert_como_pandas(resultado, esperado):
+    for columna in esperado.columns:
+        np.testing.assert_allclose(resultado[columna].to_numpy(dtype=float), esperado[columna].to_numpy(dtype=float),
+                                   rtol=1e-9, atol=1e-6, err_msg=columna)
+
+
+@pytest.mark.parametrize('seed', range(3))
+@pytest.mark.parametrize('window', [1, 7, 50, 5000])
+def test_ventana_de_operaciones(seed, window):
+    pnl, _ = operaciones(2000, seed)
+    assert_como_pandas(rolling_metrics(pnl, window), metricas_con_pandas(pnl, window))
+
+
+@pytest.mark.parametrize('seed', range(3))
+@pytest.mark.parametrize('time_window', ['1h', '1D', '7D'])
+def test_ventana_de_tiempo(seed, time_window):
+    pnl, fechas = operaciones(2000, seed)
+    esperado = metricas_con_pandas(pd.Series(pnl.to_numpy(), index=pd.DatetimeIndex(fechas)), time_window)
+    resultado = rolling_metrics(pnl, times=fechas, time_window=pd.Timedelta(time_window))
+    assert_como_pandas(resultado, esperado.reset_index(drop=True))
+
+
+@pytest.mark.parametrize('window', [1, 3, 64, 1000])
+def test_maximos_deslizantes(window):
+    valores = pd.Series(np.random.default_rng(window).normal(size=999))
+    esperado = valores.rolling(window, min_periods=1).max().to_numpy()
+    np.testing.assert_array_equal(sliding_max(valores, window), esperado)
+    left = np.maximum(np.arange(len(valores)) - window + 1, 0)
+    np.testing.assert_array_equal(sliding_max_variable(valores, left), esperado)
@@ -0,0 +1,64 @@
+"""Compara el cálculo de RESULTADO $ fila a fila con la versión vectorizada
+
+Uso: python benchmarks/bench_resultado_usd.py [filas ...]
+"""
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'app'))
+
+from analysis import compute_resultado_usd, normalize_labels  # noqa: E402
+
+SIZES = [10_000, 100_000, 1_000_000]
+RESULTADOS = ['TAKE PROFIT', 'STOP LOSS', ' Stop Loss ', 'take profit parcial', 'BREAK EVEN', 'cerrada manual']
+
+
+def make_trades(n, seed=0):
+    """Genera operaciones sintéticas con las columnas que usa load_data"""
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'RESULTADO': rng.choice(RESULTADOS, size=n),
+        'LOTAJE': rng.choice([0.01, 0.1, 0.5, 1.0, 2.0], size=n),
+        'PIPS. TP': rng.uniform(5, 80, size=n).round(1),
+        'PIPS SL': rng.uniform(3, 40, size=n).round(1),
+    })
+
+
+def row_wise(df):
+    """Implementación original con df.apply(axis=1)"""
+    df = df.copy()
+    df['RESULTADO'] = df['RESULTADO'].astype(str).str.strip().str.lower()
+    return df.apply(
+        lambda row: (row['PIPS. TP'] * row['LOTAJE'] * 10) if 'take profit' in row['RESULTADO'] else
+                   (row['PIPS SL'] * row['LOTAJE'] * 10 * -1) if 'stop loss' in row['RESULTADO'] else 0,
+        axis=1
+    )
+
+
+def vectorized(df):
+    resultado = normalize_labels(df['RESULTADO'])
+    return compute_resultado_usd(resultado, df['PIPS. TP'], df['PIPS SL'], df['LOTAJE'])
+
+
+def timed(func, df):
+    start = time.perf_counter()
+    result = func(df)
+    return result, time.perf_counter() - start
+
+
+def main(sizes):
+    print(f"{'filas':>10} {'apply (s)':>12} {'vectorizado (s)':>16} {'speedup':>10}")
+    for n in sizes:
+        df = make_trades(n)
+        expected, t_apply = timed(row_wise, df)
+        result, t_vector = timed(vectorized, df)
+        pd.testing.assert_series_equal(result, expected.astype(float), check_names=False)
+        print(f"{n:>10,} {t_apply:>12.3f} {t_vector:>16.4f} {t_apply / t_vector:>9.0f}x")
+
+
+if __name__ == '__main__':
+    main([int(arg) for arg in sys.argv[1:]] or SIZES)
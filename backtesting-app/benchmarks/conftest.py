@@ -0,0 +1,93 @@
+"""Configuración de la suite de benchmarks del pipeline de backtesting
+
+Uso:
+    pytest benchmarks --bench-rows 50000
+    pytest benchmarks --update-baseline            # guarda la referencia
+    pytest benchmarks --regression-tolerance 0.3   # falla si una etapa empeora >30%
+
+La referencia (benchmarks/.baseline.json) guarda por número de filas el tiempo
+mínimo y el pico de memoria de cada etapa. También se pueden usar las opciones
+propias de pytest-benchmark (--benchmark-autosave, --benchmark-compare-fail).
+"""
+import json
+import os
+import sys
+
+import pytest
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BENCH_DIR, '..', 'app'))
+sys.path.insert(0, BENCH_DIR)
+
+from synthetic import write_workbook  # noqa: E402
+
+DEFAULT_BASELINE = os.path.join(BENCH_DIR, '.baseline.json')
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup('backtesting')
+    group.addoption('--bench-rows', type=int, default=20000, help="Operaciones del libro sintético")
+    group.addoption('--bench-seed', type=int, default=0, help="Semilla del libro sintético")
+    group.addoption('--baseline', default=DEFAULT_BASELINE, help="Archivo JSON de referencia")
+    group.addoption('--update-baseline', action='store_true', help="Guardar los resultados como referencia")
+    group.addoption('--regression-tolerance', type=float, default=0.25,
+                    help="Empeoramiento relativo permitido en tiempo y memoria")
+
+
+@pytest.fixture(scope='session')
+def bench_rows(request):
+    return request.config.getoption('--bench-rows')
+
+
+@pytest.fixture(scope='session')
+def workbook(tmp_path_factory, request, bench_rows):
+    """Libro sintético compartido por toda la sesión"""
+    path = tmp_path_factory.mktemp('backtesting') / 'operaciones.xlsx'
+    return str(write_workbook(str(path), bench_rows, request.config.getoption('--bench-seed')))
+
+
+class Baseline:
+    """Referencia de tiempo y memoria por etapa; compara y acumula resultados"""
+
+    def __init__(self, path, rows, tolerance, update):
+        self.path = path
+        self.key = str(rows)
+        self.tolerance = tolerance
+        self.update = update
+        self.data = {}
+        if os.path.exists(path):
+            with open(path, encoding='utf-8') as f:
+                self.data = json.load(f)
+        self.results = {}
+
+    def check(self, stage, seconds, peak_bytes):
+        """Registra una etapa y devuelve los empeoramientos respecto a la referencia"""
+        self.results[stage] = {'seconds': seconds, 'peak_bytes': peak_bytes}
+        reference = self.data.get(self.key, {}).get(stage)
+        if self.update or reference is None:
+            return []
+
+        failures = []
+        for metric, value in (('seconds', seconds), ('peak_bytes', peak_bytes)):
+            previous = reference.get(metric)
+            if value is None or not previous:
+                continue
+            change = value / previous - 1
+            if change > self.tolerance:
+                failures.append(f"{stage}: {metric} {previous:,.4g} -> {value:,.4g} (+{change:.0%})")
+        return failures
+
+    def save(self):
+        self.data.setdefault(self.key, {}).update(self.results)
+        with open(self.path, 'w', encoding='utf-8') as f:
+            json.dump(self.data, f, indent=2, sort_keys=True)
+
+
+@pytest.fixture(scope='session')
+def baseline(request, bench_rows):
+    config = request.config
+    reference = Baseline(config.getoption('--baseline'), bench_rows,
+                         config.getoption('--regression-tolerance'), config.getoption('--update-baseline'))
+    yield reference
+    if reference.update and reference.results:
+        reference.save()
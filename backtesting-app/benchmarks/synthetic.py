@@ -0,0 +1,87 @@
+"""Genera libros de backtesting sintéticos con la estructura del libro real
+
+Uso: python benchmarks/synthetic.py SALIDA.xlsx [--rows N] [--seed S]
+"""
+import argparse
+
+import numpy as np
+import pandas as pd
+
+DIVISAS = ['EURUSD', 'GBPUSD', 'USDJPY', 'AUDUSD', 'NZDUSD', 'USDCAD', 'EURJPY', 'XAUUSD']
+ORDENES = ['COMPRA', 'VENTA']
+RESULTADOS = ['TAKE PROFIT', 'STOP LOSS', 'BREAK EVEN']
+PROBABILIDADES = [0.45, 0.45, 0.10]
+LOTES = [0.01, 0.1, 0.5, 1.0, 2.0]
+COLUMNAS = ['OPERACIÓN', 'ORDEN', 'DIVISA', 'LOTAJE', 'PIPS. TP', 'PIPS SL',
+            'RESULTADO', 'RESULTADO $', 'FECHA']
+# Fila (1-based) del encabezado, como en el libro original
+HEADER_ROW = 10
+
+
+def generate_trades(n, seed=0, start='2020-01-01'):
+    """DataFrame con n operaciones sintéticas en el formato del libro"""
+    rng = np.random.default_rng(seed)
+    resultado = rng.choice(RESULTADOS, size=n, p=PROBABILIDADES)
+    lotaje = rng.choice(LOTES, size=n)
+    pips_tp = rng.uniform(5, 80, size=n).round(1)
+    pips_sl = rng.uniform(3, 40, size=n).round(1)
+    resultado_usd = np.select(
+        [resultado == 'TAKE PROFIT', resultado == 'STOP LOSS'],
+        [pips_tp * lotaje * 10, -pips_sl * lotaje * 10],
+        default=0.0
+    )
+    # Fechas crecientes con separación aleatoria de unos minutos a un día
+    gaps = rng.integers(5, 24 * 60, size=n).cumsum()
+    fechas = pd.Timestamp(start) + pd.to_timedelta(gaps, unit='min')
+
+    return pd.DataFrame({
+        'OPERACIÓN': np.arange(1, n + 1),
+        'ORDEN': rng.choice(ORDENES, size=n),
+        'DIVISA': rng.choice(DIVISAS, size=n),
+        'LOTAJE': lotaje,
+        'PIPS. TP': pips_tp,
+        'PIPS SL': pips_sl,
+        'RESULTADO': resultado,
+        'RESULTADO $': resultado_usd.round(2),
+        'FECHA': fechas
+    }, columns=COLUMNAS)
+
+
+def write_workbook(path, n=None, seed=0, trades=None):
+    """Escribe un libro con cabecera de cuenta, fila de encabezados y n operaciones"""
+    from openpyxl import Workbook
+
+    if trades is None:
+        trades = generate_trades(n, seed)
+
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet('BACKTESTING')
+    for row_number in range(1, HEADER_ROW):
+        if row_number == 4:
+            ws.append([None, None, None, 'TAMAÑO DE LA CUENTA', None, 1000, None, None, 'ESTADISTICAS'])
+        else:
+            ws.append([])
+    ws.append([None] + list(trades.columns))
+
+    columns = [trades[col].tolist() for col in trades.columns]
+    fechas = trades['FECHA'].dt.to_pydatetime().tolist()
+    columns[trades.columns.get_loc('FECHA')] = fechas
+    for row in zip(*columns):
+        ws.append([None] + list(row))
+    wb.save(path)
+    return path
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Genera un libro de backtesting sintético")
+    parser.add_argument('salida', help="Ruta del libro .xlsx a generar")
+    parser.add_argument('--rows', type=int, default=10000, help="Número de operaciones")
+    parser.add_argument('--seed', type=int, default=0, help="Semilla del generador")
+    args = parser.parse_args(argv)
+
+    write_workbook(args.salida, args.rows, args.seed)
+    print(f"✅ {args.salida}: {args.rows:,} operaciones")
+
+
+if __name__ == '__main__':
+    main()
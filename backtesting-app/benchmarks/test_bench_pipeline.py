@@ -0,0 +1,87 @@
+"""Benchmarks por etapa del pipeline: lectura, limpieza, métricas, drawdown, heatmap y exportación"""
+import tracemalloc
+
+import pytest
+
+pytest.importorskip('pytest_benchmark')
+
+from analysis import read_sheet, clean_data, calculate_metrics, calculate_drawdown, heatmap_grid  # noqa: E402
+from incremental import IncrementalMetrics  # noqa: E402
+from reports import export_csv, export_xlsx  # noqa: E402
+
+
+def peak_memory(func, *args):
+    """Pico de memoria asignada (bytes) durante una llamada"""
+    tracemalloc.start()
+    try:
+        func(*args)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def run_stage(benchmark, baseline, stage, func, *args, setup=None, rounds=5):
+    """Mide tiempo y memoria de una etapa y falla si empeora respecto a la referencia
+
+    Con setup (que devuelve los argumentos) cada ronda recibe datos nuevos,
+    para etapas que modifican su entrada.
+    """
+    peak = peak_memory(func, *(setup()[0] if setup else args))
+    if setup:
+        benchmark.pedantic(func, setup=setup, rounds=rounds)
+    else:
+        benchmark(func, *args)
+
+    stats = getattr(benchmark, 'stats', None)
+    seconds = stats.stats.min if stats else None
+    benchmark.extra_info['peak_bytes'] = peak
+    failures = baseline.check(stage, seconds, peak)
+    if failures:
+        pytest.fail("Regresión de rendimiento: " + "; ".join(failures))
+
+
+@pytest.fixture(scope='module')
+def raw(workbook):
+    return read_sheet(workbook)
+
+
+@pytest.fixture(scope='module')
+def df(raw):
+    return clean_data(raw.copy())
+
+
+def test_parse(benchmark, baseline, workbook):
+    benchmark.group = 'pipeline'
+    run_stage(benchmark, baseline, 'parse', read_sheet, workbook, setup=lambda: ((workbook,), {}), rounds=3)
+
+
+def test_clean(benchmark, baseline, raw):
+    benchmark.group = 'pipeline'
+    run_stage(benchmark, baseline, 'clean', clean_data, setup=lambda: ((raw.copy(),), {}))
+
+
+def test_metrics(benchmark, baseline, df):
+    benchmark.group = 'pipeline'
+    run_stage(benchmark, baseline, 'metrics', calculate_metrics, df)
+
+
+def test_incremental_sync(benchmark, baseline, df):
+    benchmark.group = 'pipeline'
+    run_stage(benchmark, baseline, 'incremental_sync', lambda data: IncrementalMetrics().sync(data), df)
+
+
+def test_drawdown(benchmark, baseline, df):
+    benchmark.group = 'pipeline'
+    run_stage(benchmark, baseline, 'drawdown', calculate_drawdown, df['RESULTADO $'])
+
+
+def test_heatmap(benchmark, baseline, df):
+    benchmark.group = 'pipeline'
+    run_stage(benchmark, baseline, 'heatmap', heatmap_grid, df['FECHA'], df['RESULTADO $'])
+
+
+@pytest.mark.parametrize('kind, export', [('csv', export_csv), ('xlsx', export_xlsx)])
+def test_export(benchmark, baseline, df, tmp_path, kind, export):
+    benchmark.group = 'export'
+    path = str(tmp_path / f'reporte.{kind}')
+    run_stage(benchmark, baseline, f'export_{kind}', export, df, path, setup=lambda: ((df, path), {}), rounds=3)
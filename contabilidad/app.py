@@ -1,18 +1,41 @@
+import os
+
+import numpy as np
 import pandas as pd
 
-# Función para limpiar montos
-def limpiar_monto(valor):
-    if isinstance(valor, str):
-        # Eliminar separadores de miles (puntos o comas) y convertir comas decimales a puntos
-        valor = valor.replace('.', '').replace(',', '.')  # Elimina puntos y convierte comas a puntos
-    return float(valor)
+from conciliacion import IndiceFacturas, conciliar, conciliar_grupos, conciliar_uno_a_uno, leer_fechas, tomar
+from montos import detectar_decimal, leer_montos
+
+# Formatos de fecha aceptados en cada archivo (se prueba en orden)
+FORMATOS_FECHA_MOVIMIENTOS = ['%d/%m/%Y', '%d/%m/%y']
+FORMATOS_FECHA_FACTURAS = ['%d.%m.%y', '%m.%d.%y']
+
+# Columnas conocidas del extracto de movimientos según su tipo
+COLUMNAS_FECHA_MOVIMIENTOS = ['FECHA CONTABLE', 'FECHA VALOR']
+COLUMNAS_MONTO_MOVIMIENTOS = ['DEBE', 'HABER', 'IMPORTE', 'SALDO']
+
+# Función para limpiar montos: detecta el separador decimal de cada valor ('1.234,56', '1234.56').
+# decimal fija el de los valores ambiguos ('1.234'); con None se deduce de los propios valores
+def limpiar_montos(valores, nombre, decimal=None):
+    montos = leer_montos(valores, decimal)
+    no_reconocidos = montos.isna() & valores.notna()
+    if no_reconocidos.any():
+        print(f"Importes no reconocidos en {nombre}: {no_reconocidos.sum()} (ej. {valores[no_reconocidos].iloc[0]!r})")
+    return montos
 
 # Función principal para procesar los archivos
-def procesar_archivos(archivo_movimientos, archivo_facturas, columna_monto_movimientos, columna_monto_facturas):
+# Con uno_a_uno cada factura se usa una sola vez, con tolerancia en el importe y, si se indica
+# ventana_dias, solo entre fechas a esa distancia como mucho.
+# Con agrupar, los movimientos sin coincidencia buscan grupos de hasta max_facturas_grupo facturas
+# sin coincidencia que sumen su importe (con la misma ventana de fechas)
+def procesar_archivos(archivo_movimientos, archivo_facturas, columna_monto_movimientos, columna_monto_facturas,
+                      uno_a_uno=False, tolerancia=0.0, ventana_dias=None,
+                      columna_fecha_movimientos='FECHA CONTABLE', columna_fecha_facturas='Fecha',
+                      agrupar=False, max_facturas_grupo=3, segundos_por_movimiento=0.05):
     # Cargar el archivo de movimientos
     try:
         df_movimientos = pd.read_csv(archivo_movimientos)
-        df_movimientos[columna_monto_movimientos] = df_movimientos[columna_monto_movimientos].apply(limpiar_monto)
+        df_movimientos[columna_monto_movimientos] = limpiar_montos(df_movimientos[columna_monto_movimientos], 'movimientos')
     except Exception as e:
         print(f"Error al cargar el archivo de movimientos: {e}")
         return
@@ -20,33 +43,57 @@ def procesar_archivos(archivo_movimientos, archivo_facturas, columna_monto_movim
     # Cargar el archivo de facturas
     try:
         df_facturas = pd.read_excel(archivo_facturas, engine='openpyxl')
-        df_facturas[columna_monto_facturas] = df_facturas[columna_monto_facturas].apply(limpiar_monto)
+        df_facturas[columna_monto_facturas] = limpiar_montos(df_facturas[columna_monto_facturas], 'facturas')
     except Exception as e:
         print(f"Error al cargar el archivo de facturas: {e}")
         return
 
-    # Crear columnas adicionales en el archivo de movimientos
-    df_movimientos['Existe en Facturas'] = 'No'
-    df_movimientos['Ruta Archivo Facturas'] = None
+    fechas_movimientos = fechas_facturas = None
+    if ventana_dias is not None:
+        fechas_movimientos = leer_fechas(df_movimientos[columna_fecha_movimientos], FORMATOS_FECHA_MOVIMIENTOS)
+        fechas_facturas = leer_fechas(df_facturas[columna_fecha_facturas], FORMATOS_FECHA_FACTURAS)
+
+    # Buscar coincidencias por importe (ignorando el signo del movimiento)
+    if uno_a_uno:
+        resultado = conciliar_uno_a_uno(
+            df_movimientos[columna_monto_movimientos], df_facturas[columna_monto_facturas],
+            tolerancia, fechas_movimientos, fechas_facturas, ventana_dias
+        )
+    else:
+        resultado = conciliar(df_movimientos[columna_monto_movimientos], df_facturas[columna_monto_facturas])
+    factura = resultado['factura']
+    factura_con_movimiento = resultado['factura_con_movimiento']
 
-    # Iterar sobre los movimientos y buscar coincidencias en las facturas
-    for idx, row in df_movimientos.iterrows():
-        monto_movimiento = abs(row[columna_monto_movimientos])  # Ignorar el signo del movimiento
-        match = df_facturas[df_facturas[columna_monto_facturas] == monto_movimiento]
+    # Crear columnas adicionales en el archivo de movimientos
+    df_movimientos['Existe en Facturas'] = np.where(factura >= 0, 'Sí', 'No')
+    df_movimientos['Ruta Archivo Facturas'] = tomar(df_facturas['Ruta'], factura)
 
-        if not match.empty:
-            # Si se encuentra el monto, actualizar las columnas correspondientes
-            df_movimientos.at[idx, 'Existe en Facturas'] = 'Sí'
-            df_movimientos.at[idx, 'Ruta Archivo Facturas'] = match.iloc[0]['Ruta']
+    # Movimientos que pagan varias facturas a la vez: grupos entre las facturas sin coincidencia
+    if agrupar:
+        grupos = conciliar_grupos(
+            df_movimientos[columna_monto_movimientos], df_facturas[columna_monto_facturas],
+            factura < 0, ~factura_con_movimiento, fechas_movimientos, fechas_facturas, ventana_dias,
+            max_facturas_grupo, segundos_por_movimiento
+        )
+        con_grupo = np.array([len(grupo) > 0 for grupo in grupos['facturas']], dtype=bool)
+        rutas = df_facturas['Ruta'].to_numpy(dtype=object)
+        df_movimientos.loc[con_grupo, 'Existe en Facturas'] = 'Sí'
+        df_movimientos.loc[con_grupo, 'Ruta Archivo Facturas'] = [
+            '; '.join(rutas[list(grupo)]) for grupo in grupos['facturas'][con_grupo]
+        ]
+        df_movimientos['Facturas en Grupo'] = np.where(con_grupo, [len(grupo) for grupo in grupos['facturas']], 0)
+        factura_con_movimiento = factura_con_movimiento | grupos['factura_con_movimiento']
+        print(f"Movimientos conciliados con varias facturas: {con_grupo.sum()} "
+              f"(sin terminar por tiempo: {grupos['agotados']})")
 
     # Guardar el archivo resultante
     output_path = '/app/facturas_con.xlsx'
     df_movimientos.to_excel(output_path, index=False, engine='openpyxl')
     print(f"El archivo resultante ha sido guardado exitosamente en: {output_path}")
 
-    # Identificar las facturas que no tienen coincidencia en los movimientos
-    montos_movimientos = set(abs(monto) for monto in df_movimientos[columna_monto_movimientos])
-    facturas_sin_coincidencia = df_facturas[~df_facturas[columna_monto_facturas].isin(montos_movimientos)]
+    # Identificar las facturas que no tienen coincidencia en los movimientos (en uno a uno, las no usadas;
+    # con agrupar, tampoco las incluidas en un grupo)
+    facturas_sin_coincidencia = df_facturas[~factura_con_movimiento]
 
     # Calcular la suma total de los montos de las facturas sin coincidencia
     suma_montos = facturas_sin_coincidencia[columna_monto_facturas].sum()
@@ -57,6 +104,104 @@ def procesar_archivos(archivo_movimientos, archivo_facturas, columna_monto_movim
     print(f"El archivo de facturas sin coincidencia ha sido guardado exitosamente en: {output_path_facturas}")
     print(f"La suma total de los montos de las facturas sin coincidencia es: {suma_montos:.2f}")
 
+# Escribe bloques de resultados en un CSV o, si la salida termina en .parquet, en Parquet (requiere pyarrow)
+class EscritorBloques:
+    def __init__(self, ruta):
+        self.ruta = ruta
+        self.parquet = ruta.lower().endswith('.parquet')
+        self.escritor = None
+        self.esquema = None
+        self.filas = 0
+
+    def escribir(self, bloque):
+        if self.parquet:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+            if self.escritor is None:
+                # Importes float64, fechas timestamp y texto el resto, fijado con el primer bloque
+                self.esquema = pa.schema([(columna, tipo_arrow(bloque[columna])) for columna in bloque.columns])
+                self.escritor = pq.ParquetWriter(self.ruta, self.esquema)
+            self.escritor.write_table(pa.Table.from_pandas(bloque, schema=self.esquema, preserve_index=False))
+        else:
+            bloque.to_csv(self.ruta, mode='w' if self.filas == 0 else 'a', header=self.filas == 0, index=False)
+        self.filas += len(bloque)
+
+    def cerrar(self):
+        if self.escritor is not None:
+            self.escritor.close()
+
+# Tipo de Arrow de una columna del bloque
+def tipo_arrow(columna):
+    import pyarrow as pa
+    if pd.api.types.is_float_dtype(columna):
+        return pa.float64()
+    if pd.api.types.is_datetime64_any_dtype(columna):
+        return pa.timestamp('ns')
+    return pa.string()
+
+# Modo por bloques para extractos muy grandes: los movimientos se leen de filas_por_bloque en
+# filas_por_bloque, cada bloque se busca en el índice de facturas construido una vez y se añade a
+# 'salida' (CSV o Parquet). Las columnas conocidas se convierten: importes a float (DEBE, HABER,
+# IMPORTE, SALDO y la columna de montos) y fechas a datetime; el resto queda como texto.
+# El separador decimal de los importes ambiguos ('1.234') se fija para todo el archivo: el indicado
+# en decimal o, con None, el que se detecta en el primer bloque para cada columna.
+# La memoria depende del tamaño del bloque y del número de facturas, no del extracto.
+# Usa la conciliación por importe (cada factura puede coincidir con varios movimientos)
+def procesar_archivos_por_bloques(archivo_movimientos, archivo_facturas, columna_monto_movimientos,
+                                  columna_monto_facturas, salida='/app/facturas_con.csv', filas_por_bloque=100_000,
+                                  decimal=None):
+    # Cargar el archivo de facturas y construir el índice por importe
+    try:
+        df_facturas = pd.read_excel(archivo_facturas, engine='openpyxl')
+        df_facturas[columna_monto_facturas] = limpiar_montos(df_facturas[columna_monto_facturas], 'facturas')
+    except Exception as e:
+        print(f"Error al cargar el archivo de facturas: {e}")
+        return
+    indice = IndiceFacturas(df_facturas[columna_monto_facturas])
+    rutas = df_facturas['Ruta'].to_numpy(dtype=object)
+
+    # Recorrer los movimientos por bloques y añadir cada resultado a la salida
+    if os.path.exists(salida):
+        os.remove(salida)
+    escritor = EscritorBloques(salida)
+    coincidencias = 0
+    try:
+        columnas = pd.read_csv(archivo_movimientos, nrows=0).columns
+        columnas_monto = [columna for columna in columnas
+                          if columna in COLUMNAS_MONTO_MOVIMIENTOS or columna == columna_monto_movimientos]
+        columnas_fecha = [columna for columna in columnas if columna in COLUMNAS_FECHA_MOVIMIENTOS]
+        # Todo se lee como texto: los importes y fechas los convierten leer_montos y leer_fechas
+        bloques = pd.read_csv(archivo_movimientos, dtype={columna: str for columna in columnas},
+                              chunksize=filas_por_bloque)
+        decimales = {}
+        for bloque in bloques:
+            for columna in columnas_monto:
+                if columna not in decimales:
+                    decimales[columna] = decimal or detectar_decimal(bloque[columna])
+                bloque[columna] = limpiar_montos(bloque[columna], f"movimientos ({columna})", decimales[columna])
+            for columna in columnas_fecha:
+                bloque[columna] = leer_fechas(bloque[columna], FORMATOS_FECHA_MOVIMIENTOS)
+            factura = indice.buscar(bloque[columna_monto_movimientos])
+            bloque['Existe en Facturas'] = np.where(factura >= 0, 'Sí', 'No')
+            bloque['Ruta Archivo Facturas'] = tomar(rutas, factura)
+            escritor.escribir(bloque)
+            coincidencias += int((factura >= 0).sum())
+    except Exception as e:
+        print(f"Error al procesar el archivo de movimientos: {e}")
+        return
+    finally:
+        escritor.cerrar()
+    print(f"El archivo resultante ha sido guardado exitosamente en: {salida} "
+          f"({escritor.filas} movimientos, {coincidencias} con factura)")
+
+    # Facturas sin coincidencia en ningún bloque
+    facturas_sin_coincidencia = df_facturas[~indice.factura_con_movimiento()]
+    suma_montos = facturas_sin_coincidencia[columna_monto_facturas].sum()
+    output_path_facturas = os.path.join(os.path.dirname(salida), 'facturas_sin.xlsx')
+    facturas_sin_coincidencia.to_excel(output_path_facturas, index=False, engine='openpyxl')
+    print(f"El archivo de facturas sin coincidencia ha sido guardado exitosamente en: {output_path_facturas}")
+    print(f"La suma total de los montos de las facturas sin coincidencia es: {suma_montos:.2f}")
+
 # Ejecutar el procesamiento
 if __name__ == "__main__":
     # Rutas de los archivos
@@ -67,5 +212,28 @@ if __name__ == "__main__":
     columna_monto_movimientos = 'IMPORTE'  # Columna de montos en el archivo de movimientos
     columna_monto_facturas = 'Valor'      # Columna de montos en el archivo de facturas
 
+    # Conciliación uno a uno (cada factura una sola vez) con tolerancia y ventana de fechas
+    uno_a_uno = False
+    tolerancia = 0.0    # Diferencia máxima de importe admitida
+    ventana_dias = None  # Días máximos entre movimiento y factura (None = sin límite)
+
+    # Movimientos que pagan varias facturas a la vez
+    agrupar = False
+    max_facturas_grupo = 3         # Facturas máximas por movimiento
+    segundos_por_movimiento = 0.05  # Tiempo máximo de búsqueda por movimiento
+
+    # Extractos muy grandes: leer por bloques y escribir el resultado en CSV o Parquet
+    por_bloques = False
+    salida_por_bloques = '/app/facturas_con.csv'  # '/app/facturas_con.parquet' para Parquet
+    filas_por_bloque = 100_000
+    decimal = None  # Separador decimal de los importes (None = detectarlo en el primer bloque)
+
     # Procesar los archivos
-    procesar_archivos(archivo_movimientos, archivo_facturas, columna_monto_movimientos, columna_monto_facturas)
\ No newline at end of file
+    if por_bloques:
+        procesar_archivos_por_bloques(archivo_movimientos, archivo_facturas, columna_monto_movimientos,
+                                      columna_monto_facturas, salida_por_bloques, filas_por_bloque, decimal)
+    else:
+        procesar_archivos(archivo_movimientos, archivo_facturas, columna_monto_movimientos, columna_monto_facturas,
+                          uno_a_uno, tolerancia, ventana_dias,
+                          agrupar=agrupar, max_facturas_grupo=max_facturas_grupo,
+                          segundos_por_movimiento=segundos_por_movimiento)
\ No newline at end of file
@@ -0,0 +1,113 @@
+"""Compara la conciliación con iterrows con la tabla hash, la uno a uno y la de grupos de conciliacion.py
+
+Uso: python bench_conciliacion.py [movimientos] [facturas]
+
+El recorrido con iterrows es O(movimientos x facturas): se mide sobre una
+muestra de movimientos y se extrapola al total.
+"""
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from conciliacion import conciliar, conciliar_grupos, conciliar_uno_a_uno, tomar
+
+MOVIMIENTOS = 100_000
+FACTURAS = 100_000
+MUESTRA_ITERROWS = 500
+# Conciliación por grupos: facturas abiertas, movimientos que pagan de 2 a 3 y ventana de fechas
+GRUPOS_FACTURAS = 5_000
+GRUPOS_MOVIMIENTOS = 1_000
+GRUPOS_VENTANA_DIAS = 30
+
+
+# Importes con dos decimales; parte de los movimientos coincide con alguna factura
+def generar_datos(n_movimientos, n_facturas, seed=0):
+    rng = np.random.default_rng(seed)
+    facturas = pd.DataFrame({
+        'Valor': np.round(rng.uniform(1, 5000, size=n_facturas), 2),
+        'Ruta': [f'Facturas/{i:07d}.pdf' for i in range(n_facturas)]
+    })
+    importes = np.round(rng.uniform(1, 5000, size=n_movimientos), 2)
+    coinciden = rng.random(n_movimientos) < 0.5
+    importes[coinciden] = rng.choice(facturas['Valor'].to_numpy(), size=coinciden.sum())
+    signo = np.where(rng.random(n_movimientos) < 0.8, -1, 1)
+    movimientos = pd.DataFrame({'IMPORTE': importes * signo})
+    return movimientos, facturas
+
+
+# Facturas abiertas con fecha y movimientos que pagan de 2 a 3 de ellas (unos días después)
+def generar_grupos(n_facturas, n_movimientos, seed=0):
+    rng = np.random.default_rng(seed)
+    importes = np.round(rng.uniform(5, 2000, size=n_facturas), 2)
+    fechas = pd.Timestamp('2024-01-01') + pd.to_timedelta(rng.integers(0, 365, size=n_facturas), unit='D')
+    tamanos = rng.integers(2, 4, size=n_movimientos)
+    inicio = np.concatenate(([0], np.cumsum(tamanos)[:-1]))
+    orden = rng.permutation(n_facturas)
+    movimientos, fechas_movimientos = [], []
+    for desde, tamano in zip(inicio, tamanos):
+        grupo = orden[desde:desde + tamano]
+        movimientos.append(-round(importes[grupo].sum(), 2))
+        fechas_movimientos.append(fechas[grupo].max() + pd.Timedelta(days=int(rng.integers(0, 10))))
+    return movimientos, fechas_movimientos, importes, fechas
+
+
+# Implementación original de procesar_archivos
+def con_iterrows(df_movimientos, df_facturas):
+    df_movimientos = df_movimientos.copy()
+    df_movimientos['Existe en Facturas'] = 'No'
+    df_movimientos['Ruta Archivo Facturas'] = None
+    for idx, row in df_movimientos.iterrows():
+        monto_movimiento = abs(row['IMPORTE'])
+        match = df_facturas[df_facturas['Valor'] == monto_movimiento]
+        if not match.empty:
+            df_movimientos.at[idx, 'Existe en Facturas'] = 'Sí'
+            df_movimientos.at[idx, 'Ruta Archivo Facturas'] = match.iloc[0]['Ruta']
+    return df_movimientos
+
+
+def con_tabla_hash(df_movimientos, df_facturas):
+    df_movimientos = df_movimientos.copy()
+    factura = conciliar(df_movimientos['IMPORTE'], df_facturas['Valor'])['factura']
+    df_movimientos['Existe en Facturas'] = np.where(factura >= 0, 'Sí', 'No')
+    df_movimientos['Ruta Archivo Facturas'] = tomar(df_facturas['Ruta'], factura)
+    return df_movimientos
+
+
+def main(n_movimientos, n_facturas):
+    movimientos, facturas = generar_datos(n_movimientos, n_facturas)
+
+    inicio = time.perf_counter()
+    rapido = con_tabla_hash(movimientos, facturas)
+    t_hash = time.perf_counter() - inicio
+
+    muestra = movimientos.iloc[:min(MUESTRA_ITERROWS, n_movimientos)]
+    inicio = time.perf_counter()
+    lento = con_iterrows(muestra, facturas)
+    t_iterrows = (time.perf_counter() - inicio) * n_movimientos / len(muestra)
+
+    pd.testing.assert_frame_equal(rapido.iloc[:len(muestra)], lento)
+    print(f"{n_movimientos:,} movimientos x {n_facturas:,} facturas "
+          f"({(rapido['Existe en Facturas'] == 'Sí').sum():,} coincidencias)")
+    print(f"iterrows (extrapolado): {t_iterrows:10.1f} s")
+    print(f"tabla hash:             {t_hash:10.3f} s  ({t_iterrows / t_hash:,.0f}x)")
+
+    inicio = time.perf_counter()
+    uno_a_uno = conciliar_uno_a_uno(movimientos['IMPORTE'], facturas['Valor'], tolerancia=0.05)
+    t_uno = time.perf_counter() - inicio
+    print(f"uno a uno (±0.05):      {t_uno:10.3f} s  ({(uno_a_uno['factura'] >= 0).sum():,} parejas)")
+
+    movimientos, fechas_mov, facturas, fechas_fact = generar_grupos(GRUPOS_FACTURAS, GRUPOS_MOVIMIENTOS)
+    inicio = time.perf_counter()
+    grupos = conciliar_grupos(movimientos, facturas, fechas_movimientos=fechas_mov, fechas_facturas=fechas_fact,
+                              ventana_dias=GRUPOS_VENTANA_DIAS, max_facturas=3)
+    t_grupos = time.perf_counter() - inicio
+    con_grupo = sum(len(grupo) > 0 for grupo in grupos['facturas'])
+    print(f"grupos ({GRUPOS_MOVIMIENTOS:,} mov. x {GRUPOS_FACTURAS:,} fact., hasta 3, {GRUPOS_VENTANA_DIAS} días): "
+          f"{t_grupos:.3f} s  ({con_grupo:,} con grupo, {grupos['agotados']} sin terminar)")
+
+
+if __name__ == '__main__':
+    argumentos = [int(arg) for arg in sys.argv[1:3]]
+    main(*(argumentos + [MOVIMIENTOS, FACTURAS][len(argumentos):]))
@@ -0,0 +1,82 @@
+"""Compara la limpieza de importes fila a fila (limpiar_monto con apply) con montos.py
+
+Uso: python bench_montos.py [importes]
+
+Los importes mezclan formatos ('-1.234,56', '1234.56', '1,234.56', '-12,29',
+'8204'); se cuentan también los que la versión fila a fila lee mal. montos.py
+valida el formato y deduce el separador, así que hace más trabajo que los dos
+replace de limpiar_monto; lo que se compara es el coste de leerlos bien.
+Se mide con importes casi todos distintos y con una columna de valores
+repetidos, donde montos.py analiza cada texto distinto una sola vez.
+"""
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from montos import leer_centavos, leer_montos
+
+IMPORTES = 1_000_000
+
+
+# Importes en texto con varios formatos y su valor exacto en centavos. Con distintos,
+# los n importes salen de ese número de valores (columnas como SALDO o cuotas fijas)
+def generar_importes(n, seed=0, distintos=None):
+    rng = np.random.default_rng(seed)
+    centavos = rng.integers(-500_000_00, 500_000_00, size=distintos or n)
+    if distintos:
+        centavos = rng.choice(centavos, size=n)
+    absoluto = pd.Series(np.abs(centavos))
+    signo = pd.Series(np.where(centavos < 0, '-', ''))
+    entero = (absoluto // 100).astype(str)
+    decimales = (absoluto % 100).map('{:02d}'.format)
+    miles = (absoluto // 100).map('{:,}'.format)
+
+    formatos = [
+        signo + miles.str.replace(',', '.') + ',' + decimales,   # -1.234,56
+        signo + entero + ',' + decimales,                        # -1234,56
+        signo + entero + '.' + decimales,                        # -1234.56
+        signo + miles + '.' + decimales,                         # -1,234.56
+    ]
+    eleccion = rng.choice(len(formatos), size=n, p=[0.3, 0.5, 0.1, 0.1])
+    texto = np.stack([formato.to_numpy(dtype=object) for formato in formatos])[eleccion, np.arange(n)]
+    return pd.Series(texto, dtype=object), centavos
+
+
+# Implementación original de app.py
+def limpiar_monto(valor):
+    if isinstance(valor, str):
+        valor = valor.replace('.', '').replace(',', '.')
+    return float(valor)
+
+
+def comparar(n, distintos=None):
+    texto, esperados = generar_importes(n, distintos=distintos)
+
+    inicio = time.perf_counter()
+    lento = texto.apply(limpiar_monto)
+    t_apply = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    rapido = leer_montos(texto)
+    t_vectorizado = time.perf_counter() - inicio
+
+    centavos, validos = leer_centavos(texto)
+    assert validos.all() and (centavos == esperados).all()
+    assert (rapido.to_numpy() == esperados / 100).all()
+    errores = (np.rint(lento.to_numpy() * 100).astype(np.int64) != esperados).sum()
+
+    print(f"{n:,} importes ({texto.nunique():,} distintos)")
+    print(f"apply(limpiar_monto): {t_apply:8.3f} s  ({errores:,} mal leídos)")
+    print(f"montos.leer_montos:   {t_vectorizado:8.3f} s  ({t_apply / t_vectorizado:.1f}x, 0 mal leídos)")
+
+
+
+def main(n):
+    comparar(n)
+    comparar(n, distintos=max(n // 20, 1))
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else IMPORTES)
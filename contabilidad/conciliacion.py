@@ -0,0 +1,339 @@
+import time
+from bisect import bisect_left
+
+import numpy as np
+import pandas as pd
+
+
+# Convierte importes a centavos enteros para comparar sin errores de coma flotante
+def a_centavos(montos):
+    valores = np.asarray(montos, dtype=float)
+    validos = ~np.isnan(valores)
+    centavos = np.zeros(len(valores), dtype=np.int64)
+    centavos[validos] = np.rint(valores[validos] * 100).astype(np.int64)
+    return centavos, validos
+
+
+# Índice hash importe -> posición de la primera factura con ese importe
+def indice_facturas(centavos, validos):
+    posiciones = pd.Series(np.flatnonzero(validos), index=centavos[validos])
+    return posiciones[~posiciones.index.duplicated(keep='first')]
+
+
+# Valores en las posiciones indicadas; las posiciones -1 quedan con el relleno
+def tomar(valores, posiciones, relleno=None):
+    valores = np.asarray(valores, dtype=object)
+    resultado = np.full(len(posiciones), relleno, dtype=object)
+    encontrados = posiciones >= 0
+    resultado[encontrados] = valores[posiciones[encontrados]]
+    return resultado
+
+
+# Índice de facturas por importe que se construye una vez y se consulta con
+# movimientos en uno o varios bloques; recuerda qué importes han aparecido
+class IndiceFacturas:
+    def __init__(self, montos_facturas):
+        self.centavos, self.validos = a_centavos(montos_facturas)
+        self.indice = indice_facturas(self.centavos, self.validos)
+        self.primera = self.indice.to_numpy()
+        self.con_movimiento = np.zeros(len(self.indice), dtype=bool)
+
+    # Para cada movimiento, la posición de la primera factura cuyo importe es igual
+    # a su valor absoluto (-1 si no hay)
+    def buscar(self, montos_movimientos):
+        centavos, validos = a_centavos(np.abs(np.asarray(montos_movimientos, dtype=float)))
+        encontradas = self.indice.index.get_indexer(centavos)
+        encontradas[~validos] = -1
+        self.con_movimiento[encontradas[encontradas >= 0]] = True
+        factura = np.full(len(centavos), -1, dtype=np.int64)
+        factura[encontradas >= 0] = self.primera[encontradas[encontradas >= 0]]
+        return factura
+
+    # Para cada factura, si algún movimiento buscado hasta ahora tiene su importe
+    def factura_con_movimiento(self):
+        return self.validos & self.con_movimiento[self.indice.index.get_indexer(self.centavos)]
+
+
+# Conciliación por importe en O(movimientos + facturas) con una tabla hash.
+# Devuelve 'factura': para cada movimiento, la posición de la primera factura
+# cuyo importe es igual al valor absoluto del movimiento (-1 si no hay), y
+# 'factura_con_movimiento': para cada factura, si algún movimiento tiene ese
+# importe en valor absoluto. Los importes se comparan en centavos.
+def conciliar(montos_movimientos, montos_facturas):
+    indice = IndiceFacturas(montos_facturas)
+    factura = indice.buscar(montos_movimientos)
+    return {
+        'factura': factura,
+        'factura_con_movimiento': indice.factura_con_movimiento()
+    }
+
+
+# Fechas con varios formatos posibles: se usa el primero que reconozca cada valor
+def leer_fechas(valores, formatos):
+    valores = pd.Series(valores).astype(str).str.strip()
+    fechas = pd.Series(pd.NaT, index=valores.index, dtype='datetime64[ns]')
+    for formato in formatos:
+        pendientes = fechas.isna()
+        fechas[pendientes] = pd.to_datetime(valores[pendientes], format=formato, errors='coerce')
+    return fechas
+
+
+# Días enteros desde 1970 para comparar ventanas de fechas y máscara de fechas válidas
+def _dias(fechas):
+    if fechas is None:
+        raise ValueError("La ventana de fechas necesita las fechas de movimientos y facturas")
+    valores = pd.to_datetime(pd.Series(fechas)).to_numpy(dtype='datetime64[D]')
+    return valores.astype(np.int64), ~np.isnat(valores)
+
+
+# Siguiente factura libre a partir de la posición i (union-find con compresión de caminos);
+# con los punteros invertidos sirve igual para buscar hacia atrás
+def _siguiente_libre(siguiente, i):
+    raiz = i
+    while siguiente[raiz] != raiz:
+        raiz = siguiente[raiz]
+    while siguiente[i] != raiz:
+        siguiente[i], i = raiz, siguiente[i]
+    return raiz
+
+
+# Factura libre del grupo [inicio, fin) (un mismo importe, ordenado por fecha) más cercana
+# a 'dia' sin pasar de 'ventana' días; con la misma distancia, la primera del archivo.
+# 'siguiente' salta hacia delante las usadas y 'anterior' hacia atrás (desplazado en uno).
+# Devuelve (índice, días de distancia) o (-1, None)
+def _libre_mas_cercana(dias, posiciones, siguiente, anterior, inicio, fin, dia, ventana):
+    medio = bisect_left(dias, dia, inicio, fin)
+    mejor, mejor_dias = -1, None
+    j = _siguiente_libre(siguiente, medio)
+    if j < fin and dias[j] - dia <= ventana:
+        mejor, mejor_dias = j, dias[j] - dia
+    k = _siguiente_libre(anterior, medio) - 1
+    if k >= inicio and dia - dias[k] <= ventana:
+        # La primera libre de esa fecha es la de menor posición en el archivo
+        k = _siguiente_libre(siguiente, bisect_left(dias, dias[k], inicio, fin))
+        if mejor < 0 or (dia - dias[k], posiciones[k]) < (mejor_dias, posiciones[mejor]):
+            mejor, mejor_dias = k, dia - dias[k]
+    return mejor, mejor_dias
+
+
+# Conciliación uno a uno: cada factura se usa como mucho una vez.
+# Un movimiento casa con una factura libre cuyo importe difiere en como mucho
+# 'tolerancia' (en la misma moneda) y, si se indica 'ventana_dias', cuya fecha
+# está a esa distancia o menos (sin fecha no hay coincidencia). Entre las
+# candidatas gana la de importe más cercano, luego la de fecha más cercana y
+# luego la primera del archivo. Las facturas se agrupan por importe y se ordenan
+# por fecha dentro de cada grupo: cada movimiento recorre los importes de su
+# tolerancia del más cercano al más lejano y en cada uno busca por bisección la
+# factura libre más cercana a su fecha, saltando las usadas con union-find. Así
+# los importes repetidos (pagos recurrentes) no hacen el coste cuadrático.
+# Devuelve lo mismo que conciliar: 'factura' por movimiento y
+# 'factura_con_movimiento' (usada) por factura.
+def conciliar_uno_a_uno(montos_movimientos, montos_facturas, tolerancia=0.0,
+                        fechas_movimientos=None, fechas_facturas=None, ventana_dias=None):
+    centavos_mov, validos_mov = a_centavos(np.abs(np.asarray(montos_movimientos, dtype=float)))
+    centavos_fact, validos_fact = a_centavos(montos_facturas)
+    tolerancia = int(round(tolerancia * 100))
+
+    usar_fechas = ventana_dias is not None
+    if usar_fechas:
+        dias_mov, fecha_mov = _dias(fechas_movimientos)
+        dias_fact, fecha_fact = _dias(fechas_facturas)
+        validos_mov = validos_mov & fecha_mov
+        validos_fact = validos_fact & fecha_fact
+    else:
+        # Sin ventana todas las fechas cuentan como iguales
+        dias_mov = np.zeros(len(centavos_mov), dtype=np.int64)
+        dias_fact = np.zeros(len(centavos_fact), dtype=np.int64)
+        ventana_dias = 0
+
+    # Facturas válidas ordenadas por importe, fecha y posición en el archivo
+    posiciones = np.flatnonzero(validos_fact)
+    posiciones = posiciones[np.lexsort((posiciones, dias_fact[posiciones], centavos_fact[posiciones]))]
+    importes = centavos_fact[posiciones]
+
+    # Grupos de facturas con el mismo importe
+    inicio_grupo = np.flatnonzero(np.diff(importes, prepend=importes[:1] - 1))
+    fin_grupo = np.append(inicio_grupo[1:], len(importes))
+    valor_grupo = importes[inicio_grupo]
+
+    # Movimientos ordenados por importe y los grupos dentro de su tolerancia
+    movimientos = np.flatnonzero(validos_mov)
+    movimientos = movimientos[np.argsort(centavos_mov[movimientos], kind='stable')]
+    objetivos = centavos_mov[movimientos]
+    primero = np.searchsorted(valor_grupo, objetivos - tolerancia, 'left')
+    ultimo = np.searchsorted(valor_grupo, objetivos + tolerancia, 'right')
+    centro = np.searchsorted(valor_grupo, objetivos, 'left')
+
+    dias = dias_fact[posiciones].tolist()
+    posiciones = posiciones.tolist()
+    inicio_grupo, fin_grupo, valor_grupo = inicio_grupo.tolist(), fin_grupo.tolist(), valor_grupo.tolist()
+    siguiente = list(range(len(posiciones) + 1))
+    anterior = list(range(len(posiciones) + 1))
+    factura = np.full(len(centavos_mov), -1, dtype=np.int64)
+    usada = np.zeros(len(centavos_fact), dtype=bool)
+
+    for movimiento, objetivo, dia, a, b, c in zip(movimientos.tolist(), objetivos.tolist(),
+                                                 dias_mov[movimientos].tolist(), primero.tolist(),
+                                                 ultimo.tolist(), centro.tolist()):
+        mejor, mejor_clave = -1, None
+        # Importes de la tolerancia del más cercano al más lejano, a ambos lados
+        izquierda, derecha = c - 1, c
+        while izquierda >= a or derecha < b:
+            if izquierda < a or (derecha < b and valor_grupo[derecha] - objetivo <= objetivo - valor_grupo[izquierda]):
+                grupo, distancia = derecha, valor_grupo[derecha] - objetivo
+                derecha += 1
+            else:
+                grupo, distancia = izquierda, objetivo - valor_grupo[izquierda]
+                izquierda -= 1
+            if mejor_clave is not None and distancia > mejor_clave[0]:
+                break
+            j, distancia_dias = _libre_mas_cercana(dias, posiciones, siguiente, anterior,
+                                                  inicio_grupo[grupo], fin_grupo[grupo], dia, ventana_dias)
+            if j >= 0 and (mejor_clave is None or (distancia, distancia_dias, posiciones[j]) < mejor_clave):
+                mejor, mejor_clave = j, (distancia, distancia_dias, posiciones[j])
+
+        if mejor >= 0:
+            siguiente[mejor] = mejor + 1
+            anterior[mejor + 1] = mejor
+            factura[movimiento] = posiciones[mejor]
+            usada[posiciones[mejor]] = True
+
+    return {
+        'factura': factura,
+        'factura_con_movimiento': usada
+    }
+
+
+# Combinaciones de 'tamano' posiciones crecientes de 'importes' (ordenados) cuya suma
+# está entre 'minimo' y 'limite', construidas añadiendo una posición cada vez. Devuelve
+# las sumas y la matriz de posiciones, o None si se supera max_combinaciones o el plazo
+def _combinaciones(importes, tamano, minimo, limite, plazo, max_combinaciones):
+    validas = (importes <= limite) & ((importes >= minimo) | (tamano > 1))
+    sumas = importes[validas]
+    posiciones = np.flatnonzero(validas)[:, None]
+    for paso in range(1, tamano):
+        if time.perf_counter() > plazo:
+            return None
+        # Siguiente posición: después de la última y sin pasar del límite (importes
+        # ordenados, así que es un intervalo); en el último paso, sin quedar por debajo
+        # del mínimo
+        ultima = posiciones[:, -1]
+        desde = ultima + 1
+        if paso == tamano - 1:
+            desde = np.maximum(desde, np.searchsorted(importes, minimo - sumas, 'left'))
+        hasta = np.searchsorted(importes, limite - sumas, 'right')
+        cuantas = np.maximum(hasta - desde, 0)
+        total = int(cuantas.sum())
+        if total > max_combinaciones:
+            return None
+        origen = np.repeat(np.arange(len(sumas)), cuantas)
+        siguiente = desde[origen] + np.arange(total) - np.repeat(np.cumsum(cuantas) - cuantas, cuantas)
+        sumas = sumas[origen] + importes[siguiente]
+        posiciones = np.column_stack((posiciones[origen], siguiente))
+    return sumas, posiciones
+
+
+# Grupos de 'tamano' importes que suman 'objetivo' (meet-in-the-middle): cada grupo se
+# parte en sus primeras tamano // 2 posiciones y el resto, se buscan las mitades cuyas
+# sumas se completan y la izquierda termina antes de que empiece la derecha. Cada
+# mitad suma al menos el objetivo menos lo máximo que puede aportar la otra.
+# 'mitades' guarda las combinaciones ya calculadas por tamaño y mínimo
+def _grupos_que_suman(importes, objetivo, tamano, mitades, plazo, max_combinaciones):
+    lados = (tamano // 2, tamano - tamano // 2)
+    claves = [(lado, objetivo - importes[len(importes) - (tamano - lado):].sum()) for lado in lados]
+    for lado, minimo in claves:
+        if (lado, minimo) not in mitades:
+            mitades[lado, minimo] = _combinaciones(importes, lado, minimo, objetivo, plazo, max_combinaciones)
+        if mitades[lado, minimo] is None:
+            return None
+    sumas_izq, izquierda = mitades[claves[0]]
+    sumas_der, derecha = mitades[claves[1]]
+
+    orden = np.argsort(sumas_der, kind='stable')
+    sumas_der, derecha = sumas_der[orden], derecha[orden]
+    desde = np.searchsorted(sumas_der, objetivo - sumas_izq, 'left')
+    cuantas = np.searchsorted(sumas_der, objetivo - sumas_izq, 'right') - desde
+    total = int(cuantas.sum())
+    if total > max_combinaciones:
+        return None
+    izq = np.repeat(np.arange(len(sumas_izq)), cuantas)
+    der = np.repeat(desde, cuantas) + np.arange(total) - np.repeat(np.cumsum(cuantas) - cuantas, cuantas)
+    separadas = izquierda[izq, -1] < derecha[der, 0]
+    return np.column_stack((izquierda[izq[separadas]], derecha[der[separadas]]))
+
+
+# Conciliación por grupos: cada movimiento pendiente busca entre las facturas libres
+# de 2 a max_facturas cuya suma de importes sea exactamente la del movimiento (en
+# centavos) y, con ventana_dias, con fechas a esa distancia como mucho. Gana el grupo
+# más pequeño, luego el de fechas más cercanas y luego el de facturas más antiguas en
+# el archivo; sus facturas dejan de estar libres. Cada movimiento tiene un plazo de
+# 'segundos' y un máximo de combinaciones; si lo supera se deja sin grupo (se cuenta
+# en 'agotados'). Devuelve 'facturas' (tupla de posiciones, vacía si no hay grupo)
+# por movimiento y 'factura_con_movimiento' (usada en algún grupo) por factura
+def conciliar_grupos(montos_movimientos, montos_facturas, pendientes=None, libres=None,
+                     fechas_movimientos=None, fechas_facturas=None, ventana_dias=None,
+                     max_facturas=3, segundos=0.05, max_combinaciones=2_000_000):
+    centavos_mov, validos_mov = a_centavos(np.abs(np.asarray(montos_movimientos, dtype=float)))
+    centavos_fact, validos_fact = a_centavos(montos_facturas)
+    if pendientes is not None:
+        validos_mov = validos_mov & np.asarray(pendientes, dtype=bool)
+    if libres is not None:
+        validos_fact = validos_fact & np.asarray(libres, dtype=bool)
+
+    usar_fechas = ventana_dias is not None
+    if usar_fechas:
+        dias_mov, fecha_mov = _dias(fechas_movimientos)
+        dias_fact, fecha_fact = _dias(fechas_facturas)
+        validos_mov = validos_mov & fecha_mov
+        validos_fact = validos_fact & fecha_fact
+
+    # Facturas libres con importe positivo, ordenadas por importe
+    posiciones = np.flatnonzero(validos_fact & (centavos_fact > 0))
+    posiciones = posiciones[np.argsort(centavos_fact[posiciones], kind='stable')]
+    importes = centavos_fact[posiciones]
+    libre = np.ones(len(posiciones), dtype=bool)
+
+    facturas = np.empty(len(centavos_mov), dtype=object)
+    facturas[:] = [()] * len(centavos_mov)
+    usada = np.zeros(len(centavos_fact), dtype=bool)
+    agotados = 0
+
+    for movimiento in np.flatnonzero(validos_mov & (centavos_mov > 0)).tolist():
+        plazo = time.perf_counter() + segundos
+        objetivo = centavos_mov[movimiento]
+
+        # Candidatas: libres, con importe menor que el objetivo y dentro de la ventana
+        candidatas = np.flatnonzero(libre[:np.searchsorted(importes, objetivo, 'left')])
+        if usar_fechas:
+            distancia = np.abs(dias_fact[posiciones[candidatas]] - dias_mov[movimiento])
+            candidatas = candidatas[distancia <= ventana_dias]
+        tamanos = range(2, min(max_facturas, len(candidatas)) + 1)
+        if not len(tamanos) or importes[candidatas[-tamanos[-1]:]].sum() < objetivo:
+            continue
+
+        mitades = {}
+        for tamano in tamanos:
+            if importes[candidatas[:tamano]].sum() > objetivo:
+                break
+            grupos = _grupos_que_suman(importes[candidatas], objetivo, tamano, mitades,
+                                       plazo, max_combinaciones)
+            if grupos is None:
+                agotados += 1
+                break
+            if len(grupos):
+                # Fechas más cercanas y después facturas más antiguas en el archivo
+                elegidas = np.sort(posiciones[candidatas[grupos]], axis=1)
+                claves = [elegidas[:, columna] for columna in reversed(range(tamano))]
+                if usar_fechas:
+                    claves.append(np.abs(dias_fact[elegidas] - dias_mov[movimiento]).sum(axis=1))
+                mejor = np.lexsort(claves)[0]
+                libre[candidatas[grupos[mejor]]] = False
+                usada[elegidas[mejor]] = True
+                facturas[movimiento] = tuple(elegidas[mejor].tolist())
+                break
+
+    return {
+        'facturas': facturas,
+        'factura_con_movimiento': usada,
+        'agotados': agotados
+    }
@@ -0,0 +1,155 @@
+from decimal import Decimal
+
+import numpy as np
+import pandas as pd
+
+# Separador decimal por defecto cuando una columna no permite deducirlo (formato español)
+DECIMAL_POR_DEFECTO = ','
+# Cifras admitidas por importe: su valor queda por debajo de 2**53 y es exacto en float
+CIFRAS_MAXIMAS = 15
+# Filas que detectar_decimal examina como mucho
+FILAS_MUESTRA = 250_000
+
+try:
+    import pyarrow  # noqa: F401
+    # Texto y enteros en Arrow: las expresiones regulares y cadenas de .str se evalúan en C++
+    _TEXTO, _ENTERO = 'string[pyarrow]', 'int64[pyarrow]'
+except ImportError:  # Sin pyarrow los mismos métodos de .str recorren los valores en Python
+    _TEXTO, _ENTERO = object, 'int64'
+
+# Caracteres que se ignoran en cualquier posición: espacios y símbolos de moneda
+_IGNORADOS = '[ \t\u00a0\u202f€$]'
+# Dígitos con separadores: sin separador de miles y con un separador opcional, o miles en
+# grupos de tres con un único tipo de separador (el primero de uno a tres dígitos)
+# seguidos opcionalmente de un decimal del otro tipo
+_CUERPO = (r'(?:[0-9]+(?:[.,][0-9]+)?'
+           r'|[0-9]{1,3}(?:\.[0-9]{3})+(?:,[0-9]+)?'
+           r'|[0-9]{1,3}(?:,[0-9]{3})+(?:\.[0-9]+)?)')
+# Signo opcional al principio ('-' también al final)
+_IMPORTE = rf'(?:[-+]?{_CUERPO}|{_CUERPO}-)'
+
+
+# Análisis de valores de texto distintos, ya sin _IGNORADOS. _IMPORTE decide si el formato
+# es válido y el resto se mide con métodos de .str sobre los dígitos y separadores.
+# Con punto y coma a la vez, el último es el decimal. Un separador repetido es de miles.
+# Un único separador es decimal salvo que pueda separar miles (de uno a tres dígitos sin
+# cero inicial y exactamente tres después): ahí es ambiguo ('1.234') y se lee como miles
+# hasta conocer el decimal de la columna.
+# Devuelve centavos, validos, ambiguo, es_decimal y el carácter del último separador
+def _analizar_unicos(textos):
+    validos = textos.str.fullmatch(_IMPORTE).to_numpy(dtype=bool)
+    negativo = textos.str.contains('-', regex=False).to_numpy(dtype=bool)
+    cuerpo = textos.str.strip('+-')
+    sin_puntos = cuerpo.str.replace('.', '', regex=False)
+    digitos = sin_puntos.str.replace(',', '', regex=False)
+    hasta_ultimo = cuerpo.str.rstrip('0123456789')
+
+    largo = cuerpo.str.len().to_numpy(dtype=np.int64)
+    cifras = digitos.str.len().to_numpy(dtype=np.int64)
+    puntos = largo - sin_puntos.str.len().to_numpy(dtype=np.int64)
+    separadores = largo - cifras
+    despues = largo - hasta_ultimo.str.len().to_numpy(dtype=np.int64)
+    ultimo_punto = hasta_ultimo.str.endswith('.').to_numpy(dtype=bool)
+    caracter = np.select([separadores == 0, ultimo_punto], [0, ord('.')], ord(',')).astype(np.uint8)
+
+    unico = separadores == 1
+    ambiguo = (unico & (despues == 3) & (cifras - despues <= 3)
+               & ~cuerpo.str.startswith('0').to_numpy(dtype=bool))
+    es_decimal = ((puntos > 0) & (puntos < separadores)) | (unico & ~ambiguo)
+    validos &= cifras <= CIFRAS_MAXIMAS
+
+    # Todos los dígitos como un entero; un ambiguo se lee como miles
+    numero = digitos.where(validos, '0').astype(_ENTERO).to_numpy(dtype=np.int64)
+    decimales = np.where(es_decimal, despues, 0)
+
+    # Centavos según los decimales: se completan hasta dos o se redondea con el tercero
+    escala = 10 ** np.clip(2 - decimales, 0, 2)
+    divisor = 10 ** np.clip(decimales - 2, 0, CIFRAS_MAXIMAS)
+    redondeo = (decimales > 2) & (numero // np.maximum(divisor // 10, 1) % 10 >= 5)
+    centavos = numero * escala // divisor + redondeo
+    centavos = np.where(negativo, -centavos, centavos)
+
+    return centavos, validos, ambiguo & validos, es_decimal & validos, caracter
+
+
+# Análisis de textos: cada valor distinto se analiza una vez (pd.factorize) y el
+# resultado se propaga a las filas con los códigos
+def _analizar_textos(textos):
+    codigos, unicos = pd.factorize(np.asarray(textos, dtype=object))
+    unicos = pd.Series(unicos, dtype=_TEXTO)
+    sucios = unicos.str.contains(_IGNORADOS).to_numpy(dtype=bool)
+    if sucios.any():
+        unicos[sucios] = unicos[sucios].str.replace(_IGNORADOS, '', regex=True)
+    return tuple(valores[codigos] for valores in _analizar_unicos(unicos))
+
+
+# Separador decimal más frecuente entre los valores que lo indican sin ambigüedad
+def _decimal_mas_frecuente(caracter, es_decimal):
+    conocidos = caracter[es_decimal]
+    return chr(np.bincount(conocidos).argmax()) if len(conocidos) else DECIMAL_POR_DEFECTO
+
+
+# Separador decimal de una columna de texto, el que leer_centavos usaría para los ambiguos.
+# Sirve para fijarlo con una muestra (el primer bloque de un archivo) y leer el resto igual
+def detectar_decimal(valores):
+    valores = pd.Series(valores, dtype=object)
+    textos = valores[valores.map(type).eq(str)].to_numpy()
+    if len(textos) == 0:
+        return DECIMAL_POR_DEFECTO
+    _, _, _, es_decimal, caracter = _analizar_textos(textos[:FILAS_MUESTRA])
+    return _decimal_mas_frecuente(caracter, es_decimal)
+
+
+# Importes en centavos enteros exactos a partir de texto en cualquier formato
+# ('1.234,56', '1,234.56', '1234.56', '-12,29', '168.65 €') o de números.
+# Con decimal=None el separador se deduce por valor y los casos ambiguos usan el
+# más frecuente de la columna; con ',' o '.' se fuerza para los ambiguos. Más de
+# dos decimales se redondean a centavos (mitad hacia arriba). Cada texto distinto se
+# analiza una sola vez con expresiones regulares vectorizadas de pandas.
+# Devuelve (centavos int64, validos)
+def leer_centavos(valores, decimal=None):
+    valores = pd.Series(valores, dtype=object).reset_index(drop=True)
+    centavos = np.zeros(len(valores), dtype=np.int64)
+    validos = np.zeros(len(valores), dtype=bool)
+
+    # Números ya leídos como tales (celdas numéricas de Excel)
+    if pd.api.types.infer_dtype(valores, skipna=False) == 'string':
+        es_texto = np.ones(len(valores), dtype=bool)
+    else:
+        es_texto = valores.map(type).eq(str).to_numpy()
+    numeros = pd.to_numeric(valores[~es_texto], errors='coerce').to_numpy(dtype=float)
+    numericos = np.flatnonzero(~es_texto)[~np.isnan(numeros)]
+    centavos[numericos] = np.rint(numeros[~np.isnan(numeros)] * 100).astype(np.int64)
+    validos[numericos] = True
+
+    filas = np.flatnonzero(es_texto)
+    centavos[filas], validos[filas], ambiguo, es_decimal, caracter = _analizar_textos(valores.to_numpy()[filas])
+
+    # Ambiguos con el separador decimal de la columna: 'A.BCD' es A,BC (+ redondeo de D)
+    if ambiguo.any():
+        if decimal is None:
+            decimal = _decimal_mas_frecuente(caracter, es_decimal)
+        ambiguas = filas[ambiguo & (caracter == ord(decimal))]
+        miles = np.abs(centavos[ambiguas]) // 100
+        como_decimal = miles // 1000 * 100 + miles % 1000 // 10 + (miles % 10 >= 5)
+        centavos[ambiguas] = np.sign(centavos[ambiguas]) * como_decimal
+    return centavos, validos
+
+
+# Índice de la entrada si es una Series, para devolver el resultado alineado
+def _indice(valores):
+    return valores.index if isinstance(valores, pd.Series) else None
+
+
+# Importes como float (NaN si no se reconocen), para columnas de DataFrame
+def leer_montos(valores, decimal=None):
+    centavos, validos = leer_centavos(valores, decimal)
+    montos = np.where(validos, centavos / 100, np.nan)
+    return pd.Series(montos, index=_indice(valores))
+
+
+# Importes como Decimal exactos (None si no se reconocen)
+def leer_decimales(valores, decimal=None):
+    centavos, validos = leer_centavos(valores, decimal)
+    decimales = [Decimal(int(c)).scaleb(-2) if v else None for c, v in zip(centavos, validos)]
+    return pd.Series(decimales, index=_indice(valores), dtype=object)
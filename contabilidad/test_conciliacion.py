@@ -0,0 +1,155 @@
+"""Conciliación uno a uno y por grupos frente a una búsqueda por fuerza bruta
+
+Uso: pytest contabilidad
+"""
+import time
+from itertools import combinations
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from conciliacion import conciliar_grupos, conciliar_uno_a_uno
+
+
+# Fechas aleatorias a partir de un día fijo
+def generar_fechas(rng, n, dias=30):
+    return pd.Series(pd.Timestamp('2025-01-01') + pd.to_timedelta(rng.integers(0, dias, size=n), unit='D'))
+
+
+# Referencia de conciliar_uno_a_uno: los movimientos por importe absoluto (y posición) toman
+# la factura libre de importe más cercano dentro de la tolerancia, luego la de fecha más
+# cercana dentro de la ventana y luego la primera del archivo
+def uno_a_uno_lento(movimientos, facturas, tolerancia=0.0, fechas_mov=None, fechas_fact=None, ventana_dias=None):
+    movimientos = [round(abs(monto) * 100) for monto in movimientos]
+    facturas = [round(monto * 100) for monto in facturas]
+    tolerancia = round(tolerancia * 100)
+    factura = [-1] * len(movimientos)
+    usada = [False] * len(facturas)
+    for i in sorted(range(len(movimientos)), key=lambda i: (movimientos[i], i)):
+        candidatas = []
+        for j in range(len(facturas)):
+            diferencia = abs(facturas[j] - movimientos[i])
+            dias = abs((fechas_mov[i] - fechas_fact[j]).days) if ventana_dias is not None else 0
+            if not usada[j] and diferencia <= tolerancia and dias <= (ventana_dias or 0):
+                candidatas.append((diferencia, dias, j))
+        if candidatas:
+            j = min(candidatas)[2]
+            factura[i] = j
+            usada[j] = True
+    return factura, usada
+
+
+@pytest.mark.parametrize('semilla', range(100))
+@pytest.mark.parametrize('tolerancia, ventana_dias', [(0.0, None), (0.05, None), (0.0, 5), (0.1, 3), (1.0, 2)])
+def test_uno_a_uno_como_fuerza_bruta(semilla, tolerancia, ventana_dias):
+    rng = np.random.default_rng(semilla)
+    n_mov, n_fact = rng.integers(0, 15, size=2)
+    # Importes de pocos valores distintos para que haya repeticiones y empates
+    movimientos = rng.integers(-60, 60, size=n_mov) / 20
+    facturas = rng.integers(0, 60, size=n_fact) / 20
+    fechas_mov = generar_fechas(rng, n_mov)
+    fechas_fact = generar_fechas(rng, n_fact)
+
+    resultado = conciliar_uno_a_uno(movimientos, facturas, tolerancia, fechas_mov, fechas_fact, ventana_dias)
+    factura, usada = uno_a_uno_lento(movimientos, facturas, tolerancia, fechas_mov, fechas_fact, ventana_dias)
+    assert resultado['factura'].tolist() == factura
+    assert resultado['factura_con_movimiento'].tolist() == usada
+
+
+# Pagos recurrentes: pocos importes distintos repetidos con fechas repartidas
+@pytest.mark.parametrize('semilla', range(10))
+def test_uno_a_uno_importes_repetidos(semilla):
+    rng = np.random.default_rng(semilla)
+    movimientos = -rng.choice([9.99, 10.0, 25.5], size=200)
+    facturas = rng.choice([9.99, 10.0, 25.5], size=250)
+    fechas_mov = generar_fechas(rng, len(movimientos), dias=120)
+    fechas_fact = generar_fechas(rng, len(facturas), dias=120)
+
+    resultado = conciliar_uno_a_uno(movimientos, facturas, 0.01, fechas_mov, fechas_fact, 3)
+    factura, usada = uno_a_uno_lento(movimientos, facturas, 0.01, fechas_mov, fechas_fact, 3)
+    assert resultado['factura'].tolist() == factura
+    assert resultado['factura_con_movimiento'].tolist() == usada
+
+
+# Con importes repetidos el coste crece casi linealmente: 8 veces más filas deben
+# costar bastante menos de las 64 veces de un recorrido cuadrático
+def test_uno_a_uno_importes_repetidos_escala():
+    def segundos(n):
+        rng = np.random.default_rng(0)
+        fechas_mov, fechas_fact = generar_fechas(rng, n, dias=365), generar_fechas(rng, n, dias=365)
+        mejor = float('inf')
+        for _ in range(3):
+            inicio = time.perf_counter()
+            conciliar_uno_a_uno(np.full(n, -9.99), np.full(n, 9.99), 0.0, fechas_mov, fechas_fact, 3)
+            mejor = min(mejor, time.perf_counter() - inicio)
+        return mejor
+
+    pocas, muchas = segundos(4_000), segundos(32_000)
+    assert muchas < 24 * pocas
+    assert muchas < 5
+
+
+def test_uno_a_uno_sin_importe_o_fecha():
+    fechas = pd.Series(pd.to_datetime(['2025-01-01', None, '2025-01-01']))
+    resultado = conciliar_uno_a_uno([10.0, 10.0, np.nan], [10.0, 10.0, 10.0], 0.0, fechas, fechas, 0)
+    assert resultado['factura'].tolist() == [0, -1, -1]
+    assert resultado['factura_con_movimiento'].tolist() == [True, False, False]
+
+
+# Referencia de conciliar_grupos: cada movimiento en orden del archivo prueba todas las
+# combinaciones de facturas libres (importe positivo y menor que el suyo, dentro de la
+# ventana) de 2 a max_facturas; gana el tamaño menor, luego la menor suma de distancias
+# en días y luego las posiciones ordenadas más pequeñas
+def grupos_lento(movimientos, facturas, fechas_mov=None, fechas_fact=None, ventana_dias=None, max_facturas=3):
+    movimientos = [round(abs(monto) * 100) for monto in movimientos]
+    facturas = [round(monto * 100) for monto in facturas]
+    grupos = [()] * len(movimientos)
+    usada = [False] * len(facturas)
+
+    def dias(i, j):
+        return abs((fechas_mov[i] - fechas_fact[j]).days) if ventana_dias is not None else 0
+
+    for i, objetivo in enumerate(movimientos):
+        candidatas = [j for j in range(len(facturas))
+                      if not usada[j] and 0 < facturas[j] < objetivo and dias(i, j) <= (ventana_dias or 0)]
+        for tamano in range(2, max_facturas + 1):
+            opciones = [(sum(dias(i, j) for j in grupo), grupo) for grupo in combinations(candidatas, tamano)
+                        if sum(facturas[j] for j in grupo) == objetivo]
+            if opciones:
+                grupos[i] = min(opciones)[1]
+                for j in grupos[i]:
+                    usada[j] = True
+                break
+    return grupos, usada
+
+
+@pytest.mark.parametrize('semilla', range(100))
+@pytest.mark.parametrize('ventana_dias, max_facturas', [(None, 2), (None, 4), (7, 3)])
+def test_grupos_como_fuerza_bruta(semilla, ventana_dias, max_facturas):
+    rng = np.random.default_rng(semilla)
+    n_mov, n_fact = rng.integers(1, 6), rng.integers(0, 12)
+    movimientos = rng.integers(-80, 80, size=n_mov) / 4
+    facturas = rng.integers(-5, 30, size=n_fact) / 4
+    fechas_mov = generar_fechas(rng, n_mov)
+    fechas_fact = generar_fechas(rng, n_fact)
+
+    resultado = conciliar_grupos(movimientos, facturas, fechas_movimientos=fechas_mov, fechas_facturas=fechas_fact,
+                                 ventana_dias=ventana_dias, max_facturas=max_facturas, segundos=10)
+    grupos, usada = grupos_lento(movimientos, facturas, fechas_mov, fechas_fact, ventana_dias, max_facturas)
+    assert resultado['agotados'] == 0
+    assert resultado['facturas'].tolist() == grupos
+    assert resultado['factura_con_movimiento'].tolist() == usada
+
+
+def test_grupos_pendientes_y_libres():
+    resultado = conciliar_grupos([30.0, 30.0, -30.0], [10.0, 20.0, 10.0, 20.0, 5.0, 25.0],
+                                 pendientes=[False, True, True], libres=[True, True, True, True, False, False])
+    assert resultado['facturas'].tolist() == [(), (0, 1), (2, 3)]
+    assert resultado['factura_con_movimiento'].tolist() == [True, True, True, True, False, False]
+
+
+def test_grupos_limite_de_combinaciones():
+    resultado = conciliar_grupos([200.0], np.arange(1, 200) / 10 + 50, max_facturas=4, max_combinaciones=100)
+    assert resultado['agotados'] == 1
+    assert resultado['facturas'].tolist() == [()]
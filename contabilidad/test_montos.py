@@ -0,0 +1,119 @@
+"""Reglas de lectura de importes de montos.py
+
+Uso: pytest contabilidad
+"""
+from decimal import Decimal
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from montos import detectar_decimal, leer_centavos, leer_decimales, leer_montos
+
+
+# Valores sin ambigüedad: el separador decimal se deduce del propio texto
+@pytest.mark.parametrize('texto, esperado', [
+    ('1.234,56', 1234.56),
+    ('1,234.56', 1234.56),
+    ('1234.56', 1234.56),
+    ('1234,56', 1234.56),
+    ('-12,29', -12.29),
+    ('+12,29', 12.29),
+    ('12,29-', -12.29),
+    ('168.65 €', 168.65),
+    ('$ 168.65', 168.65),
+    (' 1 234,50 ', 1234.5),
+    ('1.234.567', 1234567.0),
+    ('1,234,567.89', 1234567.89),
+    ('1,5', 1.5),
+    ('0,05', 0.05),
+    ('0.123', 0.12),
+    ('8204', 8204.0),
+    ('0', 0.0),
+])
+def test_formatos(texto, esperado):
+    assert leer_montos([texto]).tolist() == [esperado]
+
+
+# Más de dos decimales: se redondea a centavos, la mitad hacia arriba
+@pytest.mark.parametrize('texto, esperado', [
+    ('1.2345', 1.23),
+    ('0,005', 0.01),
+    ('0,0049', 0.0),
+    ('1,99999', 2.0),
+    ('9.999,995', 10000.0),
+    ('-0,005', -0.01),
+])
+def test_redondeo(texto, esperado):
+    assert leer_montos([texto]).tolist() == [esperado]
+
+
+@pytest.mark.parametrize('texto', [
+    '', '(x)', 'abc', 'ñ1', '12,', ',5', '1..2', '1-2', '--1', '+-1', '1+',
+    '1.2.3,4.5', '1.234.56', '1234.567,89', '1.23,4', '12345678901234567890',
+])
+def test_malformados(texto):
+    centavos, validos = leer_centavos([texto])
+    assert not validos[0]
+    assert np.isnan(leer_montos([texto])[0])
+
+
+# 'A.BCD' puede ser miles o decimales: decide el separador decimal de la columna
+@pytest.mark.parametrize('valores, decimal, esperado', [
+    (['1.234'], None, [1234.0]),
+    (['1.234', '12.50'], None, [1.23, 12.5]),
+    (['1.234', '12,50'], None, [1234.0, 12.5]),
+    (['1.234'], '.', [1.23]),
+    (['1.234'], ',', [1234.0]),
+    (['1,234'], ',', [1.23]),
+    (['1,234'], '.', [1234.0]),
+    (['1.235', '0.50'], None, [1.24, 0.5]),
+    (['12,345-'], ',', [-12.35]),
+])
+def test_ambiguos(valores, decimal, esperado):
+    assert leer_montos(valores, decimal).tolist() == esperado
+
+
+def test_detectar_decimal():
+    assert detectar_decimal(['1.234', '12.50', '3.5']) == '.'
+    assert detectar_decimal(['1.234', '12,50']) == ','
+    assert detectar_decimal(['1.234', '0']) == ','
+    assert detectar_decimal([]) == ','
+
+
+def test_numeros_y_vacios():
+    valores = pd.Series([1.5, 2.25, None, '3,10', np.nan], index=[10, 11, 12, 13, 14], dtype=object)
+    montos = leer_montos(valores)
+    assert montos.index.tolist() == [10, 11, 12, 13, 14]
+    assert montos.tolist()[:2] == [1.5, 2.25]
+    assert montos[13] == 3.1
+    assert montos[[12, 14]].isna().all()
+    assert leer_montos([]).tolist() == []
+
+
+def test_bloques_sin_separadores():
+    assert leer_montos(['0', '-3500', '12']).tolist() == [0.0, -3500.0, 12.0]
+
+
+def test_decimales_exactos():
+    assert leer_decimales(['168.65', '1.234,56', None]).tolist() == [Decimal('168.65'), Decimal('1234.56'), None]
+
+
+# Centavos exactos en varios formatos frente al valor con el que se generaron
+def test_formatos_aleatorios():
+    rng = np.random.default_rng(0)
+    centavos = rng.integers(-10_000_000_00, 10_000_000_00, size=5000)
+    textos = []
+    for valor, formato in zip(centavos.tolist(), rng.integers(0, 4, size=len(centavos)).tolist()):
+        signo = '-' if valor < 0 else ''
+        entero, decimales = divmod(abs(valor), 100)
+        miles = f'{entero:,}'
+        textos.append(signo + [
+            f'{miles.replace(",", ".")},{decimales:02d}',
+            f'{entero},{decimales:02d}',
+            f'{entero}.{decimales:02d}',
+            f'{miles}.{decimales:02d}',
+        ][formato])
+    leidos, validos = leer_centavos(textos)
+    assert validos.all()
+    assert (leidos == centavos).all()
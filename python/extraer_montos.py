@@ -1,8 +1,16 @@
 import os
+import sys
 import requests
 import re
 import pandas as pd
 
+# Lector de importes compartido con contabilidad (en la imagen se copia junto a este script)
+try:
+    from montos import leer_montos
+except ImportError:
+    sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'contabilidad'))
+    from montos import leer_montos
+
 # Patrón para extraer información de nombres de archivos
 pattern = re.compile(r'(\d{2}\.\d{2}\.\d{2})\s+(.+?)\s+(\d{1,5}(?:[.,]\d{3})*(?:[.,]\d{2})?)\.(\w+)')
 
@@ -135,6 +143,10 @@ def main():
         # Convertir los datos a un DataFrame de pandas
         df = pd.DataFrame(datos)
 
+        # Importes del nombre del archivo ('168.65', '1.234,56') como números
+        if not df.empty:
+            df['Valor'] = leer_montos(df['Valor'])
+
         # Guardar los datos en un archivo Excel
         output_path = '/app/archivos_facturas.xlsx'
         df.to_excel(output_path, index=False)